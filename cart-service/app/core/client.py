@@ -28,18 +28,34 @@ class ProductClient:
 
         return resp.json()
 
-    async def validate_product_and_size(self, product_id: int, size_id: int, quantity: int):
-        data = await self.get_product(product_id)
+    async def check_stock(self, items: list) -> list:
+        """Availability and price for many {product_id,size_id,quantity} items in one call."""
+        url = f"{self.base_url}/products/stock/check"
+        try:
+            resp = await self._client.post(url, json={"items": items})
+        except httpx.RequestError:
+            raise HTTPException(500, "Product service unavailable")
 
-        # data["sizes"] contains ProductSize objects with nested size
-        size_item = next((s for s in data.get("sizes", []) if s.get("size", {}).get("id") == size_id), None)
-        if not size_item:
+        if resp.status_code != 200:
+            raise HTTPException(500, "Product service unavailable")
+
+        return resp.json()
+
+    async def validate_product_and_size(self, product_id: int, size_id: int, quantity: int):
+        # lightweight check instead of fetching the whole product document
+        [item] = await self.check_stock([{"product_id": product_id, "size_id": size_id, "quantity": quantity}])
+        if not item["product_exists"]:
+            raise HTTPException(404, "Product not found")
+        if not item["size_exists"]:
             raise HTTPException(400, "Size not found for this product")
 
-        if size_item.get("quantity", 0) < quantity:
+        if not item["in_stock"]:
             raise HTTPException(400, "Not enough stock")
 
-        return {"product": data, "size": size_item}
+        return {
+            "product": {"id": product_id, "price": item["price"]},
+            "size": {"size": {"id": size_id}, "quantity": item["available"]},
+        }
 
     async def close(self):
         await self._client.aclose()
@@ -17,6 +17,11 @@ class Settings(BaseSettings):
     db_pass: str = Field("postgres", alias="DB_PASS")
 
     database_url: str = Field(..., alias="DATABASE_URL")
+    # streaming-реплика для маршрутов чтения (просмотр корзины)
+    replica_database_url: str = Field("", alias="REPLICA_DATABASE_URL")
+    # дольше этого отставания реплика не используется
+    replica_max_lag: float = Field(5.0, alias="REPLICA_MAX_LAG_SECONDS")
+    replica_poll_interval: float = Field(1.0, alias="REPLICA_POLL_INTERVAL_SECONDS")
 
     product_service_url: str = Field(..., alias="PRODUCT_SERVICE_URL")
     secret_key: str = Field("super_secret_key", alias="JWT_SECRET")
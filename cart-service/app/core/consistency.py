@@ -0,0 +1,121 @@
+"""Read-your-writes routing between the primary and a streaming replica.
+
+Successful writes answer with ``X-Consistency-Token: cart:<LSN>`` — the
+primary's WAL position right after the commit. Clients send the latest
+token of every service back in the same header, comma-separated
+(``cart:0/3A1,products:0/16B3748``); a read goes to the replica only when it
+has replayed past the token of this service, otherwise to the primary. The
+literal ``primary`` always reads from the primary (used by internal calls
+that must not see stale data). Each service has its own cluster, so LSNs
+are only comparable within one scope.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+CONSISTENCY_HEADER = "X-Consistency-Token"
+TOKEN_SCOPE = "cart"
+PRIMARY_TOKEN = "primary"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# на standby — последняя применённая позиция и отставание; на самом primary
+# (реплика не настроена отдельно, dev) — текущая позиция и нулевое отставание
+_REPLICA_STATUS = text("""
+    SELECT
+        CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() ELSE pg_current_wal_lsn() END::text,
+        CASE
+            WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+""")
+
+
+def parse_lsn(value: str) -> int:
+    """'16/B374D848' -> 0x16B374D848; ValueError on anything else."""
+    high, _, low = value.partition("/")
+    if not low:
+        raise ValueError(f"Invalid LSN: {value!r}")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def format_token(lsn: str) -> str:
+    return f"{TOKEN_SCOPE}:{lsn}"
+
+
+def token_for_scope(header: Optional[str]) -> Optional[str]:
+    """This service's part of the header: an LSN, ``primary`` or None."""
+    if not header:
+        return None
+    for part in header.split(","):
+        part = part.strip()
+        if part == PRIMARY_TOKEN:
+            return PRIMARY_TOKEN
+        scope, _, lsn = part.partition(":")
+        if scope == TOKEN_SCOPE and lsn:
+            return lsn
+    return None
+
+
+class ReplicaMonitor:
+    """Tracks how far the replica has replayed, polled in the background.
+
+    Routing decisions use the last sample and never query the replica
+    themselves. A replayed LSN only grows, so a slightly old sample can
+    only send a read to the primary needlessly, never to a replica that
+    is behind the client's token.
+    """
+
+    def __init__(self, max_lag: float, poll_interval: float):
+        self.max_lag = max_lag
+        self.poll_interval = poll_interval
+        self.replay_lsn: Optional[int] = None
+        self.lag: Optional[float] = None
+        self._sampled_at = 0.0
+
+    def observe(self, replay_lsn: int, lag: float) -> None:
+        self.replay_lsn = replay_lsn
+        self.lag = lag
+        self._sampled_at = time.monotonic()
+
+    def can_serve(self, token: Optional[str]) -> bool:
+        # нет свежего замера (реплика недоступна) или отставание больше допустимого — primary
+        if self.replay_lsn is None or time.monotonic() - self._sampled_at > 3 * self.poll_interval:
+            return False
+        if self.lag > self.max_lag:
+            return False
+        if token is None:
+            return True
+        if token == PRIMARY_TOKEN:
+            return False
+        try:
+            return self.replay_lsn >= parse_lsn(token)
+        except ValueError:
+            return False
+
+    async def poll(self, engine: AsyncEngine) -> None:
+        async with engine.connect() as conn:
+            lsn, lag = (await conn.execute(_REPLICA_STATUS)).one()
+        self.observe(parse_lsn(lsn), float(lag))
+
+    async def run(self, engine: AsyncEngine) -> None:
+        while True:
+            try:
+                await self.poll(engine)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Replica status poll failed, reads go to the primary", exc_info=True)
+            await asyncio.sleep(self.poll_interval)
+
+
+async def current_token(engine: AsyncEngine) -> str:
+    """Token for a write that has just committed on the primary."""
+    async with engine.connect() as conn:
+        lsn = (await conn.execute(text("SELECT pg_current_wal_lsn()::text"))).scalar_one()
+    return format_token(lsn)
@@ -1,8 +1,10 @@
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker 
 from sqlalchemy.orm import DeclarativeBase
 from typing import AsyncGenerator
 
 from .config import settings
+from .consistency import CONSISTENCY_HEADER, ReplicaMonitor, token_for_scope
 
 engine = create_async_engine(settings.database_url, echo=True, future=True)
 
@@ -14,6 +16,21 @@ AsyncSessionLocal = async_sessionmaker(
     autocommit=False
 )
 
+# реплика для чтения; без REPLICA_DATABASE_URL все запросы идут в primary
+replica_engine = (
+    create_async_engine(settings.replica_database_url, echo=True, future=True)
+    if settings.replica_database_url
+    else None
+)
+ReplicaSessionLocal = async_sessionmaker(
+    replica_engine or engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+    autocommit=False
+)
+replica_monitor = ReplicaMonitor(max_lag=settings.replica_max_lag, poll_interval=settings.replica_poll_interval)
+
 # Базовый класс для моделей
 class Base(DeclarativeBase):
     pass
@@ -34,6 +51,24 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 #         await conn.run_sync(Base.metadata.create_all)
 
 # Функция для закрытия соединений
+def read_session_factory(request: Request) -> async_sessionmaker:
+    """Replica if it has caught up with the client's consistency token and is not lagging, else primary."""
+    if replica_engine is not None and replica_monitor.can_serve(
+        token_for_scope(request.headers.get(CONSISTENCY_HEADER))
+    ):
+        return ReplicaSessionLocal
+    return AsyncSessionLocal
+
+# Зависимость для маршрутов только на чтение
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with read_session_factory(request)() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
 async def close_db():
     """Закрытие соединений с БД"""
-    await engine.dispose()
\ No newline at end of file
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
\ No newline at end of file
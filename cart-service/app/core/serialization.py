@@ -0,0 +1,23 @@
+"""Fast JSON responses that skip FastAPI's response_model round trip.
+
+Routes keep ``response_model`` for the OpenAPI schema; a handler that
+returns a ``Response`` is sent as is, with the body dumped to bytes by a
+module-level TypeAdapter in one pydantic-core call. Everything else is
+rendered by ``ORJSONResponse``, the app's default response class.
+"""
+from typing import Any, Mapping, Optional
+
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+__all__ = ["ORJSONResponse", "dump_model", "json_response"]
+
+
+def dump_model(adapter: TypeAdapter, value: Any) -> bytes:
+    """Validate ORM objects (or dicts) with ``adapter`` and dump them as JSON."""
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def json_response(body: bytes, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
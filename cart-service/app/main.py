@@ -1,14 +1,35 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
+from app.core.consistency import CONSISTENCY_HEADER, SAFE_METHODS, current_token
+from app.core.database import close_db, engine, replica_engine, replica_monitor
+from app.core.serialization import ORJSONResponse
 
 from app.routes import cart
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # замеры отставания реплики для маршрутизации чтений
+    monitor = asyncio.create_task(replica_monitor.run(replica_engine)) if replica_engine is not None else None
+    yield
+    if monitor is not None:
+        monitor.cancel()
+        with suppress(asyncio.CancelledError):
+            await monitor
+    await close_db()
+
+
 app = FastAPI(
     title=settings.app_name,
+    lifespan=lifespan,
     debug=settings.debug,
+    # ответы с response_model кодируются orjson вместо json.dumps
+    default_response_class=ORJSONResponse,
     docs_url='/api/docs',
     redoc_url='/api/redoc',
 )
@@ -19,8 +40,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CONSISTENCY_HEADER],
 )
 
+
+@app.middleware("http")
+async def consistency_token(request: Request, call_next):
+    """Attach the read-your-writes token to successful writes (only when a replica is configured)."""
+    response = await call_next(request)
+    if replica_engine is not None and request.method not in SAFE_METHODS and response.status_code < 400:
+        response.headers[CONSISTENCY_HEADER] = await current_token(engine)
+    return response
+
 app.mount('/static', StaticFiles(directory=settings.static_dir), name='static')
 
 app.include_router(cart.router)
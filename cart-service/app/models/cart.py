@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import DateTime, ForeignKey, Integer, Float
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Float
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..core.database import Base
 
@@ -22,6 +22,10 @@ class Cart(Base):
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # поиск позиции корзины по (cart_id, product_id, size_id) и загрузка Cart.items
+        Index("ix_cart_items_cart_id_product_id_size_id", "cart_id", "product_id", "size_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     cart_id: Mapped[int] = mapped_column(ForeignKey("carts.id", ondelete="CASCADE"))
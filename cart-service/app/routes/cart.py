@@ -1,25 +1,37 @@
 from fastapi import APIRouter, Depends, status, HTTPException, Request
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..core.database import get_db
+from ..core.database import get_db, get_read_db
 from ..services.cart import CartService
 from ..schemas.cart import CartItemCreate, CartItemUpdate, CartResponse, CartItemResponse, CartItemChange
 from ..core.client import ProductClient
 from ..core.config import settings
+from ..core.serialization import dump_model, json_response
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
+# схема ответа собирается один раз при импорте
+_cart_adapter = TypeAdapter(CartResponse)
+
 product_client = ProductClient(base_url=settings.product_service_url)
 
 async def get_cart_service(db: AsyncSession = Depends(get_db)) -> CartService:
     return CartService(db=db, product_client=product_client)
 
+# чтение с реплики, если она догнала токен клиента; сессия primary нужна только для создания корзины
+async def get_cart_reader(
+    db: AsyncSession = Depends(get_db), read_db: AsyncSession = Depends(get_read_db)
+) -> CartService:
+    return CartService(db=db, product_client=product_client, read_db=read_db)
+
 # --- Получить корзину ---
 @router.get("/", response_model = CartResponse)
-async def get_cart(request: Request, service: CartService = Depends(get_cart_service)):
+async def get_cart(request: Request, service: CartService = Depends(get_cart_reader)):
     user_id = request.headers.get("x-user-id")
     if not user_id:
         raise HTTPException(401, "User ID missing in headers")
-    return await service.get_cart(int(user_id))
+    # response_model остаётся для схемы OpenAPI, тело собирается адаптером без повторной валидации
+    return json_response(dump_model(_cart_adapter, await service.view_cart(int(user_id))))
 
 # --- Добавить товар в корзину ---
 @router.post("/add", response_model= CartResponse)
@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -6,8 +7,10 @@ from ..core.client import ProductClient
 from ..models.cart import CartItem
 
 class CartService:
-    def __init__(self, db: AsyncSession, product_client: ProductClient):
+    def __init__(self, db: AsyncSession, product_client: ProductClient, read_db: Optional[AsyncSession] = None):
         self.repo = CartRepository(db)
+        # чтение с реплики (если маршрут её выдал), запись — всегда в primary
+        self.read_repo = CartRepository(read_db) if read_db is not None else self.repo
         self.client = product_client
 
     async def get_cart(self, user_id: int):
@@ -16,6 +19,13 @@ class CartService:
             cart = await self.repo.create_cart(user_id)
         return cart
 
+    async def view_cart(self, user_id: int):
+        """Cart for display, read via ``read_db``; a missing cart is created on the primary."""
+        cart = await self.read_repo.get_cart(user_id)
+        if not cart:
+            cart = await self.get_cart(user_id)
+        return cart
+
     async def add_item(self, user_id: int, product_id: int, size_id: int, quantity: int):
         # 1. Проверка наличия продукта и размера
         product_data = await self.client.validate_product_and_size(product_id, size_id, quantity)
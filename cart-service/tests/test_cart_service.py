@@ -167,3 +167,24 @@ async def test_clear_cart_removes_all_items():
     # remove_item вызван дважды, по одному на каждый элемент
     assert repo.remove_item.await_count == 2
     assert res is cart
+
+
+# -------------------
+# Тест: просмотр корзины читает с реплики, а отсутствующую создаёт в primary
+# -------------------
+@pytest.mark.asyncio
+async def test_view_cart_reads_replica_and_creates_on_primary():
+    svc = CartService(db=None, product_client=AsyncMock(), read_db=None)
+    svc.read_repo = AsyncMock()
+    svc.repo = AsyncMock()
+
+    svc.read_repo.get_cart.return_value = make_cart([make_item(1, 1, 2)])
+    cart = await svc.view_cart(1)
+    assert len(cart.items) == 1
+    svc.repo.get_cart.assert_not_awaited()
+
+    svc.read_repo.get_cart.return_value = None
+    svc.repo.get_cart.return_value = None
+    svc.repo.create_cart.return_value = make_cart()
+    await svc.view_cart(1)
+    svc.repo.create_cart.assert_awaited_once_with(1)
@@ -0,0 +1,53 @@
+"""Fold orders placed before the outbox into the recommendation matrix.
+
+    python -m app.commands.backfill_recommendations
+    python -m app.commands.backfill_recommendations --chunk-size 2000
+
+The background builder reads only ``order.created`` events, which exist for
+orders confirmed since the outbox was added. This walks the older
+``order_items`` history once, under its own watermark on ``orders.id``, so
+it can be stopped and rerun; orders that have an event are left to the
+builder and never counted twice.
+"""
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, close_db
+from app.services.recommendation_service import RecommendationService
+
+logger = logging.getLogger(__name__)
+
+LOCK_RETRY_SECONDS = 1.0
+
+
+async def backfill(chunk_size: int) -> None:
+    total = 0
+    try:
+        while True:
+            async with AsyncSessionLocal() as session:
+                processed = await RecommendationService(session).backfill_chunk(chunk_size)
+            if processed is None:
+                # матрицу сейчас обновляет фоновая задача — ждём её
+                await asyncio.sleep(LOCK_RETRY_SECONDS)
+                continue
+            total += processed
+            if processed < chunk_size:
+                break
+            logger.info("Processed %s orders", total)
+    finally:
+        await close_db()
+    logger.info("Backfill finished: %s orders", total)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=settings.recommendations_chunk_size, help="orders per transaction")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(backfill(args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import abc
+import asyncio
+import json
+import logging
+import sqlite3
+from typing import List
+
+from fastapi.concurrency import run_in_threadpool
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Broker(abc.ABC):
+    """Where the outbox relay publishes events.
+
+    ``publish`` gets a batch of event dicts ordered by ``position``. Delivery
+    is at-least-once: if the relay fails to commit after publishing, the same
+    batch is published again, so consumers should dedupe by event ``id``.
+    """
+
+    @abc.abstractmethod
+    async def publish(self, events: List[dict]) -> None:
+        ...
+
+
+class InProcessBroker(Broker):
+    """Fans events out to asyncio queues inside this process."""
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._subscribers: List[asyncio.Queue] = []
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    async def publish(self, events: List[dict]) -> None:
+        for queue in self._subscribers:
+            for event in events:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # медленный подписчик догонит по /events?since=
+                    logger.warning("Subscriber queue is full, dropping event %s", event["id"])
+
+
+class SQLiteBroker(Broker):
+    """Appends events to a local SQLite file (for development and tests)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, events: List[dict]) -> None:
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY, position INTEGER, topic TEXT, event_type TEXT, "
+                "aggregate_id TEXT, payload TEXT, created_at TEXT)"
+            )
+            # повторная публикация того же батча не создаёт дублей
+            conn.executemany(
+                "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (e["id"], e["position"], e["topic"], e["event_type"], e["aggregate_id"],
+                     json.dumps(e["payload"]), e["created_at"])
+                    for e in events
+                ],
+            )
+
+    async def publish(self, events: List[dict]) -> None:
+        await run_in_threadpool(self._write, events)
+
+
+def create_broker() -> Broker:
+    if settings.outbox_broker == "sqlite":
+        return SQLiteBroker(settings.outbox_sqlite_path)
+    if settings.outbox_broker == "memory":
+        return InProcessBroker()
+    raise ValueError(f"Unknown OUTBOX_BROKER: {settings.outbox_broker}")
+
+
+broker = create_broker()
@@ -1,11 +1,19 @@
+import asyncio
 import httpx
 from fastapi import HTTPException
 
+from .consistency import CONSISTENCY_HEADER, PRIMARY_TOKEN
+
+# заказ собирается из корзины, цен и остатков — читать их с отстающей реплики нельзя
+_PRIMARY_READS = {CONSISTENCY_HEADER: PRIMARY_TOKEN}
+# не больше, чем принимает /products/batch (MAX_BATCH_IDS в products-service)
+BATCH_SIZE = 100
+
 
 class ProductClient:
     def __init__(self, base_url: str, timeout: float = 5.0):
         self.base_url = base_url.rstrip("/")
-        self._client = httpx.AsyncClient(timeout=timeout)
+        self._client = httpx.AsyncClient(timeout=timeout, headers=_PRIMARY_READS)
 
     async def get_product(self, product_id: int) -> dict:
         url = f"{self.base_url}/products/{product_id}"
@@ -21,39 +29,110 @@ class ProductClient:
 
         return resp.json()
 
+    async def get_products(self, product_ids: list, concurrency: int = 10) -> dict:
+        """Fetch many products at once. Returns {product_id: product}; unknown ids are absent.
+
+        Uses the /products/batch endpoint in chunks of BATCH_SIZE ids; chunks
+        it can't serve fall back to concurrent single-product requests
+        instead of a serial loop.
+        """
+        ids = list(dict.fromkeys(product_ids))
+        found = {}
+        missed = []
+        url = f"{self.base_url}/products/batch"
+        for i in range(0, len(ids), BATCH_SIZE):
+            chunk = ids[i:i + BATCH_SIZE]
+            try:
+                resp = await self._client.get(url, params={"ids": ",".join(str(pid) for pid in chunk)})
+                if resp.status_code == 200:
+                    found.update((p["id"], p) for p in resp.json())
+                    continue
+            except httpx.RequestError:
+                pass
+            missed += chunk
+        if not missed:
+            return found
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(pid: int):
+            async with semaphore:
+                try:
+                    return await self.get_product(pid)
+                except HTTPException as e:
+                    if e.status_code == 404:
+                        return None
+                    raise
+
+        products = await asyncio.gather(*(fetch(pid) for pid in missed))
+        found.update((p["id"], p) for p in products if p)
+        return found
+
+    async def check_stock(self, items: list) -> list:
+        """Availability and price for many {product_id,size_id,quantity} items in one call."""
+        url = f"{self.base_url}/products/stock/check"
+        try:
+            resp = await self._client.post(url, json={"items": items})
+        except httpx.RequestError:
+            raise HTTPException(500, "Product service unavailable")
+
+        if resp.status_code != 200:
+            raise HTTPException(500, "Product service unavailable")
+
+        return resp.json()
+
     async def validate_product_and_size(self, product_id: int, size_id: int, quantity: int):
-        data = await self.get_product(product_id)
-        size_item = next((s for s in data.get("sizes", []) if s.get("size", {}).get("id") == size_id), None)
-        if not size_item:
+        # lightweight check instead of fetching the whole product document
+        [item] = await self.check_stock([{"product_id": product_id, "size_id": size_id, "quantity": quantity}])
+        if not item["product_exists"]:
+            raise HTTPException(404, "Product not found")
+        if not item["size_exists"]:
             raise HTTPException(400, "Size not found for this product")
 
-        if size_item.get("quantity", 0) < quantity:
+        if not item["in_stock"]:
             raise HTTPException(400, "Not enough stock")
 
-        return {"product": data, "size": size_item}
+        return {
+            "product": {"id": product_id, "price": item["price"]},
+            "size": {"size": {"id": size_id}, "quantity": item["available"]},
+        }
 
-    async def reserve_items(self, items: list):
-        """Reserve multiple items on products-service. Items: list of {product_id,size_id,quantity}"""
-        url = f"{self.base_url}/products/reserve"
+    async def hold_items(self, items: list) -> dict:
+        """Create a time-limited stock hold on products-service. Items: list of {product_id,size_id,quantity}"""
+        url = f"{self.base_url}/products/holds/"
         try:
-            resp = await self._client.post(url, json=items)
+            resp = await self._client.post(url, json={"items": items})
         except httpx.RequestError:
             raise HTTPException(500, "Product service unavailable")
 
-        if resp.status_code != 200:
+        if resp.status_code != 201:
             # bubble up product service message if present
             detail = resp.json() if resp.headers.get("content-type", "").startswith("application/json") else None
             raise HTTPException(status_code=resp.status_code, detail=detail or "Reserve failed")
 
-    async def release_items(self, items: list):
-        url = f"{self.base_url}/products/release"
+        return resp.json()
+
+    async def confirm_hold(self, hold_id: str) -> dict:
+        url = f"{self.base_url}/products/holds/{hold_id}/confirm"
+        try:
+            resp = await self._client.post(url)
+        except httpx.RequestError:
+            raise HTTPException(500, "Product service unavailable")
+
+        if resp.status_code != 200:
+            raise HTTPException(status_code=resp.status_code, detail="Hold confirm failed")
+
+        return resp.json()
+
+    async def cancel_hold(self, hold_id: str):
+        url = f"{self.base_url}/products/holds/{hold_id}/cancel"
         try:
-            resp = await self._client.post(url, json=items)
+            resp = await self._client.post(url)
         except httpx.RequestError:
             raise HTTPException(500, "Product service unavailable")
 
         if resp.status_code != 200:
-            raise HTTPException(status_code=resp.status_code, detail="Release failed")
+            raise HTTPException(status_code=resp.status_code, detail="Hold cancel failed")
 
     async def close(self):
         await self._client.aclose()
@@ -62,7 +141,7 @@ class ProductClient:
 class CartClient:
     def __init__(self, base_url: str, timeout: float = 5.0):
         self.base_url = base_url.rstrip("/")
-        self._client = httpx.AsyncClient(timeout=timeout)
+        self._client = httpx.AsyncClient(timeout=timeout, headers=_PRIMARY_READS)
 
     async def get_cart(self, user_id: int) -> dict:
         url = f"{self.base_url}/cart/"
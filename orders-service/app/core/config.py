@@ -18,6 +18,11 @@ class Settings(BaseSettings):
     db_pass: str = Field("postgres", alias="DB_PASS")
 
     database_url: str = Field(..., alias="DATABASE_URL")
+    # streaming-реплика для маршрутов чтения (история заказов)
+    replica_database_url: str = Field("", alias="REPLICA_DATABASE_URL")
+    # дольше этого отставания реплика не используется
+    replica_max_lag: float = Field(5.0, alias="REPLICA_MAX_LAG_SECONDS")
+    replica_poll_interval: float = Field(1.0, alias="REPLICA_POLL_INTERVAL_SECONDS")
 
     secret_key: str = Field("super_secret_key", alias="JWT_SECRET")
     algorithm: str = Field("HS256", alias="JWT_ALGORITHM")
@@ -29,6 +34,16 @@ class Settings(BaseSettings):
     static_dir: str = Field("static", alias="STATIC_DIR")
     images_dir: str = Field("static/images", alias="IMAGES_DIR")
 
+    outbox_broker: str = Field("memory", alias="OUTBOX_BROKER")  # memory | sqlite
+    outbox_sqlite_path: str = Field("outbox.sqlite3", alias="OUTBOX_SQLITE_PATH")
+    outbox_relay_interval: float = Field(1.0, alias="OUTBOX_RELAY_INTERVAL_SECONDS")
+    outbox_relay_batch_size: int = Field(100, alias="OUTBOX_RELAY_BATCH_SIZE")
+
+    # "часто покупают вместе": пересчёт по новым событиям order.created из outbox
+    recommendations_interval: float = Field(60.0, alias="RECOMMENDATIONS_INTERVAL_SECONDS")
+    recommendations_chunk_size: int = Field(500, alias="RECOMMENDATIONS_CHUNK_SIZE")
+    recommendations_top_n: int = Field(20, alias="RECOMMENDATIONS_TOP_N")
+
     @property
     def async_database_url(self) -> str:
         return self.database_url
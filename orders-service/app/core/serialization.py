@@ -0,0 +1,23 @@
+"""Fast JSON responses that skip FastAPI's response_model round trip.
+
+Routes keep ``response_model`` for the OpenAPI schema; a handler that
+returns a ``Response`` is sent as is. Row projections already shaped like
+the response model are encoded by orjson straight to bytes; everything
+else is rendered by ``ORJSONResponse``, the app's default response class.
+"""
+from typing import Any, Mapping, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from starlette.responses import Response
+
+__all__ = ["ORJSONResponse", "dump_rows", "json_response"]
+
+
+def dump_rows(rows: Any) -> bytes:
+    """JSON for plain dicts/lists already shaped like the response model."""
+    return orjson.dumps(rows)
+
+
+def json_response(body: bytes, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
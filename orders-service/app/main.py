@@ -1,14 +1,44 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.consistency import CONSISTENCY_HEADER, SAFE_METHODS, current_token
+from app.core.database import close_db, engine, replica_engine, replica_monitor
+from app.core.serialization import ORJSONResponse
 
-from app.routes import orders
+from app.routes import events, orders, recommendations
+from app.services.outbox_service import run_outbox_relay
+from app.services.recommendation_service import run_recommendation_builder
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # публикация событий из outbox в брокер
+    tasks = [
+        asyncio.create_task(run_outbox_relay()),
+        # инкрементальный пересчёт "часто покупают вместе" по новым заказам
+        asyncio.create_task(run_recommendation_builder()),
+    ]
+    # замеры отставания реплики для маршрутизации чтений
+    if replica_engine is not None:
+        tasks.append(asyncio.create_task(replica_monitor.run(replica_engine)))
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_db()
 
 
 app = FastAPI(
     title=settings.app_name,
+    lifespan=lifespan,
     debug=settings.debug,
+    # ответы с response_model кодируются orjson вместо json.dumps
+    default_response_class=ORJSONResponse,
     docs_url='/api/docs',
     redoc_url='/api/redoc',
 )
@@ -18,8 +48,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CONSISTENCY_HEADER],
 )
 
+
+@app.middleware("http")
+async def consistency_token(request: Request, call_next):
+    """Attach the read-your-writes token to successful writes (only when a replica is configured)."""
+    response = await call_next(request)
+    if replica_engine is not None and request.method not in SAFE_METHODS and response.status_code < 400:
+        response.headers[CONSISTENCY_HEADER] = await current_token(engine)
+    return response
+
+# до orders: иначе /orders/events попадёт в /orders/{order_id}
+app.include_router(events.router)
+app.include_router(recommendations.router)
 app.include_router(orders.router)
 
 
@@ -1,15 +1,24 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, Float, ForeignKey, DateTime, String, func
+from sqlalchemy import Index, Integer, Float, ForeignKey, DateTime, String, func
 from app.core.database import Base
 
+# pending — заказ записан, резерв на складе ещё не подтверждён
+ORDER_PENDING = "pending"
+ORDER_CREATED = "created"
+ORDER_CANCELLED = "cancelled"
+
 
 class Order(Base):
     __tablename__ = "orders"
-    
+    __table_args__ = (
+        # история заказов пользователя, от новых к старым
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key = True, autoincrement = True, index = True)
-    user_id: Mapped[int] = mapped_column(Integer, index=True)
+    user_id: Mapped[int] = mapped_column(Integer)
     total_price: Mapped[float] = mapped_column(Float)
-    status: Mapped[str] = mapped_column(String(50), default="created")
+    status: Mapped[str] = mapped_column(String(50), default=ORDER_CREATED)
     
     created_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
     
@@ -20,7 +29,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
-    order_id: Mapped[int] = mapped_column(Integer, ForeignKey("orders.id"))
+    order_id: Mapped[int] = mapped_column(Integer, ForeignKey("orders.id"), index=True)
     product_id: Mapped[int] = mapped_column(Integer)
     size_id: Mapped[int] = mapped_column(Integer)
     quantity: Mapped[int] = mapped_column(Integer)
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import JSON, BigInteger, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+from ..core.database import Base
+
+
+class ProductPair(Base):
+    """Sparse co-occurrence matrix: how many orders contained both products.
+
+    Stored in both directions, so a product's neighbours are one range on
+    the primary key.
+    """
+    __tablename__ = "product_pairs"
+
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    other_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    orders: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class ProductRecommendation(Base):
+    """Top-N "frequently bought together" for one product, best first."""
+    __tablename__ = "product_recommendations"
+
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    product_ids: Mapped[List[int]] = mapped_column(JSON, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class JobWatermark(Base):
+    """Last outbox position a background job has fully processed."""
+    __tablename__ = "job_watermarks"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    position: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
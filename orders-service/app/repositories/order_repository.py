@@ -1,34 +1,60 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from sqlalchemy.orm import selectinload
 from typing import List
 
-from app.models.order import Order, OrderItem
+from app.models.order import ORDER_CANCELLED, ORDER_CREATED, ORDER_PENDING, Order, OrderItem
+from app.models.outbox_event import TOPIC_ORDERS
+from app.repositories.outbox_repository import OutboxRepository
+
+# порядок ключей как в OrderItemResponse — тот же JSON, что дал бы response_model
+ITEM_FIELDS = ("product_id", "size_id", "quantity", "price", "id")
 
 
 class OrderRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.outbox = OutboxRepository(db)
 
     async def create_order(self, user_id: int, total_price: float, items: List[dict]) -> Order:
-        order = Order(user_id=user_id, total_price=total_price)
+        """Insert a pending order; ``confirm`` makes it created once the stock hold is confirmed."""
+        order = Order(user_id=user_id, total_price=total_price, status=ORDER_PENDING)
         self.db.add(order)
         await self.db.flush()
 
-        for it in items:
-            oi = OrderItem(
-                order_id=order.id,
-                product_id=it["product_id"],
-                size_id=it["size_id"],
-                quantity=it["quantity"],
-                price=it["price"],
-            )
-            self.db.add(oi)
+        # все позиции заказа одним многострочным INSERT
+        await self.db.execute(
+            insert(OrderItem).values([
+                {
+                    "order_id": order.id,
+                    "product_id": it["product_id"],
+                    "size_id": it["size_id"],
+                    "quantity": it["quantity"],
+                    "price": it["price"],
+                }
+                for it in items
+            ])
+        )
 
-        await self.db.commit()
-        # ensure related items are eagerly loaded before returning
+        # коммит делает сервис; ensure related items are eagerly loaded before returning
         return await self.get_by_id(order.id)
 
+    def confirm(self, order: Order) -> None:
+        """Mark the order created and record ``order.created`` in the same transaction."""
+        order.status = ORDER_CREATED
+        self.outbox.add(TOPIC_ORDERS, "order.created", order.id, {
+            "id": order.id,
+            "user_id": order.user_id,
+            "total_price": order.total_price,
+            "items": [
+                {"product_id": it.product_id, "size_id": it.size_id, "quantity": it.quantity, "price": it.price}
+                for it in order.items
+            ],
+        })
+
+    def cancel(self, order: Order) -> None:
+        order.status = ORDER_CANCELLED
+
     async def get_by_id(self, order_id: int) -> Order:
         result = await self.db.execute(
             select(Order).where(Order.id == order_id).options(selectinload(Order.items))
@@ -37,6 +63,40 @@ class OrderRepository:
 
     async def list_by_user(self, user_id: int):
         result = await self.db.execute(
-            select(Order).where(Order.user_id == user_id).options(selectinload(Order.items))
+            select(Order)
+            .where(Order.user_id == user_id)
+            .order_by(Order.created_at.desc())
+            .options(selectinload(Order.items))
         )
         return result.scalars().all()
+
+    async def list_rows_by_user(self, user_id: int) -> List[dict]:
+        """The user's orders as plain dicts shaped like OrderResponse.
+
+        Two column queries, no ORM objects: the list is encoded by orjson
+        without a pydantic round trip.
+        """
+        orders = await self.db.execute(
+            select(Order.user_id, Order.total_price, Order.status, Order.id)
+            .where(Order.user_id == user_id)
+            .order_by(Order.created_at.desc())
+        )
+        result = []
+        by_id = {}
+        for row in orders:
+            order = {**row._mapping, "items": []}
+            by_id[order["id"]] = order
+            result.append(order)
+        if not by_id:
+            return result
+        items = await self.db.execute(
+            select(
+                OrderItem.order_id, OrderItem.product_id, OrderItem.size_id,
+                OrderItem.quantity, OrderItem.price, OrderItem.id,
+            )
+            .where(OrderItem.order_id.in_(list(by_id)))
+            .order_by(OrderItem.id)
+        )
+        for order_id, *values in items:
+            by_id[order_id]["items"].append(dict(zip(ITEM_FIELDS, values)))
+        return result
@@ -0,0 +1,119 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, and_, cast, exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import ORDER_CREATED, Order, OrderItem
+from app.models.outbox_event import OutboxEvent
+from app.models.recommendation import JobWatermark, ProductPair, ProductRecommendation
+
+# ключ advisory-lock: матрицу пересчитывает один воркер за раз
+RECOMMENDATIONS_LOCK_KEY = 720333
+WATERMARK_NAME = "recommendations"
+# последний orders.id, разобранный разовым backfill из order_items
+BACKFILL_WATERMARK_NAME = "recommendations_backfill"
+# строк на один INSERT: 3 параметра на строку держат запрос ниже лимита asyncpg в 32767
+UPSERT_CHUNK_SIZE = 5000
+
+
+def chunked(items: list, size: int = UPSERT_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class RecommendationRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def try_lock(self) -> bool:
+        result = await self.db.execute(select(func.pg_try_advisory_xact_lock(RECOMMENDATIONS_LOCK_KEY)))
+        return bool(result.scalar())
+
+    async def get_watermark(self, name: str = WATERMARK_NAME) -> int:
+        result = await self.db.execute(select(JobWatermark.position).where(JobWatermark.name == name))
+        return result.scalar_one_or_none() or 0
+
+    async def set_watermark(self, position: int, name: str = WATERMARK_NAME) -> None:
+        stmt = insert(JobWatermark).values(name=name, position=position)
+        await self.db.execute(
+            stmt.on_conflict_do_update(index_elements=[JobWatermark.name], set_={"position": stmt.excluded.position})
+        )
+
+    async def add_pairs(self, counts: Dict[Tuple[int, int], int]) -> None:
+        """Add order counts to (product, other) cells; rows locked in key order."""
+        for chunk in chunked(sorted(counts.items())):
+            stmt = insert(ProductPair).values([
+                {"product_id": a, "other_id": b, "orders": n} for (a, b), n in chunk
+            ])
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ProductPair.product_id, ProductPair.other_id],
+                    set_={"orders": ProductPair.orders + stmt.excluded.orders},
+                )
+            )
+
+    async def rebuild(self, product_ids: Iterable[int], top_n: int) -> None:
+        """Recompute the stored top-N of the given products from their matrix rows."""
+        for chunk in chunked(sorted(set(product_ids))):
+            await self._rebuild_chunk(chunk, top_n)
+
+    async def _rebuild_chunk(self, product_ids: List[int], top_n: int) -> None:
+        rank = func.row_number().over(
+            partition_by=ProductPair.product_id,
+            order_by=(ProductPair.orders.desc(), ProductPair.other_id),
+        )
+        ranked = (
+            select(ProductPair.product_id, ProductPair.other_id, rank.label("rank"))
+            .where(ProductPair.product_id.in_(product_ids))
+            .subquery()
+        )
+        result = await self.db.execute(
+            select(ranked.c.product_id, ranked.c.other_id)
+            .where(ranked.c.rank <= top_n)
+            .order_by(ranked.c.product_id, ranked.c.rank)
+        )
+        neighbours: Dict[int, List[int]] = {}
+        for product_id, other_id in result:
+            neighbours.setdefault(product_id, []).append(other_id)
+
+        stmt = insert(ProductRecommendation).values([
+            {"product_id": product_id, "product_ids": neighbours.get(product_id, [])} for product_id in product_ids
+        ])
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ProductRecommendation.product_id],
+                set_={"product_ids": stmt.excluded.product_ids, "updated_at": func.now()},
+            )
+        )
+
+    async def legacy_orders(self, after_id: int, limit: int) -> List[Tuple[int, List[int]]]:
+        """Confirmed orders with no ``order.created`` event, after ``after_id``: (id, product ids).
+
+        These predate the outbox; every order confirmed since writes the
+        event in the same transaction, so the two sources never overlap.
+        """
+        has_event = exists().where(and_(
+            OutboxEvent.event_type == "order.created",
+            OutboxEvent.aggregate_id == cast(Order.id, String),
+        ))
+        orders = (
+            select(Order.id)
+            .where(Order.id > after_id, Order.status == ORDER_CREATED, ~has_event)
+            .order_by(Order.id)
+            .limit(limit)
+            .subquery()
+        )
+        result = await self.db.execute(
+            select(OrderItem.order_id, func.array_agg(OrderItem.product_id))
+            .join(orders, orders.c.id == OrderItem.order_id)
+            .group_by(OrderItem.order_id)
+            .order_by(OrderItem.order_id)
+        )
+        return [(order_id, product_ids) for order_id, product_ids in result]
+
+    async def get(self, product_id: int) -> Optional[ProductRecommendation]:
+        result = await self.db.execute(
+            select(ProductRecommendation).where(ProductRecommendation.product_id == product_id)
+        )
+        return result.scalar_one_or_none()
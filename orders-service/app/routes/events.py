@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import get_db
+from ..schemas.event import EventFeedResponse
+from ..services.outbox_service import MAX_FEED_LIMIT, OutboxService
+
+router = APIRouter(prefix="/orders/events", tags=["events"])
+
+
+# --- Лента событий заказов (pull) ---
+@router.get("/", response_model=EventFeedResponse)
+async def list_events(
+    since: int = Query(0, ge=0, description="last_position from the previous page"),
+    limit: int = Query(100, ge=1, le=MAX_FEED_LIMIT),
+    db: AsyncSession = Depends(get_db),
+):
+    service = OutboxService(db)
+    return await service.feed(since, limit)
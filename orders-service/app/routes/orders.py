@@ -2,11 +2,12 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.services.order_service import OrderService
 from app.schemas.order import OrderResponse
 from app.core.client import ProductClient, CartClient
 from app.core.config import settings
+from app.core.serialization import dump_rows, json_response
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 # clients - point to product and cart services
@@ -29,19 +30,19 @@ async def create_order(request: Request, service: OrderService = Depends(get_ord
 
 
 @router.get("/", response_model=List[OrderResponse])
-async def list_orders(request: Request, db: AsyncSession = Depends(get_db)):
+async def list_orders(request: Request, db: AsyncSession = Depends(get_read_db)):
     user_id = request.headers.get("x-user-id")
     if not user_id:
         raise HTTPException(status_code=401, detail="User ID missing in headers")
 
     from app.repositories.order_repository import OrderRepository
     repo = OrderRepository(db)
-    orders = await repo.list_by_user(int(user_id))
-    return orders
+    # строки уже в форме OrderResponse: response_model нужен только для схемы OpenAPI
+    return json_response(dump_rows(await repo.list_rows_by_user(int(user_id))))
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+async def get_order(order_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
     user_id = request.headers.get("x-user-id")
     if not user_id:
         raise HTTPException(status_code=401, detail="User ID missing in headers")
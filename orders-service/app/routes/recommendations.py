@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.database import get_read_db
+from ..schemas.recommendation import RecommendationResponse
+from ..services.recommendation_service import RecommendationService
+
+router = APIRouter(prefix="/orders/recommendations", tags=["recommendations"])
+
+
+# --- "Часто покупают вместе": готовый топ из product_recommendations ---
+@router.get("/{product_id}", response_model=RecommendationResponse)
+async def get_recommendations(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=settings.recommendations_top_n),
+    db: AsyncSession = Depends(get_read_db),
+):
+    service = RecommendationService(db)
+    return await service.for_product(product_id, limit)
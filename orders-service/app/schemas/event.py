@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import List
+from pydantic import BaseModel, ConfigDict
+
+
+class EventResponse(BaseModel):
+    id: int
+    position: int
+    topic: str
+    event_type: str
+    aggregate_id: str
+    payload: dict
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EventFeedResponse(BaseModel):
+    events: List[EventResponse]
+    # передаётся как since в следующем запросе
+    last_position: int
@@ -0,0 +1,11 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class RecommendationResponse(BaseModel):
+    product_id: int
+    # чаще всего покупались вместе с product_id, по убыванию
+    product_ids: List[int]
+    updated_at: Optional[datetime] = None
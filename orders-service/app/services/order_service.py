@@ -1,5 +1,5 @@
-from typing import List
-from fastapi import HTTPException
+from typing import List, Optional
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.order_repository import OrderRepository
@@ -29,26 +29,64 @@ class OrderService:
             qty = it.get("quantity")
             reserve_payload.append({"product_id": pid, "size_id": sid, "quantity": qty})
 
-        await self.product_client.reserve_items(reserve_payload)
+        # stock is held with a TTL: if we never confirm or cancel it,
+        # products-service returns it to the shelf on its own
+        hold = await self.product_client.hold_items(reserve_payload)
 
         try:
+            # one batch call prices the whole order instead of a request per line
+            products = await self.product_client.get_products([it.get("product_id") for it in items])
             for it in items:
                 pid = it.get("product_id")
                 sid = it.get("size_id")
                 qty = it.get("quantity")
-                prod_data = await self.product_client.get_product(pid)
+                prod_data = products.get(pid)
+                if not prod_data:
+                    raise HTTPException(status_code=404, detail=f"Product {pid} not found")
                 price = prod_data.get("price", it.get("price", 0.0))
                 order_items.append({"product_id": pid, "size_id": sid, "quantity": qty, "price": price})
                 total += price * qty
 
+            # заказ фиксируется до подтверждения резерва: если коммит упадёт,
+            # резерв ещё не подтверждён и его достаточно отменить
             order = await self.repo.create_order(user_id=user_id, total_price=total, items=order_items)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            await self._release_hold(hold["id"])
+            raise
+
+        try:
+            await self.product_client.confirm_hold(hold["id"])
+        except Exception:
+            released = await self._release_hold(hold["id"])
+            if released is not False:
+                # None — судьба резерва неизвестна: заказ остаётся pending для сверки
+                if released:
+                    self.repo.cancel(order)
+                    await self.db.commit()
+                raise
+            # резерв уже подтверждён (ответ на confirm потерялся) — заказ действителен
 
-            await self.cart_client.clear_cart(user_id)
+        # если этот коммит упадёт, заказ останется pending при списанных остатках:
+        # товар не потерян, заказ виден и его можно довести повторно (confirm идемпотентен)
+        self.repo.confirm(order)
+        await self.db.commit()
 
-            return order
+        await self.cart_client.clear_cart(user_id)
+
+        return order
+
+    async def _release_hold(self, hold_id: str) -> Optional[bool]:
+        """Cancel the hold: True if cancelled, False if products-service has
+        already confirmed it, None if the outcome is unknown."""
+        try:
+            await self.product_client.cancel_hold(hold_id)
+        except HTTPException as e:
+            if e.status_code == status.HTTP_409_CONFLICT:
+                return False
+            return None
         except Exception:
-            try:
-                await self.product_client.release_items(reserve_payload)
-            except Exception:
-                pass
-            raise
+            # неподтверждённый резерв вернётся на склад по TTL
+            return None
+        return True
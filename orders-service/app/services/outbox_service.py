@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.broker import Broker, broker as default_broker
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.repositories.outbox_repository import OutboxRepository
+from app.schemas.event import EventResponse
+
+logger = logging.getLogger(__name__)
+
+MAX_FEED_LIMIT = 1000
+
+
+class OutboxService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = OutboxRepository(db)
+
+    async def feed(self, since: int, limit: int) -> dict:
+        """Published events after ``since``, in publish order."""
+        events = await self.repo.list_since(since, min(limit, MAX_FEED_LIMIT))
+        return {"events": events, "last_position": events[-1].position if events else since}
+
+    async def publish_pending(self, broker: Broker, limit: int) -> int:
+        """Publish one batch of unpublished events. Returns how many were sent.
+
+        Runs under a transaction-level advisory lock, so with several replicas
+        only one relay assigns positions at a time and the feed stays gapless.
+        """
+        if not await self.repo.try_lock_relay():
+            await self.db.rollback()
+            return 0
+        events = await self.repo.get_unpublished(limit)
+        if not events:
+            await self.db.rollback()
+            return 0
+
+        await self.repo.mark_published(events, datetime.now(timezone.utc))
+        await broker.publish([EventResponse.model_validate(e).model_dump(mode="json") for e in events])
+        await self.db.commit()
+        return len(events)
+
+
+async def run_outbox_relay(
+    broker: Optional[Broker] = None,
+    interval: Optional[float] = None,
+    batch_size: Optional[int] = None,
+) -> None:
+    """Background loop that moves committed outbox events to the broker."""
+    broker = broker or default_broker
+    interval = interval or settings.outbox_relay_interval
+    batch_size = batch_size or settings.outbox_relay_batch_size
+    while True:
+        try:
+            while True:
+                async with AsyncSessionLocal() as session:
+                    published = await OutboxService(session).publish_pending(broker, batch_size)
+                if published < batch_size:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Outbox relay failed")
+        await asyncio.sleep(interval)
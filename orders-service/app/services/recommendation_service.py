@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from collections import Counter
+from itertools import permutations
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.repositories.outbox_repository import OutboxRepository
+from app.repositories.recommendation_repository import BACKFILL_WATERMARK_NAME, RecommendationRepository
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+# крупные оптовые заказы дают квадратичное число пар и мало говорят о совместных покупках
+MAX_ORDER_PRODUCTS = 50
+
+
+def order_pairs(product_ids: Iterable[int]) -> List[Tuple[int, int]]:
+    """Ordered pairs of distinct products in one order, both directions."""
+    distinct = sorted(set(product_ids))[:MAX_ORDER_PRODUCTS]
+    return list(permutations(distinct, 2))
+
+
+class RecommendationService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = RecommendationRepository(db)
+        self.outbox = OutboxRepository(db)
+
+    async def for_product(self, product_id: int, limit: int) -> dict:
+        """Precomputed neighbours of one product: a primary-key lookup."""
+        row = await self.repo.get(product_id)
+        return {
+            "product_id": product_id,
+            "product_ids": row.product_ids[:limit] if row else [],
+            "updated_at": row.updated_at if row else None,
+        }
+
+    async def process_chunk(self, limit: int) -> int:
+        """Fold the next ``limit`` outbox events into the matrix. Returns events consumed.
+
+        Reads by outbox position, which is gapless and assigned after
+        commit, so no order is skipped or counted twice: the pair counts,
+        the rebuilt top-N rows and the new watermark commit together.
+        """
+        if not await self.repo.try_lock():
+            await self.db.rollback()
+            return 0
+        since = await self.repo.get_watermark()
+        events = await self.outbox.list_since(since, limit)
+        if not events:
+            await self.db.rollback()
+            return 0
+
+        counts: Counter = Counter()
+        for event in events:
+            if event.event_type != ORDER_CREATED:
+                continue
+            counts.update(order_pairs(item["product_id"] for item in event.payload.get("items", [])))
+
+        await self.repo.add_pairs(counts)
+        await self.repo.rebuild((a for a, _ in counts), settings.recommendations_top_n)
+        await self.repo.set_watermark(events[-1].position)
+        await self.db.commit()
+        return len(events)
+
+    async def backfill_chunk(self, limit: int) -> Optional[int]:
+        """Fold the next ``limit`` orders placed before the outbox existed.
+
+        Returns orders consumed, or None if the builder holds the lock. Walks
+        ``orders.id`` under its own watermark, with the same lock and the
+        same commit of counts, top-N rows and watermark as process_chunk.
+        """
+        if not await self.repo.try_lock():
+            await self.db.rollback()
+            return None
+        since = await self.repo.get_watermark(BACKFILL_WATERMARK_NAME)
+        orders = await self.repo.legacy_orders(since, limit)
+        if not orders:
+            await self.db.rollback()
+            return 0
+
+        counts: Counter = Counter()
+        for _, product_ids in orders:
+            counts.update(order_pairs(product_ids))
+
+        await self.repo.add_pairs(counts)
+        await self.repo.rebuild((a for a, _ in counts), settings.recommendations_top_n)
+        await self.repo.set_watermark(orders[-1][0], BACKFILL_WATERMARK_NAME)
+        await self.db.commit()
+        return len(orders)
+
+
+async def run_recommendation_builder(interval: Optional[float] = None, chunk_size: Optional[int] = None) -> None:
+    """Background loop that keeps recommendations up to date with new orders."""
+    interval = interval or settings.recommendations_interval
+    chunk_size = chunk_size or settings.recommendations_chunk_size
+    while True:
+        try:
+            while True:
+                async with AsyncSessionLocal() as session:
+                    processed = await RecommendationService(session).process_chunk(chunk_size)
+                if processed < chunk_size:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Recommendation build failed")
+        await asyncio.sleep(interval)
@@ -12,7 +12,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 from app.core.database import Base 
-from app.models import order
+from app.models import order, outbox_event, recommendation
 from app.core.config import settings  
 
 target_metadata = Base.metadata
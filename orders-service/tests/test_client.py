@@ -0,0 +1,48 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+
+from app.core import client as client_module
+from app.core.client import ProductClient
+
+
+def response(status_code, payload=None):
+    return httpx.Response(status_code, json=payload, request=httpx.Request("GET", "http://products"))
+
+
+@pytest.mark.asyncio
+async def test_get_products_splits_ids_into_batch_sized_requests(monkeypatch):
+    monkeypatch.setattr(client_module, "BATCH_SIZE", 2)
+    pc = ProductClient("http://products")
+
+    async def batch(url, params):
+        return response(200, [{"id": int(i)} for i in params["ids"].split(",") if i != "4"])
+
+    pc._client.get = AsyncMock(side_effect=batch)
+    res = await pc.get_products([1, 2, 1, 3, 4, 5])
+
+    # повторы схлопываются до разбиения, ни один запрос не превышает лимит
+    assert [call.kwargs["params"]["ids"] for call in pc._client.get.await_args_list] == ["1,2", "3,4", "5"]
+    assert set(res) == {1, 2, 3, 5}
+
+
+@pytest.mark.asyncio
+async def test_get_products_falls_back_to_single_requests_only_for_failed_chunk(monkeypatch):
+    monkeypatch.setattr(client_module, "BATCH_SIZE", 2)
+    pc = ProductClient("http://products")
+    pc._client.get = AsyncMock(side_effect=[response(200, [{"id": 1}, {"id": 2}]), response(503)])
+    pc.get_product = AsyncMock(side_effect=lambda pid: {"id": pid})
+
+    res = await pc.get_products([1, 2, 3])
+
+    pc.get_product.assert_awaited_once_with(3)
+    assert set(res) == {1, 2, 3}
+
+
+@pytest.mark.asyncio
+async def test_get_products_with_no_ids_makes_no_requests():
+    pc = ProductClient("http://products")
+    pc._client.get = AsyncMock()
+
+    assert await pc.get_products([]) == {}
+    pc._client.get.assert_not_awaited()
@@ -0,0 +1,96 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import HTTPException
+
+from app.services.order_service import OrderService
+
+
+def make_service():
+    db = AsyncMock()
+    product_client = AsyncMock()
+    cart_client = AsyncMock()
+    cart_client.get_cart.return_value = {"items": [{"product_id": 1, "size_id": 2, "quantity": 3}]}
+    product_client.hold_items.return_value = {"id": "h1"}
+    product_client.get_products.return_value = {1: {"id": 1, "price": 5.0}}
+    svc = OrderService(db=db, product_client=product_client, cart_client=cart_client)
+    svc.repo = MagicMock()
+    svc.repo.create_order = AsyncMock(return_value=SimpleNamespace(id=10, status="pending"))
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_order_is_committed_before_hold_is_confirmed():
+    svc = make_service()
+    calls = []
+    svc.db.commit.side_effect = lambda: calls.append("commit")
+    svc.product_client.confirm_hold.side_effect = lambda hold_id: calls.append("confirm")
+    svc.repo.confirm.side_effect = lambda order: calls.append("created")
+
+    order = await svc.place_order(7)
+    assert order.id == 10
+    assert calls == ["commit", "confirm", "created", "commit"]
+    svc.product_client.cancel_hold.assert_not_awaited()
+    svc.cart_client.clear_cart.assert_awaited_once_with(7)
+
+
+@pytest.mark.asyncio
+async def test_failed_order_commit_cancels_unconfirmed_hold():
+    svc = make_service()
+    svc.db.commit.side_effect = ConnectionError
+
+    with pytest.raises(ConnectionError):
+        await svc.place_order(7)
+    svc.product_client.confirm_hold.assert_not_awaited()
+    svc.product_client.cancel_hold.assert_awaited_once_with("h1")
+    svc.db.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_commit_failure_after_confirm_keeps_the_hold():
+    svc = make_service()
+    # заказ записан, подтверждён резерв, падает только смена статуса
+    svc.db.commit.side_effect = [None, ConnectionError]
+
+    with pytest.raises(ConnectionError):
+        await svc.place_order(7)
+    svc.product_client.confirm_hold.assert_awaited_once_with("h1")
+    svc.product_client.cancel_hold.assert_not_awaited()
+    svc.repo.cancel.assert_not_called()
+    svc.cart_client.clear_cart.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_confirm_cancels_order_and_hold():
+    svc = make_service()
+    svc.product_client.confirm_hold.side_effect = HTTPException(500, "Product service unavailable")
+
+    with pytest.raises(HTTPException):
+        await svc.place_order(7)
+    svc.product_client.cancel_hold.assert_awaited_once_with("h1")
+    svc.repo.cancel.assert_called_once()
+    svc.repo.confirm.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_lost_confirm_response_still_creates_order():
+    svc = make_service()
+    svc.product_client.confirm_hold.side_effect = HTTPException(500, "Product service unavailable")
+    # отмена отвечает 409: confirm на самом деле прошёл
+    svc.product_client.cancel_hold.side_effect = HTTPException(409, "Hold is already confirmed")
+
+    await svc.place_order(7)
+    svc.repo.cancel.assert_not_called()
+    svc.repo.confirm.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_unknown_hold_state_leaves_order_pending():
+    svc = make_service()
+    svc.product_client.confirm_hold.side_effect = HTTPException(500, "Product service unavailable")
+    svc.product_client.cancel_hold.side_effect = HTTPException(500, "Product service unavailable")
+
+    with pytest.raises(HTTPException):
+        await svc.place_order(7)
+    svc.repo.cancel.assert_not_called()
+    svc.repo.confirm.assert_not_called()
@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from app.core.broker import Broker, InProcessBroker
+from app.services.outbox_service import OutboxService
+
+
+def event(event_id, position=None):
+    return SimpleNamespace(
+        id=event_id,
+        position=position,
+        topic="orders",
+        event_type="order.created",
+        aggregate_id="1",
+        payload={"order_id": 1, "user_id": 7},
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def make_service():
+    svc = OutboxService(db=AsyncMock())
+    svc.repo = AsyncMock()
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_publish_pending_sends_batch_then_commits():
+    svc = make_service()
+    events = [event(10), event(11)]
+    svc.repo.try_lock_relay.return_value = True
+    svc.repo.get_unpublished.return_value = events
+
+    async def mark(batch, published_at):
+        for i, e in enumerate(batch, start=1):
+            e.position = i
+    svc.repo.mark_published.side_effect = mark
+
+    broker = InProcessBroker()
+    queue = broker.subscribe()
+    assert await svc.publish_pending(broker, limit=100) == 2
+
+    published = [queue.get_nowait(), queue.get_nowait()]
+    assert [e["id"] for e in published] == [10, 11]
+    assert [e["position"] for e in published] == [1, 2]
+    svc.db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_publish_pending_skips_when_another_relay_holds_lock():
+    svc = make_service()
+    svc.repo.try_lock_relay.return_value = False
+
+    assert await svc.publish_pending(InProcessBroker(), limit=100) == 0
+    svc.repo.get_unpublished.assert_not_awaited()
+    svc.db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_leaves_events_unpublished():
+    svc = make_service()
+    svc.repo.try_lock_relay.return_value = True
+    svc.repo.get_unpublished.return_value = [event(1)]
+    svc.repo.mark_published.side_effect = lambda batch, at: setattr(batch[0], "position", 1)
+
+    broker = AsyncMock()
+    broker.publish.side_effect = ConnectionError
+    with pytest.raises(ConnectionError):
+        await svc.publish_pending(broker, limit=100)
+    svc.db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_feed_returns_cursor_for_next_page():
+    svc = make_service()
+    svc.repo.list_since.return_value = [event(5, position=7), event(6, position=8)]
+    page = await svc.feed(since=6, limit=2)
+    assert page["last_position"] == 8
+
+    svc.repo.list_since.return_value = []
+    assert (await svc.feed(since=8, limit=2))["last_position"] == 8
+
+
+def test_broker_requires_publish():
+    with pytest.raises(TypeError):
+        Broker()
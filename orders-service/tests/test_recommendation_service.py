@@ -0,0 +1,141 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from sqlalchemy.dialects import postgresql
+
+from app.repositories.recommendation_repository import BACKFILL_WATERMARK_NAME, UPSERT_CHUNK_SIZE, RecommendationRepository
+from app.services import recommendation_service
+from app.services.recommendation_service import RecommendationService, order_pairs
+
+
+def event(position, product_ids, event_type="order.created"):
+    return SimpleNamespace(
+        position=position,
+        event_type=event_type,
+        payload={"items": [{"product_id": pid} for pid in product_ids]},
+    )
+
+
+def make_service():
+    svc = RecommendationService(db=AsyncMock())
+    svc.repo = AsyncMock()
+    svc.outbox = AsyncMock()
+    return svc
+
+
+def test_order_pairs_are_distinct_both_ways_and_capped(monkeypatch):
+    assert order_pairs([2, 1, 2]) == [(1, 2), (2, 1)]
+    assert order_pairs([5]) == []
+    monkeypatch.setattr(recommendation_service, "MAX_ORDER_PRODUCTS", 3)
+    assert len(order_pairs(range(10))) == 3 * 2
+
+
+@pytest.mark.asyncio
+async def test_process_chunk_counts_orders_and_advances_watermark():
+    svc = make_service()
+    svc.repo.try_lock.return_value = True
+    svc.repo.get_watermark.return_value = 4
+    svc.outbox.list_since.return_value = [
+        event(5, [1, 2]),
+        # другие события только сдвигают позицию
+        event(6, [1, 2], event_type="order.cancelled"),
+        event(7, [2, 1, 3]),
+    ]
+
+    assert await svc.process_chunk(limit=10) == 3
+    svc.outbox.list_since.assert_awaited_once_with(4, 10)
+    counts = svc.repo.add_pairs.await_args.args[0]
+    assert counts[(1, 2)] == 2 and counts[(2, 1)] == 2 and counts[(1, 3)] == 1
+    assert set(svc.repo.rebuild.await_args.args[0]) == {1, 2, 3}
+    svc.repo.set_watermark.assert_awaited_once_with(7)
+    svc.db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_process_chunk_without_events_keeps_watermark():
+    svc = make_service()
+    svc.repo.try_lock.return_value = True
+    svc.repo.get_watermark.return_value = 7
+    svc.outbox.list_since.return_value = []
+
+    assert await svc.process_chunk(limit=10) == 0
+    svc.repo.set_watermark.assert_not_awaited()
+    svc.db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_process_chunk_skips_when_another_worker_holds_lock():
+    svc = make_service()
+    svc.repo.try_lock.return_value = False
+
+    assert await svc.process_chunk(limit=10) == 0
+    svc.outbox.list_since.assert_not_awaited()
+    svc.repo.add_pairs.assert_not_awaited()
+    svc.db.rollback.assert_awaited_once()
+    svc.db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_backfill_chunk_folds_legacy_orders_under_own_watermark():
+    svc = make_service()
+    svc.repo.try_lock.return_value = True
+    svc.repo.get_watermark.return_value = 10
+    svc.repo.legacy_orders.return_value = [(11, [1, 2]), (14, [2, 1, 3])]
+
+    assert await svc.backfill_chunk(limit=2) == 2
+    svc.repo.get_watermark.assert_awaited_once_with(BACKFILL_WATERMARK_NAME)
+    svc.repo.legacy_orders.assert_awaited_once_with(10, 2)
+    counts = svc.repo.add_pairs.await_args.args[0]
+    assert counts[(1, 2)] == 2 and counts[(2, 3)] == 1
+    # позиция outbox не трогается — там своя отметка
+    svc.repo.set_watermark.assert_awaited_once_with(14, BACKFILL_WATERMARK_NAME)
+    svc.outbox.list_since.assert_not_awaited()
+    svc.db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_backfill_chunk_reports_busy_lock():
+    svc = make_service()
+    svc.repo.try_lock.return_value = False
+
+    assert await svc.backfill_chunk(limit=2) is None
+    svc.repo.legacy_orders.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_legacy_orders_skip_pending_and_evented_orders():
+    repo = RecommendationRepository(db=AsyncMock())
+    repo.db.execute.return_value = [(11, [1, 2])]
+    assert await repo.legacy_orders(10, 500) == [(11, [1, 2])]
+
+    sql = str(repo.db.execute.await_args.args[0].compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True},
+    ))
+    assert "orders.id > 10 AND orders.status = 'created'" in sql
+    # заказы с событием order.created учитывает фоновая задача
+    assert "NOT (EXISTS (SELECT * \nFROM outbox_events" in sql
+    assert "outbox_events.aggregate_id = CAST(orders.id AS VARCHAR)" in sql
+    assert "ORDER BY orders.id \n LIMIT 500" in sql
+
+
+@pytest.mark.asyncio
+async def test_for_product_returns_stored_neighbours():
+    svc = make_service()
+    svc.repo.get.return_value = SimpleNamespace(product_ids=[3, 4, 5], updated_at=None)
+    assert (await svc.for_product(1, limit=2))["product_ids"] == [3, 4]
+
+    svc.repo.get.return_value = None
+    assert (await svc.for_product(1, limit=2))["product_ids"] == []
+
+
+@pytest.mark.asyncio
+async def test_add_pairs_stays_under_bind_parameter_limit():
+    repo = RecommendationRepository(db=AsyncMock())
+    # шесть заказов по 50 разных товаров — 14700 пар
+    counts = {pair: 1 for i in range(6) for pair in order_pairs(range(i * 50, i * 50 + 50))}
+    await repo.add_pairs(counts)
+
+    statements = [call.args[0] for call in repo.db.execute.await_args_list]
+    assert len(statements) == -(-len(counts) // UPSERT_CHUNK_SIZE)
+    for stmt in statements:
+        assert len(stmt.compile(dialect=postgresql.dialect()).params) < 32767
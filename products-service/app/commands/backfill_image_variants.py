@@ -0,0 +1,46 @@
+"""Generate image variants for existing product images.
+
+    python -m app.commands.backfill_image_variants            # failed + pending
+    python -m app.commands.backfill_image_variants --all      # regenerate everything
+    python -m app.commands.backfill_image_variants --queue-only
+
+Without ``--queue-only`` the images are processed in this process and the
+command exits when the queue is empty; otherwise they are left to the
+workers of the running service.
+"""
+import argparse
+import asyncio
+import logging
+
+from app.core.database import AsyncSessionLocal, close_db
+from app.repositories.product_image_repository import ProductImageRepository
+from app.services.image_variant_service import image_variant_worker
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill(all_images: bool, queue_only: bool) -> None:
+    async with AsyncSessionLocal() as session:
+        queued = await ProductImageRepository(session).queue_variants(all_images=all_images)
+        await session.commit()
+    logger.info("Queued %s images for variant generation", queued)
+    if queue_only:
+        return
+    try:
+        await image_variant_worker.run_until_empty()
+    finally:
+        await image_variant_worker.close()
+        await close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--all", action="store_true", help="regenerate variants for every image, not only failed ones")
+    parser.add_argument("--queue-only", action="store_true", help="only queue images, let the service workers process them")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(backfill(args.all, args.queue_only))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compare response serialization paths on an in-memory product listing.
+
+    python -m app.commands.bench_serialization                  # 500 products
+    python -m app.commands.bench_serialization --products 5000 --rounds 20
+
+No database is needed: products are transient ORM objects. ``fastapi`` is
+what a route with ``response_model`` used to do (validate, dump to Python
+objects, ``json.dumps``); ``adapter`` is ``dump_products`` through the
+precompiled TypeAdapter; ``rows`` is the ``?fields=`` listing built from row
+tuples and encoded by orjson, against ``fields`` — the same view through
+ProductFieldsResponse.
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models import Category, Product, ProductImage, ProductImageVariant, ProductSize, Size
+from app.schemas.product import ProductResponse, ProductView
+from app.services.product_service import dump_product_rows, dump_products
+
+LISTING_VIEW = ProductView.parse("name,price,category_id,image", None)
+
+
+def make_products(count: int) -> List[Product]:
+    category = Category(id=1, name="Shoes", slug="shoes", parent_id=None)
+    sizes = [Size(id=i, value=value) for i, value in enumerate(("S", "M", "L", "XL"), start=1)]
+    products = []
+    for i in range(1, count + 1):
+        image = ProductImage(id=i, file_name=f"images/sha256/{i:04x}/original.png")
+        image.variants = [
+            ProductImageVariant(id=i, name="thumb", width=320, height=320, file_name=f"images/sha256/{i:04x}/thumb.webp")
+        ]
+        product = Product(
+            id=i, name=f"Product {i}", price=9.99 + i, description="Lorem ipsum dolor sit amet " * 4,
+            category_id=1, version=1,
+        )
+        product.category = category
+        product.sizes = [ProductSize(id=i * 10 + s.id, size=s, quantity=s.id * 3) for s in sizes]
+        product.images = [image]
+        products.append(product)
+    return products
+
+
+def make_rows(products: List[Product]) -> list:
+    # то, что вернул бы ProductRepository.get_rows для LISTING_VIEW
+    return [
+        SimpleNamespace(
+            version=p.version, id=p.id, name=p.name, price=p.price, category_id=p.category_id,
+            image_file=p.images[0].variants[0].file_name,
+        )
+        for p in products
+    ]
+
+
+def fastapi_path(products: List[Product]) -> bytes:
+    field = create_model_field(name="Response_list_products", type_=List[ProductResponse], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=products))
+    return JSONResponse(content).body
+
+
+def measure(name: str, fn: Callable[[], bytes], rounds: int) -> float:
+    fn()  # прогрев: сборка схем, кэши атрибутов
+    started = time.perf_counter()
+    for _ in range(rounds):
+        size = len(fn())
+    per_call = (time.perf_counter() - started) / rounds
+    print(f"{name:<8} {per_call * 1000:9.2f} ms  {size:>9} bytes")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=500, help="products in the listing")
+    parser.add_argument("--rounds", type=int, default=50, help="serializations per path")
+    args = parser.parse_args()
+
+    products = make_products(args.products)
+    rows = make_rows(products)
+    print(f"{args.products} products, {args.rounds} rounds")
+    baseline = measure("fastapi", lambda: fastapi_path(products), args.rounds)
+    adapter = measure("adapter", lambda: dump_products(products, None), args.rounds)
+    fields = measure("fields", lambda: dump_products(rows, LISTING_VIEW), args.rounds)
+    projected = measure("rows", lambda: dump_product_rows(rows, LISTING_VIEW), args.rounds)
+    print(f"adapter vs fastapi: x{baseline / adapter:.1f}; rows vs fields: x{fields / projected:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from ..repositories.category_repository import CategoryRepository
+from ..repositories.size_repository import SizeRepository
+
+
+@dataclass(frozen=True)
+class CategoryRow:
+    id: int
+    name: str
+    slug: str
+    version: int
+    parent_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class SizeRow:
+    id: int
+    value: str
+    version: int
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable copy of categories and sizes with lookup indexes."""
+    version: int
+    categories: Tuple[CategoryRow, ...]
+    sizes: Tuple[SizeRow, ...]
+    category_by_id: Dict[int, CategoryRow]
+    category_by_slug: Dict[str, CategoryRow]
+    size_by_id: Dict[int, SizeRow]
+    # дерево категорий: parent_id (None — корни) -> дети по id
+    children: Dict[Optional[int], Tuple[CategoryRow, ...]]
+    # меняется при любой записи в categories/sizes; входит в ETag товаров
+    stamp: str
+    categories_etag: str
+    sizes_etag: str
+
+
+def _set_tag(rows: Tuple) -> str:
+    # версии из общей последовательности: запись поднимает max(version), удаление меняет count
+    return f"{len(rows)}.{max((row.version for row in rows), default=0)}"
+
+
+def category_etag(category: CategoryRow) -> str:
+    return f'"c{category.id}.{category.version}"'
+
+
+class CatalogCache:
+    """In-process snapshot of the categories and sizes tables.
+
+    Readers get the whole snapshot at once, so they never see a half-updated
+    catalog. Writers call ``invalidate()`` which bumps the version counter;
+    the next reader reloads both tables and swaps the snapshot in one
+    assignment. ``ttl`` bounds staleness for writes made by other replicas.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._listeners: List[Callable[[], None]] = []
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call ``listener`` on every invalidation (e.g. to drop caches built from the catalog)."""
+        self._listeners.append(listener)
+
+    def invalidate(self) -> None:
+        self._version += 1
+        for listener in self._listeners:
+            listener()
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self._version
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def load(self, categories: Iterable, sizes: Iterable, version: Optional[int] = None) -> CatalogSnapshot:
+        """Build a snapshot from ORM rows (or anything with the same attributes) and publish it."""
+        cats = tuple(
+            CategoryRow(id=c.id, name=c.name, slug=c.slug, version=c.version, parent_id=c.parent_id)
+            for c in categories
+        )
+        children: Dict[Optional[int], List[CategoryRow]] = {}
+        for c in sorted(cats, key=lambda c: c.id):
+            children.setdefault(c.parent_id, []).append(c)
+        szs = tuple(SizeRow(id=s.id, value=s.value, version=s.version) for s in sizes)
+        snapshot = CatalogSnapshot(
+            version=self._version if version is None else version,
+            categories=cats,
+            sizes=szs,
+            category_by_id={c.id: c for c in cats},
+            category_by_slug={c.slug: c for c in cats},
+            size_by_id={s.id: s for s in szs},
+            children={parent: tuple(rows) for parent, rows in children.items()},
+            stamp=f"{_set_tag(cats)}.{_set_tag(szs)}",
+            categories_etag=f'"cl{_set_tag(cats)}"',
+            sizes_etag=f'"sl{_set_tag(szs)}"',
+        )
+        self._snapshot = snapshot
+        self._loaded_at = time.monotonic()
+        return snapshot
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+
+            # версия фиксируется до чтения: если во время загрузки случится запись,
+            # снимок окажется устаревшим и перечитается при следующем обращении
+            version = self._version
+            categories = await CategoryRepository(db).get_all()
+            sizes = await SizeRepository(db).get_all()
+            return self.load(categories, sizes, version=version)
+
+
+catalog = CatalogCache(ttl=settings.catalog_snapshot_ttl)
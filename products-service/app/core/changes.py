@@ -0,0 +1,106 @@
+from typing import Callable, Iterable, List, Set, Tuple
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.product import Product
+from ..models.versioning import catalog_version_seq
+
+_CHANGED_PRODUCTS = "changed_products"
+_CHANGED_CATALOG = "changed_catalog"
+_AFTER_COMMIT = "after_commit_callbacks"
+
+LOCK_CHUNK_SIZE = 5000
+
+_listeners: List[Callable[[Set[int]], None]] = []
+
+
+def mark_products_changed(db: AsyncSession, product_ids: Iterable[int]) -> None:
+    """Remember products touched in the current transaction.
+
+    Listeners are called only after the transaction commits, so caches are
+    never cleared for a write that was rolled back, and never before the new
+    data is visible to other sessions.
+    """
+    db.info.setdefault(_CHANGED_PRODUCTS, set()).update(product_ids)
+
+
+def mark_catalog_changed(db: AsyncSession) -> None:
+    """Remember that categories or sizes are written in the current transaction."""
+    db.info[_CHANGED_CATALOG] = True
+
+
+async def lock_products(db: AsyncSession, product_ids: Iterable[int]) -> None:
+    """Row-lock products in id order before their sizes are written.
+
+    The commit-time version bump updates the products rows; every path that
+    writes sizes (stock, product edit and delete, import) takes them first,
+    so all of them lock products -> product_sizes and can't deadlock. NO KEY
+    UPDATE is the lock that UPDATE takes anyway.
+    """
+    ids = sorted(set(product_ids))
+    # чанки по возрастанию id — порядок блокировок тот же, лимит параметров asyncpg не задет
+    for i in range(0, len(ids), LOCK_CHUNK_SIZE):
+        await db.execute(
+            select(Product.id)
+            .where(Product.id.in_(ids[i:i + LOCK_CHUNK_SIZE]))
+            .order_by(Product.id)
+            .with_for_update(key_share=True)
+        )
+
+
+def run_after_commit(db: AsyncSession, callback: Callable[[], None]) -> None:
+    """Call ``callback`` once the current transaction commits; dropped on rollback."""
+    db.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+def pending_changes(session: Session) -> Tuple[Set[int], bool]:
+    """(product ids, catalog changed) recorded so far in this transaction."""
+    return set(session.info.get(_CHANGED_PRODUCTS, ())), session.info.get(_CHANGED_CATALOG, False)
+
+
+def on_products_committed(listener: Callable[[Set[int]], None]) -> Callable[[Set[int]], None]:
+    _listeners.append(listener)
+    return listener
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_product_versions(session: Session) -> None:
+    """Give every product touched in this transaction a new version (its ETag).
+
+    Covers writes that never update the products row itself — stock, sizes,
+    images — in chunks of LOCK_CHUNK_SIZE ids; ids are sorted so concurrent
+    commits lock the rows in the same order. Size writes hold these rows
+    already (``lock_products``), so the bump never waits here.
+    """
+    product_ids = session.info.get(_CHANGED_PRODUCTS)
+    if not product_ids or session.get_bind().dialect.name != "postgresql":
+        return
+    ids = sorted(product_ids)
+    for i in range(0, len(ids), LOCK_CHUNK_SIZE):
+        session.execute(
+            update(Product)
+            .where(Product.id.in_(ids[i:i + LOCK_CHUNK_SIZE]))
+            .values(version=catalog_version_seq.next_value(), updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_CATALOG, None)
+    for callback in session.info.pop(_AFTER_COMMIT, ()):
+        callback()
+    product_ids = session.info.pop(_CHANGED_PRODUCTS, None)
+    if not product_ids:
+        return
+    for listener in _listeners:
+        listener(product_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_PRODUCTS, None)
+    session.info.pop(_CHANGED_CATALOG, None)
+    session.info.pop(_AFTER_COMMIT, None)
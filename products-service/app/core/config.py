@@ -17,6 +17,11 @@ class Settings(BaseSettings):
     db_pass: str = Field("postgres", alias="DB_PASS")
 
     database_url: str = Field(..., alias="DATABASE_URL")
+    # streaming-реплика для маршрутов чтения (поиск, batch, выгрузка)
+    replica_database_url: str = Field("", alias="REPLICA_DATABASE_URL")
+    # дольше этого отставания реплика не используется
+    replica_max_lag: float = Field(5.0, alias="REPLICA_MAX_LAG_SECONDS")
+    replica_poll_interval: float = Field(1.0, alias="REPLICA_POLL_INTERVAL_SECONDS")
 
     secret_key: str = Field("super_secret_key", alias="JWT_SECRET")
     algorithm: str = Field("HS256", alias="JWT_ALGORITHM")
@@ -25,7 +30,58 @@ class Settings(BaseSettings):
     cors_origins: str = Field("", alias="CORS_ORIGINS")
 
     static_dir: str = Field("static", alias="STATIC_DIR")
+    # app — файлы отдаёт StaticFiles; nginx — приложение отвечает X-Accel-Redirect, байты отдаёт nginx
+    static_delivery: str = Field("app", alias="STATIC_DELIVERY")
+    static_accel_prefix: str = Field("/_static/products/", alias="STATIC_ACCEL_PREFIX")
     images_dir: str = Field("static/images", alias="IMAGES_DIR")
+    image_max_bytes: int = Field(10 * 1024 * 1024, alias="IMAGE_MAX_BYTES")
+    image_upload_concurrency: int = Field(4, alias="IMAGE_UPLOAD_CONCURRENCY")
+
+    image_variants_enabled: bool = Field(True, alias="IMAGE_VARIANTS_ENABLED")
+    image_worker_processes: int = Field(2, alias="IMAGE_WORKER_PROCESSES")
+    # сколько изображений воркер держит в работе; остальные ждут своей очереди в БД
+    image_worker_max_in_flight: int = Field(8, alias="IMAGE_WORKER_MAX_IN_FLIGHT")
+    image_worker_max_attempts: int = Field(5, alias="IMAGE_WORKER_MAX_ATTEMPTS")
+    image_worker_retry_delay: float = Field(30.0, alias="IMAGE_WORKER_RETRY_DELAY_SECONDS")
+    image_worker_poll_interval: float = Field(10.0, alias="IMAGE_WORKER_POLL_INTERVAL_SECONDS")
+    image_worker_lease: float = Field(300.0, alias="IMAGE_WORKER_LEASE_SECONDS")
+
+    stock_hold_ttl: int = Field(900, alias="STOCK_HOLD_TTL_SECONDS")
+    hold_sweep_interval: float = Field(30.0, alias="HOLD_SWEEP_INTERVAL_SECONDS")
+    hold_sweep_batch_size: int = Field(200, alias="HOLD_SWEEP_BATCH_SIZE")
+
+    catalog_snapshot_ttl: float = Field(300.0, alias="CATALOG_SNAPSHOT_TTL_SECONDS")
+    product_cache_max_bytes: int = Field(64 * 1024 * 1024, alias="PRODUCT_CACHE_MAX_BYTES")
+    # товары и остатки меняются часто — клиент каждый раз ревалидирует (дешёвый 304);
+    # категории и размеры почти статичны и могут жить в кэше клиента
+    products_cache_control: str = Field("public, no-cache", alias="PRODUCTS_CACHE_CONTROL")
+    catalog_cache_control: str = Field("public, max-age=60", alias="CATALOG_CACHE_CONTROL")
+
+    cache_bus_enabled: bool = Field(True, alias="CACHE_BUS_ENABLED")
+    cache_bus_channel: str = Field("cache_invalidation", alias="CACHE_BUS_CHANNEL")
+
+    # конфигурация to_tsvector; после смены нужно перестроить products.search_vector
+    search_text_config: str = Field("simple", alias="SEARCH_TEXT_CONFIG")
+
+    suggest_rebuild_interval: float = Field(300.0, alias="SUGGEST_REBUILD_INTERVAL_SECONDS")
+
+    # фасеты категорий: как часто проверять изменения и перечитывать view;
+    # без локальных записей view всё равно обновляется раз в facet_max_age
+    facet_refresh_interval: float = Field(30.0, alias="FACET_REFRESH_INTERVAL_SECONDS")
+    facet_max_age: float = Field(600.0, alias="FACET_MAX_AGE_SECONDS")
+    facets_cache_control: str = Field("public, max-age=30", alias="FACETS_CACHE_CONTROL")
+
+    # просмотры копятся в памяти воркера и пишутся в product_stats одним upsert
+    popularity_flush_interval: float = Field(10.0, alias="POPULARITY_FLUSH_INTERVAL_SECONDS")
+    popularity_half_life: float = Field(3600.0, alias="POPULARITY_HALF_LIFE_SECONDS")
+    popularity_top_k: int = Field(100, alias="POPULARITY_TOP_K")
+    # пока БД недоступна, буфер держит не больше стольких товаров (самые просматриваемые)
+    popularity_max_pending: int = Field(100_000, alias="POPULARITY_MAX_PENDING")
+
+    outbox_broker: str = Field("memory", alias="OUTBOX_BROKER")  # memory | sqlite
+    outbox_sqlite_path: str = Field("outbox.sqlite3", alias="OUTBOX_SQLITE_PATH")
+    outbox_relay_interval: float = Field(1.0, alias="OUTBOX_RELAY_INTERVAL_SECONDS")
+    outbox_relay_batch_size: int = Field(100, alias="OUTBOX_RELAY_BATCH_SIZE")
 
     @property
     def async_database_url(self) -> str:
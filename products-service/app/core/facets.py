@@ -0,0 +1,126 @@
+"""Per-category facet counts served from memory.
+
+The ``category_facets`` materialized view holds the aggregates (active
+products, products in stock, in-stock products per size, active products
+per price bucket); a parent category counts the products of its whole
+subtree. A committed product or stock write marks the index
+dirty; the refresher then runs ``REFRESH MATERIALIZED VIEW CONCURRENTLY``
+at most once per interval and every replica reloads the view rows into a
+dict, so a facets request is a single lookup and never touches
+``product_sizes``. Counts may lag writes by up to one refresh interval.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .catalog import catalog
+from .changes import on_products_committed
+from .config import settings
+from .database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# те же границы, что в миграции category_facets: корзина i — цены в [PRICE_BUCKETS[i-1], PRICE_BUCKETS[i])
+PRICE_BUCKETS: Tuple[float, ...] = (25, 50, 100, 200)
+
+_REFRESH = text("REFRESH MATERIALIZED VIEW CONCURRENTLY category_facets")
+_ROWS = text("SELECT category_id, facet, key, count FROM category_facets")
+
+
+@dataclass(frozen=True)
+class CategoryFacets:
+    category_id: int
+    active: int = 0
+    in_stock: int = 0
+    # size_id -> число товаров с остатком в этом размере
+    sizes: Dict[int, int] = field(default_factory=dict)
+    # по одному счётчику на корзину, len(PRICE_BUCKETS) + 1
+    prices: Tuple[int, ...] = (0,) * (len(PRICE_BUCKETS) + 1)
+
+
+class FacetIndex:
+    """Facet counts of every category, rebuilt from ``category_facets``."""
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self.refreshed_at: Optional[float] = None  # unix time последнего REFRESH/загрузки
+        self._by_category: Dict[int, CategoryFacets] = {}
+        # при старте view могла отстать от записей, сделанных без этого процесса
+        self._dirty = True
+        self._refreshed_mono = 0.0
+
+    def mark_dirty(self, product_ids: Optional[Set[int]] = None) -> None:
+        # без аргументов — изменение каталога: перенос категории меняет состав поддеревьев
+        self._dirty = True
+
+    def needs_refresh(self) -> bool:
+        return self._dirty or time.monotonic() - self._refreshed_mono >= self.max_age
+
+    def load(self, rows: Iterable[Tuple[int, str, str, int]]) -> None:
+        """Replace all counts with (category_id, facet, key, count) rows."""
+        acc: Dict[int, dict] = {}
+        for category_id, facet, key, count in rows:
+            entry = acc.setdefault(category_id, {"sizes": {}, "prices": [0] * (len(PRICE_BUCKETS) + 1)})
+            if facet == "size":
+                entry["sizes"][int(key)] = count
+            elif facet == "price":
+                entry["prices"][int(key)] = count
+            elif facet in ("active", "in_stock"):
+                entry[facet] = count
+        self._by_category = {
+            category_id: CategoryFacets(
+                category_id=category_id,
+                active=entry.get("active", 0),
+                in_stock=entry.get("in_stock", 0),
+                sizes=entry["sizes"],
+                prices=tuple(entry["prices"]),
+            )
+            for category_id, entry in acc.items()
+        }
+
+    def get(self, category_id: int) -> CategoryFacets:
+        # категория без активных товаров в view не попадает — все счётчики нулевые
+        return self._by_category.get(category_id) or CategoryFacets(category_id=category_id)
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Refresh the view if something changed, then reload it into memory.
+
+        Rows are reloaded on every call: another replica may have refreshed
+        the view after its own writes.
+        """
+        if self.needs_refresh():
+            # флаг снимается до REFRESH: запись во время обновления снова его поднимет
+            self._dirty = False
+            try:
+                await session.execute(_REFRESH)
+                await session.commit()
+            except Exception:
+                self._dirty = True
+                raise
+            self._refreshed_mono = time.monotonic()
+        self.load((await session.execute(_ROWS)).all())
+        self.refreshed_at = time.time()
+
+
+async def run_facet_refresher(interval: Optional[float] = None) -> None:
+    """Keep ``facet_index`` in sync with the catalog."""
+    interval = interval or settings.facet_refresh_interval
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await facet_index.refresh(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Category facets refresh failed")
+        await asyncio.sleep(interval)
+
+
+facet_index = FacetIndex(max_age=settings.facet_max_age)
+on_products_committed(facet_index.mark_dirty)
+catalog.add_listener(facet_index.mark_dirty)
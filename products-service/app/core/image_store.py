@@ -0,0 +1,142 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.staticfiles import StaticFiles
+
+from .config import settings
+
+CHUNK_SIZE = 1024 * 1024
+# путь относительно STATIC_DIR, под которым файлы хранилища отдаются как /static/...
+URL_PREFIX = "images/sha256"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# недописанные загрузки; каталоги и файлы с точкой в начале имени наружу не отдаются
+STAGING_DIR = ".staging"
+
+# сигнатуры поддерживаемых форматов -> расширение файла
+_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+
+
+class UnsupportedImage(ValueError):
+    pass
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def is_hidden(path: str) -> bool:
+    """True for paths with a dot-prefixed part: staging dirs and temp files are never served."""
+    return any(part.startswith(".") for part in PurePosixPath(path).parts)
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """File extension by magic bytes; None for formats we don't accept."""
+    for signature, ext in _SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+@dataclass
+class StoredImage:
+    digest: str
+    file_name: str  # относительно STATIC_DIR, как ProductImage.file_name
+    size: int
+    created: bool  # False — такой файл уже был в хранилище
+
+
+class ImageStore:
+    """Content-addressed image files: ``<root>/ab/cd/<sha256>.<ext>``.
+
+    Uploads are streamed to a temp file in ``<root>/.staging`` (same
+    filesystem, so the rename is atomic; hidden paths are not served) while
+    the hash is computed, then renamed into place. A file with the same content
+    is never written twice, and a stored path never changes content, so it
+    can be served with an immutable Cache-Control.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.tmp_dir = self.root / STAGING_DIR
+        self.max_bytes = max_bytes
+
+    def path_for(self, digest: str, ext: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / f"{digest}{ext}"
+
+    async def save(self, upload: UploadFile) -> StoredImage:
+        """Stream ``upload`` into the store. Raises UnsupportedImage / ImageTooLarge."""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.tmp_dir / uuid.uuid4().hex
+        hasher = hashlib.sha256()
+        size = 0
+        ext = None
+        try:
+            with tmp_path.open("wb") as buffer:
+                while True:
+                    chunk = await upload.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if ext is None:
+                        ext = sniff_extension(chunk[:16])
+                        if ext is None:
+                            raise UnsupportedImage("Unsupported image type")
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ImageTooLarge(f"Image is larger than {self.max_bytes} bytes")
+                    # хэш и запись — в одном потоке, не блокируя event loop
+                    await run_in_threadpool(_hash_and_write, hasher, buffer, chunk)
+            if ext is None:
+                raise UnsupportedImage("Empty file")
+
+            digest = hasher.hexdigest()
+            final_path = self.path_for(digest, ext)
+            created = not final_path.exists()
+            if created:
+                final_path.parent.mkdir(parents=True, exist_ok=True)
+                # атомарно; при гонке двух одинаковых загрузок содержимое всё равно одно
+                os.replace(tmp_path, final_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+            await upload.close()
+
+        return StoredImage(
+            digest=digest,
+            file_name=str(Path(URL_PREFIX) / final_path.relative_to(self.root)),
+            size=size,
+            created=created,
+        )
+
+
+def _hash_and_write(hasher, buffer, chunk: bytes) -> None:
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed files: cache forever."""
+
+    async def get_response(self, path: str, scope):
+        if is_hidden(path):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+image_store = ImageStore(Path(settings.static_dir) / URL_PREFIX, settings.image_max_bytes)
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+from .image_store import CHUNK_SIZE, URL_PREFIX
+
+# (имя, макс. сторона в px); размер входит в имя файла, поэтому смена
+# размеров даёт новые пути и не ломает immutable-кэш старых
+VARIANT_SPECS: Tuple[Tuple[str, int], ...] = (
+    ("thumb", 160),
+    ("medium", 480),
+    ("large", 1200),
+)
+WEBP_QUALITY = 80
+
+
+def _file_digest(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def render_variants(source: str, store_root: str, specs: Sequence[Tuple[str, int]] = VARIANT_SPECS) -> List[dict]:
+    """Write WebP variants of ``source`` next to its content-addressed original.
+
+    Runs in a worker process (CPU-bound). Variants go to
+    ``<store_root>/ab/cd/<sha256 of source>/<name>-<size>.webp``; images are
+    never upscaled. Returns one dict per variant for ProductImageVariant.
+    """
+    from PIL import Image, ImageOps
+
+    root = Path(store_root)
+    digest = _file_digest(Path(source))
+    out_dir = root / digest[:2] / digest[2:4] / digest
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    variants = []
+    with Image.open(source) as original:
+        largest = max(size for _, size in specs)
+        # JPEG декодируется сразу в уменьшенном масштабе — в разы быстрее на больших фото
+        original.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+        # от большего к меньшему: каждый вариант уменьшается из предыдущего, а не из оригинала
+        for name, size in sorted(specs, key=lambda spec: spec[1], reverse=True):
+            image = image.copy()
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            target = out_dir / f"{name}-{size}.webp"
+            if not target.exists():
+                tmp = out_dir / f".{uuid.uuid4().hex}.tmp"
+                try:
+                    image.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+                    os.replace(tmp, target)
+                finally:
+                    tmp.unlink(missing_ok=True)
+            variants.append({
+                "name": name,
+                "width": image.width,
+                "height": image.height,
+                "file_name": str(Path(URL_PREFIX) / target.relative_to(root)),
+            })
+    return variants
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Dict, Optional
+
+import asyncpg
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from .catalog import catalog
+from .changes import pending_changes
+from .config import settings
+from .response_cache import product_cache
+from ..models.cache_version import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+CATALOG_KEY = "catalog"
+PRODUCT_PREFIX = "product:"
+
+# лимит payload у NOTIFY — 8000 байт; больше не влезает, шлём сигнал на полный resync
+MAX_PAYLOAD_BYTES = 7900
+
+# ключей на один upsert cache_versions: по 2 параметра на ключ, лимит asyncpg — 32767
+VERSIONS_CHUNK_SIZE = 5000
+
+# свои уведомления реплика пропускает: локальные кэши уже сброшены в after_commit
+REPLICA_ID = uuid.uuid4().hex
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_changes(session: Session) -> None:
+    """Bump versions of changed keys and queue a NOTIFY in the same transaction.
+
+    Postgres delivers the notification only if the transaction commits, so
+    other replicas never evict for a rolled-back write.
+    """
+    if not settings.cache_bus_enabled:
+        return
+    product_ids, catalog_changed = pending_changes(session)
+    keys = [f"{PRODUCT_PREFIX}{pid}" for pid in sorted(product_ids)]
+    if catalog_changed:
+        keys.append(CATALOG_KEY)
+    if not keys or session.get_bind().dialect.name != "postgresql":
+        return
+
+    versions = {}
+    for i in range(0, len(keys), VERSIONS_CHUNK_SIZE):
+        stmt = insert(CacheVersion).values([{"key": key, "version": 1} for key in keys[i:i + VERSIONS_CHUNK_SIZE]])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheVersion.key],
+            set_={"version": CacheVersion.version + 1},
+        ).returning(CacheVersion.key, CacheVersion.version)
+        versions.update((key, version) for key, version in session.execute(stmt))
+
+    payload = json.dumps({"origin": REPLICA_ID, "versions": versions}, separators=(",", ":"))
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        payload = json.dumps({"origin": REPLICA_ID, "resync": True})
+    session.execute(select(func.pg_notify(settings.cache_bus_channel, payload)))
+
+
+class InvalidationBus:
+    """Listens for cache invalidations published by other replicas.
+
+    Keeps one dedicated asyncpg connection with ``LISTEN`` on the channel.
+    After every (re)connect the ``cache_versions`` table is read and keys
+    whose version moved while we were not listening are evicted.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        ping_interval: float = 30.0,
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.ping_interval = ping_interval
+        self._seen: Dict[str, int] = {}
+        self._synced = False
+        self._queue: "asyncio.Queue[dict]" = asyncio.Queue()
+
+    def apply(self, versions: Dict[str, int], evict: bool = True) -> None:
+        """Evict local entries for keys whose version is newer than what we saw."""
+        product_ids = set()
+        catalog_changed = False
+        for key, version in versions.items():
+            if self._seen.get(key, 0) >= version:
+                continue
+            self._seen[key] = version
+            if key == CATALOG_KEY:
+                catalog_changed = True
+            elif key.startswith(PRODUCT_PREFIX):
+                product_ids.add(int(key[len(PRODUCT_PREFIX):]))
+
+        if not evict:
+            return
+        if catalog_changed:
+            # сбрасывает и product_cache — он подписан на инвалидацию каталога
+            catalog.invalidate()
+        elif product_ids:
+            product_cache.invalidate_products(product_ids)
+
+    async def resync(self, conn: asyncpg.Connection) -> None:
+        rows = await conn.fetch("SELECT key, version FROM cache_versions")
+        versions = {row["key"]: row["version"] for row in rows}
+        if self._synced:
+            self.apply(versions)
+            return
+        # первое подключение: неизвестно, что успело попасть в кэши до него
+        self._seen = versions
+        self._synced = True
+        catalog.invalidate()
+
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        try:
+            self._queue.put_nowait(json.loads(payload))
+        except ValueError:
+            logger.warning("Ignoring malformed invalidation payload: %r", payload)
+
+    async def _handle(self, conn: asyncpg.Connection, message: dict) -> None:
+        if message.get("resync"):
+            await self.resync(conn)
+            return
+        versions = {key: int(version) for key, version in message.get("versions", {}).items()}
+        self.apply(versions, evict=message.get("origin") != REPLICA_ID)
+
+    async def run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            conn: Optional[asyncpg.Connection] = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                # сначала LISTEN, потом resync — иначе можно пропустить запись между ними
+                await conn.add_listener(self.channel, self._on_notify)
+                await self.resync(conn)
+                delay = self.reconnect_delay
+                while True:
+                    try:
+                        message = await asyncio.wait_for(self._queue.get(), timeout=self.ping_interval)
+                    except asyncio.TimeoutError:
+                        # обрыв соединения без ошибки на сокете виден только по запросу
+                        await conn.fetchval("SELECT 1")
+                        continue
+                    await self._handle(conn, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Invalidation bus connection lost, reconnecting in %.1fs", delay)
+            finally:
+                if conn is not None:
+                    conn.terminate()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+
+def listener_dsn(database_url: str) -> str:
+    """SQLAlchemy URL (postgresql+asyncpg://...) -> plain DSN for asyncpg.connect."""
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+invalidation_bus = InvalidationBus(
+    dsn=listener_dsn(settings.database_url),
+    channel=settings.cache_bus_channel,
+)
@@ -0,0 +1,52 @@
+"""Write-behind product view counters and the "popular now" list.
+
+``GET /products/{id}`` only bumps a dict entry in this worker. Every flush
+interval ``services.popularity_service`` writes the worker's deltas to
+``product_stats``, where they merge with the other workers' and replicas'
+counts under an exponential decay, and then reloads the top-K from that
+table. So the popular list is shared by all workers and lags views by
+about one interval.
+"""
+import logging
+from collections import Counter
+from typing import List
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self._pending: Counter = Counter()
+        self._top: List = []
+
+    def record(self, product_id: int) -> None:
+        self._pending[product_id] += 1
+
+    def pending(self) -> int:
+        return sum(self._pending.values())
+
+    def take(self) -> Counter:
+        """Hand the accumulated views to a flush and start a new buffer."""
+        pending, self._pending = self._pending, Counter()
+        return pending
+
+    def restore(self, views: Counter) -> None:
+        """Put back the views of a failed flush, keeping at most ``max_pending`` products."""
+        self._pending.update(views)
+        if len(self._pending) > self.max_pending:
+            # БД долго недоступна: без предела буфер растёт с каждым интервалом
+            dropped = len(self._pending) - self.max_pending
+            self._pending = Counter(dict(self._pending.most_common(self.max_pending)))
+            logger.warning("View counter buffer is full, dropped views of %s products", dropped)
+
+    def top(self, limit: int) -> List:
+        return self._top[:limit]
+
+    def set_top(self, items: List) -> None:
+        self._top = items
+
+
+view_counter = ViewCounter(max_pending=settings.popularity_max_pending)
@@ -0,0 +1,163 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+from .catalog import catalog
+from .changes import on_products_committed
+from .config import settings
+
+# (generation, version) — снимается до чтения из БД и проверяется при записи в кэш
+Version = Tuple[int, int]
+
+MAX_TRACKED_PRODUCTS = 100_000
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+
+def product_etag(product_id: int, version: int, catalog_stamp: str) -> str:
+    # в ответ товара вложены категория и размеры — их версии входят через catalog_stamp
+    return f'"p{product_id}.{version}.{catalog_stamp}"'
+
+
+def product_list_etag(count: int, max_version: int, catalog_stamp: str) -> str:
+    # версии берутся из общей последовательности: изменение или добавление товара
+    # поднимает max(version), удаление меняет count
+    return f'"l{count}.{max_version}.{catalog_stamp}"'
+
+
+class ResponseCache:
+    """LRU cache of ready-to-send JSON bodies, bounded by total size in bytes.
+
+    Single products are keyed by ``("product", id[, view])`` and validated against a
+    per-product version; listing pages share one list version because any
+    product write can change them. Callers take the version *before* reading
+    from the database and pass it to ``put``: if a write committed in
+    between, the version no longer matches and the stale body is not stored.
+    Per-product versions are kept for at most ``max_tracked_products`` ids;
+    past that the cache is cleared, which starts a new generation.
+    """
+
+    def __init__(self, max_bytes: int, max_tracked_products: int = MAX_TRACKED_PRODUCTS):
+        self.max_bytes = max_bytes
+        self.max_tracked_products = max_tracked_products
+        self._entries: "OrderedDict[Hashable, Tuple[Version, CachedResponse]]" = OrderedDict()
+        self._size = 0
+        self._generation = 0
+        self._product_versions: Dict[int, int] = {}
+        self._list_version = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def product_version(self, product_id: int) -> Version:
+        return (self._generation, self._product_versions.get(product_id, 0))
+
+    def list_version(self) -> Version:
+        return (self._generation, self._list_version)
+
+    def get(self, key: Hashable, version: Version) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, version: Version, body: bytes, etag: Optional[str] = None) -> CachedResponse:
+        """Store ``body``; without an explicit ``etag`` it is derived from the content."""
+        if etag is None:
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        cached = CachedResponse(body=body, etag=etag)
+        if version != self._current_version(key) or len(body) > self.max_bytes:
+            return cached
+
+        self._discard(key)
+        self._entries[key] = (version, cached)
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= len(evicted.body)
+        return cached
+
+    def invalidate_products(self, product_ids: Iterable[int]) -> None:
+        product_ids = set(product_ids)
+        for product_id in product_ids:
+            self._product_versions[product_id] = self._product_versions.get(product_id, 0) + 1
+        self._list_version += 1
+        # у товара может быть несколько записей — полная и урезанные через ?fields=/?include=
+        for key in [k for k in self._entries if k[0] == "list" or k[1] in product_ids]:
+            self._discard(key)
+        if len(self._product_versions) > self.max_tracked_products:
+            self.clear()
+
+    def clear(self) -> None:
+        # новое поколение делает недействительными все снятые версии —
+        # счётчики товаров можно начать заново
+        self._generation += 1
+        self._entries.clear()
+        self._size = 0
+        self._product_versions.clear()
+
+    def _current_version(self, key: Hashable) -> Version:
+        if key[0] == "product":
+            return self.product_version(key[1])
+        return self.list_version()
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1].body)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return etag in tags or f"W/{etag}" in tags or "*" in tags
+
+
+def _validator_headers(etag: str, cache_control: Optional[str]) -> dict:
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return headers
+
+
+def cached_json_response(request: Request, cached: CachedResponse, cache_control: Optional[str] = None) -> Response:
+    """200 with the cached body, or 304 if the client already has this ETag."""
+    headers = _validator_headers(cached.etag, cache_control)
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+def not_modified_or_tag(
+    request: Request, response: Response, etag: str, cache_control: Optional[str] = None
+) -> Optional[Response]:
+    """304 if the client already has ``etag``; otherwise set validators on ``response`` and return None.
+
+    For routes that build the body themselves: check before serializing.
+    """
+    headers = _validator_headers(etag, cache_control)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+product_cache = ResponseCache(max_bytes=settings.product_cache_max_bytes)
+
+on_products_committed(product_cache.invalidate_products)
+# в ответах товара вложены категория и размеры — их изменение сбрасывает весь кэш
+catalog.add_listener(product_cache.clear)
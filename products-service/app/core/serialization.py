@@ -0,0 +1,32 @@
+"""Fast JSON responses that skip FastAPI's response_model round trip.
+
+Routes keep ``response_model`` for the OpenAPI schema. When a handler
+returns a ``Response``, FastAPI sends it as is and does not validate it.
+Bodies come from a module-level TypeAdapter, where pydantic-core
+validates and dumps to bytes in one call without intermediate dicts. Row
+projections that already have the response shape go through orjson.
+Everything else is rendered by ``ORJSONResponse``, the app's default
+response class.
+"""
+from typing import Any, Mapping, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+__all__ = ["ORJSONResponse", "dump_model", "dump_rows", "json_response"]
+
+
+def dump_model(adapter: TypeAdapter, value: Any) -> bytes:
+    """Validate ORM objects (or dicts) with ``adapter`` and dump them as JSON."""
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def dump_rows(rows: Any) -> bytes:
+    """JSON for plain dicts/lists already shaped like the response model."""
+    return orjson.dumps(rows)
+
+
+def json_response(body: bytes, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,32 @@
+from pathlib import PurePosixPath
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Response
+
+from .config import settings
+from .image_store import IMMUTABLE_CACHE_CONTROL, URL_PREFIX, is_hidden
+
+router = APIRouter(tags=["static"])
+
+
+def accel_path(path: str) -> str:
+    """/static/<path> -> internal nginx location; 404 outside STATIC_DIR and for hidden paths."""
+    rel = PurePosixPath(path)
+    # ".." тоже начинается с точки; недописанные загрузки лежат в скрытых каталогах
+    if not path or rel.is_absolute() or is_hidden(path):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return quote(settings.static_accel_prefix.rstrip("/") + "/" + str(rel))
+
+
+@router.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_file(path: str):
+    """Hand the file transfer to nginx (STATIC_DELIVERY=nginx).
+
+    The app only checks and maps the path; nginx serves the bytes with
+    sendfile, Range, ETag and Last-Modified from the internal location.
+    """
+    headers = {"X-Accel-Redirect": accel_path(path)}
+    # nginx сохраняет Cache-Control из ответа приложения
+    if path.startswith(URL_PREFIX + "/"):
+        headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return Response(headers=headers)
@@ -0,0 +1,293 @@
+import asyncio
+import heapq
+import logging
+import sys
+import time
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .catalog import CatalogSnapshot, catalog
+from .config import settings
+from .database import AsyncSessionLocal
+from ..models.product import Product
+from ..models.stock_hold import HOLD_CONFIRMED, StockHold, StockHoldItem
+
+logger = logging.getLogger(__name__)
+
+KIND_PRODUCT = "product"
+KIND_CATEGORY = "category"
+
+# сколько совпадений префикса просматривается при ранжировании;
+# ограничивает время ответа на коротких префиксах вроде "a"
+MAX_SCAN = 2000
+# для префиксов до этой длины совпадений больше, чем MAX_SCAN, — лучшие по продажам
+# хранятся отдельным списком, иначе они терялись бы за окном просмотра по алфавиту
+SHORT_PREFIX_LEN = 2
+# не меньше максимального limit у /products/suggest
+TOP_PER_PREFIX = 50
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.split())
+
+
+def word_suffixes(label: str) -> List[str]:
+    """Keys for every word start: "Trail Runner" -> ["trail runner", "runner"]."""
+    words = normalize(label).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+def short_prefixes(label: str) -> set:
+    """Prefixes up to SHORT_PREFIX_LEN of every word start of ``label``."""
+    return {key[:n] for key in word_suffixes(label) for n in range(1, SHORT_PREFIX_LEN + 1) if len(key) >= n}
+
+
+@dataclass
+class Entry:
+    kind: str
+    id: int
+    label: str
+    slug: Optional[str] = None
+    category_id: Optional[int] = None
+    popularity: int = 0
+
+
+def rank(entry: Entry) -> tuple:
+    return (-entry.popularity, entry.label.casefold(), entry.id)
+
+
+class SuggestIndex:
+    """Sorted-array prefix index over product and category names.
+
+    ``_keys`` holds normalized word suffixes in sorted order and ``_refs``
+    the (kind, id) each key belongs to, so a prefix lookup is one bisect
+    plus a scan of the matching run. Matches are ranked by popularity:
+    units sold (confirmed holds) for products, the sum over their products
+    for categories. Prefixes of one or two characters match far more keys
+    than are scanned, so ``_top`` keeps their best entries from the last
+    build, topped up as sales come in.
+
+    Product writes on this replica are applied incrementally; writes on
+    other replicas are picked up by the periodic rebuild.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._refs: List[Tuple[str, int]] = []
+        self._entries: Dict[Tuple[str, int], Entry] = {}
+        self._top: Dict[str, Set[Tuple[str, int]]] = {}
+        self._catalog_version: Optional[int] = None
+        self.built_at: Optional[float] = None
+        self.build_ms = 0.0
+
+    @property
+    def is_built(self) -> bool:
+        return self.built_at is not None
+
+    # --- построение ---
+    def build(self, products: Iterable, categories: Iterable, sales: Dict[int, int], catalog_version: Optional[int] = None) -> None:
+        """Replace the index. ``products`` need id/name/category_id, ``categories`` id/name/slug."""
+        started = time.perf_counter()
+        entries: Dict[Tuple[str, int], Entry] = {}
+        for c in categories:
+            entries[(KIND_CATEGORY, c.id)] = Entry(KIND_CATEGORY, c.id, c.name, slug=c.slug)
+        for p in products:
+            popularity = sales.get(p.id, 0)
+            entries[(KIND_PRODUCT, p.id)] = Entry(KIND_PRODUCT, p.id, p.name, category_id=p.category_id, popularity=popularity)
+            category = entries.get((KIND_CATEGORY, p.category_id))
+            if category is not None:
+                category.popularity += popularity
+
+        pairs = sorted(
+            (key, ref)
+            for ref, entry in entries.items()
+            for key in word_suffixes(entry.label)
+        )
+        keys = [key for key, _ in pairs]
+        refs = [ref for _, ref in pairs]
+        ranks = {ref: rank(entry) for ref, entry in entries.items()}
+        top = {}
+        for prefix in {key[:n] for key in keys for n in range(1, SHORT_PREFIX_LEN + 1)}:
+            # ключи отсортированы — совпадения префикса идут подряд
+            start = bisect_left(keys, prefix)
+            end = bisect_left(keys, prefix + "\uffff", start)
+            top[prefix] = set(heapq.nsmallest(TOP_PER_PREFIX, set(refs[start:end]), key=ranks.__getitem__))
+        # новые структуры подменяются целиком — читатели не видят полупостроенный индекс
+        self._entries = entries
+        self._keys = keys
+        self._refs = refs
+        self._top = top
+        self._catalog_version = catalog_version
+        self.built_at = time.time()
+        self.build_ms = (time.perf_counter() - started) * 1000
+
+    async def build_from_db(self, db: AsyncSession) -> None:
+        snapshot = await catalog.get(db)
+        # только активные товары — как в списках и поиске
+        products = (await db.execute(
+            select(Product.id, Product.name, Product.category_id).where(Product.is_active)
+        )).all()
+        sales = dict((await db.execute(
+            select(StockHoldItem.product_id, func.sum(StockHoldItem.quantity))
+            .join(StockHold, StockHold.id == StockHoldItem.hold_id)
+            .where(StockHold.status == HOLD_CONFIRMED)
+            .group_by(StockHoldItem.product_id)
+        )).all())
+        self.build(products, snapshot.categories, sales, catalog_version=snapshot.version)
+
+    # --- инкрементальные обновления ---
+    def _add_keys(self, ref: Tuple[str, int], label: str) -> None:
+        # массивы отсортированы по паре (key, ref) — вставляем на её место
+        for key in word_suffixes(label):
+            i = bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key and self._refs[i] < ref:
+                i += 1
+            self._keys.insert(i, key)
+            self._refs.insert(i, ref)
+
+    def _remove_keys(self, ref: Tuple[str, int], label: str) -> None:
+        for key in word_suffixes(label):
+            i = bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key:
+                if self._refs[i] == ref:
+                    del self._keys[i]
+                    del self._refs[i]
+                    break
+                i += 1
+
+    def _promote(self, entry: Entry) -> None:
+        """Put ``entry`` in the short-prefix lists after its name or popularity changed."""
+        ref = (entry.kind, entry.id)
+        for prefix in short_prefixes(entry.label):
+            top = self._top.setdefault(prefix, set())
+            top.add(ref)
+            if len(top) > 2 * TOP_PER_PREFIX:
+                # выбывшие и переименованные отсеиваются здесь же
+                alive = [self._entries[r] for r in top if r in self._entries and prefix in short_prefixes(self._entries[r].label)]
+                self._top[prefix] = {(e.kind, e.id) for e in heapq.nsmallest(TOP_PER_PREFIX, alive, key=rank)}
+
+    def _add_category_popularity(self, category_id: Optional[int], delta: int) -> None:
+        category = self._entries.get((KIND_CATEGORY, category_id))
+        if category is not None:
+            category.popularity += delta
+            if delta > 0:
+                self._promote(category)
+
+    def upsert_product(self, product_id: int, name: str, category_id: int) -> None:
+        ref = (KIND_PRODUCT, product_id)
+        entry = self._entries.get(ref)
+        if entry is None:
+            entry = self._entries[ref] = Entry(KIND_PRODUCT, product_id, name, category_id=category_id)
+            self._add_keys(ref, name)
+            self._promote(entry)
+            return
+        if entry.label != name:
+            self._remove_keys(ref, entry.label)
+            self._add_keys(ref, name)
+            entry.label = name
+            self._promote(entry)
+        if entry.category_id != category_id:
+            self._add_category_popularity(entry.category_id, -entry.popularity)
+            self._add_category_popularity(category_id, entry.popularity)
+            entry.category_id = category_id
+
+    def remove_product(self, product_id: int) -> None:
+        ref = (KIND_PRODUCT, product_id)
+        entry = self._entries.pop(ref, None)
+        if entry is not None:
+            self._remove_keys(ref, entry.label)
+            self._add_category_popularity(entry.category_id, -entry.popularity)
+
+    def record_sales(self, quantities: Dict[int, int]) -> None:
+        for product_id, quantity in quantities.items():
+            entry = self._entries.get((KIND_PRODUCT, product_id))
+            if entry is not None:
+                entry.popularity += quantity
+                self._promote(entry)
+                self._add_category_popularity(entry.category_id, quantity)
+
+    def sync_categories(self, snapshot: CatalogSnapshot) -> None:
+        """Apply category renames/creates/deletes from a newer catalog snapshot."""
+        if snapshot.version == self._catalog_version:
+            return
+        current = {cid for kind, cid in self._entries if kind == KIND_CATEGORY}
+        for cid in current - set(snapshot.category_by_id):
+            ref = (KIND_CATEGORY, cid)
+            self._remove_keys(ref, self._entries.pop(ref).label)
+        for row in snapshot.categories:
+            ref = (KIND_CATEGORY, row.id)
+            entry = self._entries.get(ref)
+            if entry is None:
+                popularity = sum(
+                    e.popularity for e in self._entries.values()
+                    if e.kind == KIND_PRODUCT and e.category_id == row.id
+                )
+                entry = self._entries[ref] = Entry(KIND_CATEGORY, row.id, row.name, slug=row.slug, popularity=popularity)
+                self._add_keys(ref, row.name)
+                self._promote(entry)
+            elif entry.label != row.name or entry.slug != row.slug:
+                self._remove_keys(ref, entry.label)
+                entry.label, entry.slug = row.name, row.slug
+                self._add_keys(ref, row.name)
+                self._promote(entry)
+        self._catalog_version = snapshot.version
+
+    # --- чтение ---
+    def suggest(self, prefix: str, limit: int = 10) -> List[Entry]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        keys, refs = self._keys, self._refs
+        start = bisect_left(keys, prefix)
+        seen = set()
+        for i in range(start, min(start + MAX_SCAN, len(keys))):
+            if not keys[i].startswith(prefix):
+                break
+            seen.add(refs[i])
+        if len(prefix) <= SHORT_PREFIX_LEN:
+            # список мог устареть после переименования — проверяем, что имя ещё подходит
+            seen.update(
+                ref for ref in self._top.get(prefix, ())
+                if ref in self._entries and prefix in short_prefixes(self._entries[ref].label)
+            )
+        entries = (self._entries[ref] for ref in seen if ref in self._entries)
+        return heapq.nsmallest(limit, entries, key=rank)
+
+    def stats(self) -> dict:
+        """Entry counts, approximate memory footprint and last build time."""
+        key_bytes = sum(sys.getsizeof(k) for k in self._keys)
+        entry_bytes = sum(sys.getsizeof(e) + sys.getsizeof(e.__dict__) for e in self._entries.values())
+        return {
+            "products": sum(1 for kind, _ in self._entries if kind == KIND_PRODUCT),
+            "categories": sum(1 for kind, _ in self._entries if kind == KIND_CATEGORY),
+            "keys": len(self._keys),
+            "memory_bytes": sys.getsizeof(self._keys) + sys.getsizeof(self._refs) + key_bytes + entry_bytes,
+            "build_ms": round(self.build_ms, 3),
+            "built_at": self.built_at,
+        }
+
+
+async def run_suggest_rebuilder(interval: Optional[float] = None) -> None:
+    """Build the index at startup, then rebuild it periodically."""
+    interval = interval or settings.suggest_rebuild_interval
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await suggest_index.build_from_db(session)
+            logger.info("Suggest index built: %s", suggest_index.stats())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Suggest index build failed")
+        await asyncio.sleep(interval)
+
+
+suggest_index = SuggestIndex()
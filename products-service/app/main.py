@@ -1,15 +1,65 @@
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
-from app.routes import category, products, size
+from app.core.consistency import CONSISTENCY_HEADER, SAFE_METHODS, current_token
+from app.core.database import close_db, engine, replica_engine, replica_monitor
+from app.core.facets import run_facet_refresher
+from app.core.image_store import URL_PREFIX, ImmutableStaticFiles, image_store
+from app.core import static_delivery
+from app.core.invalidation import invalidation_bus
+from app.core.serialization import ORJSONResponse
+from app.core.suggest import run_suggest_rebuilder
+from app.routes import category, events, products, size, stock_holds
+from app.services.image_variant_service import image_variant_worker
+from app.services.outbox_service import run_outbox_relay
+from app.services.popularity_service import close_view_counter, run_view_flusher
+from app.services.stock_hold_service import run_hold_sweeper
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # фоновая задача: возвращает на склад остатки из просроченных резервов
+    tasks = [
+        asyncio.create_task(run_hold_sweeper()),
+        # публикация событий из outbox в брокер
+        asyncio.create_task(run_outbox_relay()),
+        # строит индекс подсказок при старте и периодически перестраивает
+        asyncio.create_task(run_suggest_rebuilder()),
+        # обновляет materialized view фасетов категорий и держит её копию в памяти
+        asyncio.create_task(run_facet_refresher()),
+        # сброс счётчиков просмотров в product_stats и загрузка топа популярных
+        asyncio.create_task(run_view_flusher()),
+    ]
+    # межрепличная инвалидация локальных кэшей через LISTEN/NOTIFY
+    if settings.cache_bus_enabled:
+        tasks.append(asyncio.create_task(invalidation_bus.run()))
+    # превью и WebP-варианты загруженных изображений в пуле процессов
+    if settings.image_variants_enabled:
+        tasks.append(asyncio.create_task(image_variant_worker.run()))
+    # замеры отставания реплики для маршрутизации чтений
+    if replica_engine is not None:
+        tasks.append(asyncio.create_task(replica_monitor.run(replica_engine)))
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_view_counter()
+    await image_variant_worker.close()
+    await close_db()
 
 
 app = FastAPI(
     title=settings.app_name,
+    lifespan=lifespan,
     debug=settings.debug,
+    # ответы с response_model кодируются orjson вместо json.dumps
+    default_response_class=ORJSONResponse,
     docs_url='/api/docs',
     redoc_url='/api/redoc',
 )
@@ -20,13 +70,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CONSISTENCY_HEADER],
 )
 
-app.mount('/static', StaticFiles(directory=settings.static_dir), name='static')
+
+@app.middleware("http")
+async def consistency_token(request: Request, call_next):
+    """Attach the read-your-writes token to successful writes (only when a replica is configured)."""
+    response = await call_next(request)
+    if replica_engine is not None and request.method not in SAFE_METHODS and response.status_code < 400:
+        response.headers[CONSISTENCY_HEADER] = await current_token(engine)
+    return response
+
+if settings.static_delivery == "nginx":
+    app.include_router(static_delivery.router)
+else:
+    # content-addressed изображения не меняются по тому же пути — кэшируются навсегда;
+    # монтируется раньше /static, иначе запрос заберёт общий mount
+    app.mount(f'/static/{URL_PREFIX}', ImmutableStaticFiles(directory=image_store.root, check_dir=False), name='images')
+    app.mount('/static', StaticFiles(directory=settings.static_dir), name='static')
 
 app.include_router(category.router)
+# до products: иначе /products/events попадёт в /products/{product_id}
+app.include_router(events.router)
 app.include_router(products.router)
 app.include_router(size.router)
+app.include_router(stock_holds.router)
 
 
 
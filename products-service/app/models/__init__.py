@@ -1,7 +1,11 @@
-from .category import Category
+from .category import Category, CategoryClosure
 from .product import Product
 from .size import Size
 from .product_size import ProductSize
-from .product_image import ProductImage
+from .product_image import ProductImage, ProductImageVariant
+from .stock_hold import StockHold, StockHoldItem
+from .cache_version import CacheVersion
+from .outbox_event import OutboxEvent
+from .product_stats import ProductStats
 
-__all__ = ["Category", "Product", "Size", "ProductSize", "ProductImage"]
\ No newline at end of file
+__all__ = ["Category", "CategoryClosure", "Product", "Size", "ProductSize", "ProductImage", "ProductImageVariant", "StockHold", "StockHoldItem", "CacheVersion", "OutboxEvent", "ProductStats"]
\ No newline at end of file
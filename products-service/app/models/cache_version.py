@@ -0,0 +1,14 @@
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+from ..core.database import Base
+
+
+class CacheVersion(Base):
+    """Last published version of a cache key ("product:<id>", "catalog").
+
+    Bumped in the same transaction as the write, so a replica that missed
+    notifications can compare versions and evict only what changed.
+    """
+    __tablename__ = "cache_versions"
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -1,13 +1,29 @@
-from typing import List
-from sqlalchemy import Integer, String
+from typing import List, Optional
+from sqlalchemy import ForeignKey, Integer, String
 from sqlalchemy.orm import  Mapped, mapped_column, relationship
 from ..core.database import Base
+from .versioning import VersionedMixin
 
 
-class Category(Base):
+class Category(VersionedMixin, Base):
     __tablename__="categories"
     id: Mapped[int] = mapped_column(Integer, autoincrement = True, primary_key = True, index = True)
     name: Mapped[str] = mapped_column(String(30), unique = True)
     slug: Mapped[str] = mapped_column(String(50), unique = True)
+    # None — корневая категория; пути по дереву хранятся в category_closure
+    parent_id: Mapped[Optional[int]] = mapped_column(ForeignKey("categories.id"), nullable = True, index = True)
     
-    products: Mapped[List["Product"]] = relationship("Product", back_populates = "category")
\ No newline at end of file
+    products: Mapped[List["Product"]] = relationship("Product", back_populates = "category")
+
+
+class CategoryClosure(Base):
+    """Every (ancestor, descendant) pair of the category tree, self included.
+
+    A subtree is one index range on ``ancestor_id``, so "products of this
+    category and all subcategories" is a single join instead of a
+    recursive walk. Rows are maintained by ``CategoryRepository``.
+    """
+    __tablename__ = "category_closure"
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import JSON, BigInteger, DateTime, Index, String, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+from ..core.database import Base
+
+TOPIC_PRODUCTS = "products"
+TOPIC_STOCK = "stock"
+
+
+class OutboxEvent(Base):
+    """Event written in the same transaction as the change it describes.
+
+    ``position`` is assigned by the relay at publish time, one batch at a
+    time, so the feed ordered by position never skips an event whose
+    transaction committed after a newer one.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # релей выбирает только неопубликованные события
+        Index("ix_outbox_events_unpublished", "id", postgresql_where=text("published_at IS NULL")),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    topic: Mapped[str] = mapped_column(String(50), nullable=False)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    aggregate_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    position: Mapped[Optional[int]] = mapped_column(BigInteger, unique=True, nullable=True)
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -1,27 +1,48 @@
-from typing import List, TYPE_CHECKING
-from sqlalchemy import Float, ForeignKey, Integer, String, Boolean, Text, func, DateTime
-from sqlalchemy.orm import  Mapped, mapped_column, relationship
+from typing import List, Optional, TYPE_CHECKING
+from sqlalchemy import DDL, Float, ForeignKey, Index, Integer, String, Boolean, Text, event, func, DateTime, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import  Mapped, mapped_column, query_expression, relationship
 from datetime import datetime
 from ..core.database import Base
+from .versioning import VersionedMixin
 
 if TYPE_CHECKING:
     from .product_size import ProductSize
     from .product_image import ProductImage
 
 
-class Product(Base):
+class Product(VersionedMixin, Base):
     __tablename__="products"
+    __table_args__ = (
+        # полнотекстовый поиск по name/description и нечёткий поиск по name (pg_trgm)
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        # витрина читает только активные товары: индекс не растёт от снятых с продажи
+        Index("ix_products_active_category_id", "category_id", postgresql_where=text("is_active")),
+    )
     
     id: Mapped[int] = mapped_column(Integer, autoincrement = True, primary_key = True, index = True)
     name: Mapped[str] = mapped_column(String(50), nullable = False, unique = True)
     price: Mapped[float] = mapped_column(Float, nullable = False)
     description: Mapped[str] = mapped_column(Text, nullable = True) 
-    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"))
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), index = True)
     is_active: Mapped[bool] = mapped_column(Boolean, default = True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # заполняется ProductRepository.create/update; не грузится вместе с товаром
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, nullable=True, deferred=True)
+    # файл превью первого изображения; заполняется только запросами с ?fields=image
+    image_file: Mapped[Optional[str]] = query_expression()
 
     category: Mapped["Category"] = relationship("Category", back_populates = "products")
     # association to ProductSize so we can access quantity and size via Product.sizes
     sizes: Mapped[List["ProductSize"]] = relationship("ProductSize", back_populates="product")
     # images for product
-    images: Mapped[List["ProductImage"]] = relationship("ProductImage", back_populates="product")
\ No newline at end of file
+    images: Mapped[List["ProductImage"]] = relationship("ProductImage", back_populates="product")
+
+
+# gin_trgm_ops нужен до создания индексов таблицы (create_all в тестах)
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
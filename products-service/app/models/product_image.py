@@ -1,15 +1,59 @@
 from datetime import datetime
-from sqlalchemy import Integer, ForeignKey, String, DateTime, func
+from typing import List, Optional
+from sqlalchemy import Integer, ForeignKey, String, DateTime, Text, UniqueConstraint, Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..core.database import Base
 
+# состояние генерации вариантов (превью/WebP) для ProductImage.variants_status
+VARIANTS_PENDING = "pending"
+VARIANTS_PROCESSING = "processing"
+VARIANTS_READY = "ready"
+VARIANTS_FAILED = "failed"
+
 
 class ProductImage(Base):
     __tablename__ = "product_images"
+    __table_args__ = (
+        # очередь воркера вариантов: только незавершённые изображения
+        Index(
+            "ix_product_images_variants_due",
+            "variants_retry_at",
+            postgresql_where=text("variants_status IN ('pending', 'processing')"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True, index=True)
-    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), index=True)
     file_name: Mapped[str] = mapped_column(String(255), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    variants_status: Mapped[str] = mapped_column(String(16), nullable=False, default=VARIANTS_PENDING, server_default=VARIANTS_PENDING)
+    variants_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # pending: не раньше этого времени; processing: до этого времени изображение занято воркером
+    variants_retry_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    variants_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
     product: Mapped["Product"] = relationship("Product", back_populates="images")
+    variants: Mapped[List["ProductImageVariant"]] = relationship(
+        "ProductImageVariant",
+        back_populates="image",
+        order_by="ProductImageVariant.width",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class ProductImageVariant(Base):
+    __tablename__ = "product_image_variants"
+    __table_args__ = (
+        UniqueConstraint("image_id", "name", name="uq_product_image_variants_image_id_name"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
+    image_id: Mapped[int] = mapped_column(ForeignKey("product_images.id", ondelete="CASCADE"))
+    name: Mapped[str] = mapped_column(String(32), nullable=False)
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    file_name: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    image: Mapped["ProductImage"] = relationship("ProductImage", back_populates="variants")
@@ -1,4 +1,4 @@
-from sqlalchemy import Float, ForeignKey, Integer, String, Boolean, Text, func, DateTime
+from sqlalchemy import Float, ForeignKey, Index, Integer, String, Boolean, Text, func, DateTime, UniqueConstraint, text
 from sqlalchemy.orm import  Mapped, mapped_column, relationship
 from datetime import datetime
 from ..core.database import Base
@@ -6,7 +6,14 @@ from ..core.database import Base
 
 class ProductSize(Base):
     __tablename__ = "product_sizes"
-    
+    __table_args__ = (
+        # один размер на товар; заодно индекс под поиск по (product_id, size_id)
+        UniqueConstraint("product_id", "size_id", name="uq_product_sizes_product_id_size_id"),
+        # EXISTS "есть в наличии" — только строки с остатком. Цена: изменение quantity
+        # больше не HOT-апдейт (колонка в условии индекса)
+        Index("ix_product_sizes_in_stock", "product_id", postgresql_where=text("quantity > 0")),
+    )
+
     id: Mapped[int] = mapped_column(Integer, autoincrement = True, primary_key = True, index = True)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
     size_id: Mapped[int] = mapped_column(ForeignKey("sizes.id"))
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Float, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.database import Base
+
+
+class ProductStats(Base):
+    """View counters per product, written behind by ``PopularityService.flush``.
+
+    ``score`` is an exponentially decayed view count as of ``updated_at``;
+    readers decay it further to the current time.
+    """
+    __tablename__ = "product_stats"
+
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    views: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    score: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    # индекс ограничивает выборку топа недавно просмотренными товарами
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+    )
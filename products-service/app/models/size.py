@@ -2,12 +2,13 @@ from typing import List, TYPE_CHECKING
 from sqlalchemy import Integer, String
 from sqlalchemy.orm import  Mapped, mapped_column, relationship
 from ..core.database import Base
+from .versioning import VersionedMixin
 
 if TYPE_CHECKING:
     from .product_size import ProductSize
 
 
-class Size(Base):
+class Size(VersionedMixin, Base):
     __tablename__ = "sizes"
     id: Mapped[int] = mapped_column(Integer, autoincrement = True, primary_key = True, index = True)
     value: Mapped[str] = mapped_column(String(10), unique = True)
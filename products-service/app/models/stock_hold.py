@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, func, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from ..core.database import Base
+
+
+HOLD_ACTIVE = "active"
+HOLD_CONFIRMED = "confirmed"
+HOLD_CANCELLED = "cancelled"
+HOLD_EXPIRED = "expired"
+
+
+class StockHold(Base):
+    __tablename__ = "stock_holds"
+    __table_args__ = (
+        # sweeper only ever looks at active holds ordered by expiry
+        Index(
+            "ix_stock_holds_active_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'active'"),
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), default=HOLD_ACTIVE, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    items: Mapped[List["StockHoldItem"]] = relationship("StockHoldItem", back_populates="hold")
+
+
+class StockHoldItem(Base):
+    __tablename__ = "stock_hold_items"
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
+    hold_id: Mapped[str] = mapped_column(ForeignKey("stock_holds.id", ondelete="CASCADE"), index=True)
+    product_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    size_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    hold: Mapped["StockHold"] = relationship("StockHold", back_populates="items")
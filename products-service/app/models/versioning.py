@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Sequence, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.database import Base
+
+# одна последовательность на products/categories/sizes: версии растут по всему
+# каталогу, поэтому (count, max(version)) любого набора строк меняется при любой записи в него
+catalog_version_seq = Sequence("catalog_version_seq", metadata=Base.metadata)
+
+
+class VersionedMixin:
+    """``version`` and ``updated_at`` columns used as HTTP validators (ETag).
+
+    Both are refreshed by ORM updates; product rows changed by bulk SQL are
+    bumped once per transaction in ``changes._bump_product_versions``.
+    """
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        server_default=catalog_version_seq.next_value(),
+        onupdate=catalog_version_seq.next_value(),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -1,10 +1,22 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.orm import aliased
 from typing import Optional, List
 
-from ..models.category import Category
+from ..core.changes import mark_catalog_changed
+from ..models.category import Category, CategoryClosure
 from ..schemas.category import CategoryCreate, CategoryUpdate
 
+# ключ advisory-lock: перемещения в дереве категорий идут по одному,
+# иначе два встречных переноса могут замкнуть цикл
+CATEGORY_TREE_LOCK_KEY = 720332
+
+
+def subtree_ids(category_id: int):
+    """Ids of the category and all its descendants, one range on the closure PK."""
+    return select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+
+
 class CategoryRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -21,9 +33,31 @@ class CategoryRepository:
         result = await self.db.execute(select(Category).where(Category.slug == slug))
         return result.scalar_one_or_none()
     
+    async def lock_tree(self) -> None:
+        """Serialize tree changes until the end of the transaction."""
+        await self.db.execute(select(func.pg_advisory_xact_lock(CATEGORY_TREE_LOCK_KEY)))
+
+    async def is_in_subtree(self, category_id: int, root_id: int) -> bool:
+        result = await self.db.execute(
+            select(CategoryClosure.depth).where(
+                CategoryClosure.ancestor_id == root_id, CategoryClosure.descendant_id == category_id
+            )
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def has_children(self, category_id: int) -> bool:
+        result = await self.db.execute(select(Category.id).where(Category.parent_id == category_id).limit(1))
+        return result.scalar_one_or_none() is not None
+
     async def create(self, category_data: CategoryCreate) -> Category:
         new_category = Category(**category_data.model_dump())
         self.db.add(new_category)
+        await self.db.flush()
+        self.db.add(CategoryClosure(ancestor_id=new_category.id, descendant_id=new_category.id, depth=0))
+        await self.db.flush()
+        if new_category.parent_id is not None:
+            await self._attach(new_category.id, new_category.parent_id)
+        mark_catalog_changed(self.db)
         await self.db.commit()
         await self.db.refresh(new_category)
         return new_category
@@ -31,8 +65,13 @@ class CategoryRepository:
     async def update(self, category_id: int, category_data: CategoryUpdate) -> Category:
         category = await self.get_by_id(category_id)
         if category:
+            if "parent_id" in category_data and category_data["parent_id"] != category.parent_id:
+                await self._detach(category_id)
+                if category_data["parent_id"] is not None:
+                    await self._attach(category_id, category_data["parent_id"])
             for field, value in category_data.items():
                 setattr(category, field, value)
+            mark_catalog_changed(self.db)
             await self.db.commit()
             await self.db.refresh(category)
         return category
@@ -40,7 +79,29 @@ class CategoryRepository:
     async def delete(self, category_id: int) -> bool:
         category = await self.get_by_id(category_id)
         if category:
+            # строки category_closure удаляются каскадом
             await self.db.delete(category)
+            mark_catalog_changed(self.db)
             await self.db.commit()
             return True
-        return False
\ No newline at end of file
+        return False
+
+    async def _detach(self, category_id: int) -> None:
+        # пути от прежних предков ко всему поддереву; пути внутри поддерева остаются
+        subtree = subtree_ids(category_id)
+        await self.db.execute(
+            delete(CategoryClosure)
+            .where(CategoryClosure.descendant_id.in_(subtree), CategoryClosure.ancestor_id.not_in(subtree))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _attach(self, category_id: int, parent_id: int) -> None:
+        # каждый предок нового родителя (включая его самого) x каждый узел поддерева
+        above, below = aliased(CategoryClosure), aliased(CategoryClosure)
+        await self.db.execute(
+            CategoryClosure.__table__.insert().from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(above.ancestor_id, below.descendant_id, above.depth + below.depth + literal(1))
+                .where(above.descendant_id == parent_id, below.ancestor_id == category_id),
+            )
+        )
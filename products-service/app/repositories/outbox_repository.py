@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.outbox_event import OutboxEvent
+
+# ключ advisory-lock: публикует события только один релей за раз
+OUTBOX_LOCK_KEY = 720331
+
+
+class OutboxRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def add(self, topic: str, event_type: str, aggregate_id, payload: dict) -> OutboxEvent:
+        """Stage an event in the caller's transaction; it is stored only if that commits."""
+        event = OutboxEvent(topic=topic, event_type=event_type, aggregate_id=str(aggregate_id), payload=payload)
+        self.db.add(event)
+        return event
+
+    async def try_lock_relay(self) -> bool:
+        result = await self.db.execute(select(func.pg_try_advisory_xact_lock(OUTBOX_LOCK_KEY)))
+        return bool(result.scalar())
+
+    async def get_unpublished(self, limit: int) -> List[OutboxEvent]:
+        result = await self.db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.published_at.is_(None))
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def last_position(self) -> int:
+        result = await self.db.execute(select(func.coalesce(func.max(OutboxEvent.position), 0)))
+        return result.scalar()
+
+    async def mark_published(self, events: List[OutboxEvent], published_at: datetime) -> None:
+        """Give events consecutive positions after the current maximum."""
+        position = await self.last_position()
+        for event in events:
+            position += 1
+            event.position = position
+            event.published_at = published_at
+        await self.db.flush()
+
+    async def list_since(self, since: int, limit: int) -> List[OutboxEvent]:
+        result = await self.db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.position > since)
+            .order_by(OutboxEvent.position)
+            .limit(limit)
+        )
+        return result.scalars().all()
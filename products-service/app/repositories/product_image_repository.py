@@ -1,8 +1,18 @@
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.engine import Row
+from typing import List, Optional
 
-from app.models.product_image import ProductImage
+from app.core.changes import mark_products_changed
+from app.models.product_image import (
+    ProductImage,
+    ProductImageVariant,
+    VARIANTS_FAILED,
+    VARIANTS_PENDING,
+    VARIANTS_PROCESSING,
+    VARIANTS_READY,
+)
 
 
 class ProductImageRepository:
@@ -14,8 +24,83 @@ class ProductImageRepository:
         self.db.add(img)
         await self.db.flush()
         await self.db.refresh(img)
+        mark_products_changed(self.db, [product_id])
         return img
 
     async def get_by_product(self, product_id: int) -> List[ProductImage]:
         result = await self.db.execute(select(ProductImage).where(ProductImage.product_id == product_id))
         return result.scalars().all()
+
+    async def get_by_file_name(self, product_id: int, file_name: str) -> Optional[ProductImage]:
+        result = await self.db.execute(
+            select(ProductImage).where(ProductImage.product_id == product_id, ProductImage.file_name == file_name)
+        )
+        return result.scalars().first()
+
+    async def claim_for_variants(self, limit: int, now: datetime, lease: timedelta) -> List[Row]:
+        """Take due images for variant generation, skipping ones locked by another worker.
+
+        Claimed images are marked processing until ``now + lease``; if the
+        worker dies, they become due again after the lease runs out.
+        """
+        due = (
+            select(ProductImage.id)
+            .where(
+                ProductImage.variants_status.in_([VARIANTS_PENDING, VARIANTS_PROCESSING]),
+                or_(ProductImage.variants_retry_at.is_(None), ProductImage.variants_retry_at <= now),
+            )
+            .order_by(ProductImage.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            update(ProductImage)
+            .where(ProductImage.id.in_(due.scalar_subquery()))
+            .values(
+                variants_status=VARIANTS_PROCESSING,
+                variants_retry_at=now + lease,
+                variants_attempts=ProductImage.variants_attempts + 1,
+            )
+            .returning(ProductImage.id, ProductImage.product_id, ProductImage.file_name, ProductImage.variants_attempts)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.all())
+
+    async def save_variants(self, image_id: int, product_id: int, variants: List[dict]) -> None:
+        await self.db.execute(delete(ProductImageVariant).where(ProductImageVariant.image_id == image_id))
+        if variants:
+            await self.db.execute(insert(ProductImageVariant).values([{**v, "image_id": image_id} for v in variants]))
+        await self.db.execute(
+            update(ProductImage)
+            .where(ProductImage.id == image_id)
+            .values(variants_status=VARIANTS_READY, variants_retry_at=None, variants_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        # в кэшированных ответах товара появляются ссылки на варианты
+        mark_products_changed(self.db, [product_id])
+
+    async def fail_variants(self, image_id: int, error: str, retry_at: Optional[datetime]) -> None:
+        """Schedule a retry at ``retry_at``, or give up when it is None."""
+        await self.db.execute(
+            update(ProductImage)
+            .where(ProductImage.id == image_id)
+            .values(
+                variants_status=VARIANTS_PENDING if retry_at else VARIANTS_FAILED,
+                variants_retry_at=retry_at,
+                variants_error=error[:1000],
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def queue_variants(self, all_images: bool = False) -> int:
+        """Put failed images (or every image) back into the variant queue."""
+        stmt = update(ProductImage).values(
+            variants_status=VARIANTS_PENDING,
+            variants_attempts=0,
+            variants_retry_at=None,
+            variants_error=None,
+        )
+        if not all_images:
+            stmt = stmt.where(ProductImage.variants_status == VARIANTS_FAILED)
+        result = await self.db.execute(stmt.execution_options(synchronize_session=False))
+        return result.rowcount
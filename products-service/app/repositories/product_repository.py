@@ -1,55 +1,336 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from sqlalchemy.orm import selectinload
-from typing import Optional, List
+from sqlalchemy import Boolean, Float, Integer, case, cast, column, func, literal_column, or_, select, delete, tuple_, update, values
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR, insert
+from sqlalchemy.orm import aliased, load_only, raiseload, selectinload, with_expression
+from typing import Optional, List, Tuple
 
-from ..models.category import Category
+from ..core.changes import lock_products, mark_products_changed, run_after_commit
+from ..core.suggest import suggest_index
+from ..core.config import settings
 from ..models.product import Product
 from ..models.product_size import ProductSize
-from ..models.product_image import ProductImage
-from ..schemas.product import ProductCreate, ProductUpdate
+from ..models.product_image import ProductImage, ProductImageVariant
+from ..models.outbox_event import TOPIC_PRODUCTS
+from .category_repository import subtree_ids
+from .outbox_repository import OutboxRepository
+from ..schemas.product import ProductCreate, ProductUpdate, ProductView
+from ..schemas.product_size import ProductSizeCreate
 from fastapi import HTTPException, status
 from sqlalchemy import select
 
+def product_event_payload(product: Product) -> dict:
+    return {
+        "id": product.id,
+        "name": product.name,
+        "price": product.price,
+        "description": product.description,
+        "category_id": product.category_id,
+    }
+
+
+def search_vector_expr():
+    """name (weight A) + description (weight B) for products.search_vector."""
+    config = cast(settings.search_text_config, REGCONFIG)
+    return func.setweight(func.to_tsvector(config, Product.name), literal_column("'A'")).op("||", return_type=TSVECTOR)(
+        func.setweight(func.to_tsvector(config, func.coalesce(Product.description, "")), literal_column("'B'"))
+    )
+
+
+def in_stock_clause():
+    """EXISTS over product_sizes with stock; probes the partial ix_product_sizes_in_stock."""
+    return (
+        select(ProductSize.id)
+        .where(ProductSize.product_id == Product.id, ProductSize.quantity > 0)
+        .exists()
+    )
+
+
+def listing_filter(category_id: Optional[int] = None, in_stock: Optional[bool] = None) -> list:
+    """WHERE clauses of a storefront listing: active products only, optionally by subtree and stock."""
+    # голый is_active (а не IS TRUE) — так планировщик сопоставляет условие с частичным индексом
+    clauses = [Product.is_active]
+    if category_id is not None:
+        clauses.append(Product.category_id.in_(subtree_ids(category_id)))
+    if in_stock is not None:
+        clauses.append(in_stock_clause() if in_stock else ~in_stock_clause())
+    return clauses
+
+
+# превью для ?fields=image; пока вариантов нет — оригинал
+LISTING_IMAGE_VARIANT = "thumb"
+
+
+def first_image_expr():
+    """Listing preview of the product's first image: one correlated subquery, no join on products."""
+    return (
+        select(func.coalesce(ProductImageVariant.file_name, ProductImage.file_name))
+        .select_from(ProductImage)
+        .outerjoin(
+            ProductImageVariant,
+            (ProductImageVariant.image_id == ProductImage.id) & (ProductImageVariant.name == LISTING_IMAGE_VARIANT),
+        )
+        .where(ProductImage.product_id == Product.id)
+        .order_by(ProductImage.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def product_load_options(view: Optional[ProductView] = None) -> list:
+    """Loader options for a product read: everything, or only what ``view`` asks for."""
+    if view is None:
+        return [
+            selectinload(Product.category),
+            selectinload(Product.sizes).selectinload(ProductSize.size),
+            selectinload(Product.images).selectinload(ProductImage.variants),
+        ]
+    # version нужен для ETag, category_id — для подгрузки категории
+    columns = {"id", "version", *view.fields} - {"image"}
+    if "category" in view.include:
+        columns.add("category_id")
+    options = [load_only(*(getattr(Product, name) for name in columns))]
+    if "image" in view.fields:
+        options.append(with_expression(Product.image_file, first_image_expr()))
+    if "category" in view.include:
+        options.append(selectinload(Product.category))
+    if "sizes" in view.include:
+        options.append(selectinload(Product.sizes).selectinload(ProductSize.size))
+    if "images" in view.include:
+        options.append(selectinload(Product.images).selectinload(ProductImage.variants))
+    # обращение к незапрошенной связи — ошибка, а не тихий ленивый запрос
+    options.append(raiseload("*"))
+    return options
+
+
 class ProductRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.outbox = OutboxRepository(db)
 
-    async def get_by_id(self, product_id: int) -> Optional[Product]:
+    async def get_by_id(self, product_id: int, view: Optional[ProductView] = None) -> Optional[Product]:
         result = await self.db.execute(
-            select(Product)
-            .where(Product.id == product_id)
-            .options(
-                selectinload(Product.category),
-                selectinload(Product.sizes).selectinload(ProductSize.size),
-                selectinload(Product.images)
-            )
+            select(Product).where(Product.id == product_id).options(*product_load_options(view))
         )
         return result.scalar_one_or_none()
     
-    async def get_by_category_slug(self, slug: str) -> List[Product]:
+    async def exists(self, product_id: int) -> bool:
+        result = await self.db.execute(select(Product.id).where(Product.id == product_id))
+        return result.scalar_one_or_none() is not None
+
+    # --- Валидаторы для условных GET: одна строка вместо товара со всеми связями ---
+    async def get_version(self, product_id: int) -> Optional[int]:
+        result = await self.db.execute(select(Product.version).where(Product.id == product_id))
+        return result.scalar_one_or_none()
+
+    async def get_list_version(
+        self, category_id: Optional[int] = None, in_stock: Optional[bool] = None
+    ) -> Tuple[int, int]:
+        """(count, max version) of the products in a listing."""
+        stmt = select(func.count(), func.coalesce(func.max(Product.version), 0)).where(
+            *listing_filter(category_id, in_stock)
+        )
+        count, max_version = (await self.db.execute(stmt)).one()
+        return count, max_version
+
+    async def get_many(self, product_ids: List[int]) -> List[Product]:
         result = await self.db.execute(
             select(Product)
-            .join(Product.category)
-            .where(Category.slug == slug)
+            .where(Product.id.in_(product_ids))
             .options(
                 selectinload(Product.category),
                 selectinload(Product.sizes).selectinload(ProductSize.size),
-                selectinload(Product.images)
+                selectinload(Product.images).selectinload(ProductImage.variants)
             )
         )
         return result.scalars().all()
-    
-    async def get_all(self) -> List[Product]:
+
+    async def get_by_category_id(
+        self, category_id: int, view: Optional[ProductView] = None, in_stock: Optional[bool] = None
+    ) -> List[Product]:
+        """Active products of the category and all its subcategories."""
         result = await self.db.execute(
             select(Product)
+            .where(*listing_filter(category_id, in_stock))
+            .options(*product_load_options(view))
+        )
+        return result.scalars().all()
+    
+    async def get_all(self, view: Optional[ProductView] = None, in_stock: Optional[bool] = None) -> List[Product]:
+        result = await self.db.execute(
+            select(Product).where(*listing_filter(in_stock=in_stock)).options(*product_load_options(view))
+        )
+        return result.scalars().all()
+
+    async def get_rows(
+        self, view: ProductView, category_id: Optional[int] = None, in_stock: Optional[bool] = None
+    ) -> list:
+        """Listing as plain rows of ``view.fields`` plus ``version``, no ORM objects.
+
+        Only for views without ``include``; ``image`` comes back as ``image_file``.
+        """
+        columns = [Product.version]
+        for name in view.fields:
+            columns.append(first_image_expr().label("image_file") if name == "image" else getattr(Product, name))
+        result = await self.db.execute(select(*columns).where(*listing_filter(category_id, in_stock)))
+        return result.all()
+
+    async def search(
+        self,
+        query: str,
+        limit: int,
+        category_id: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> List[Tuple[Product, float]]:
+        """Products matching ``query`` with their score, best first.
+
+        An active product matches if its search_vector matches the query or
+        the query is trigram-similar to a word sequence in the name (typos).
+        ``after`` is the (score, id) of the last row of the previous page.
+        """
+        config = cast(settings.search_text_config, REGCONFIG)
+        ts_query = func.websearch_to_tsquery(config, query)
+        score = cast(func.ts_rank_cd(Product.search_vector, ts_query) + func.word_similarity(query, Product.name), Float)
+
+        stmt = select(Product, score.label("score")).where(
+            or_(
+                Product.search_vector.op("@@")(ts_query),
+                Product.name.op("%>")(query),
+            ),
+            *listing_filter(category_id, in_stock),
+        )
+        if min_price is not None:
+            stmt = stmt.where(Product.price >= min_price)
+        if max_price is not None:
+            stmt = stmt.where(Product.price <= max_price)
+        if after is not None:
+            stmt = stmt.where(tuple_(score, Product.id) < tuple_(*after))
+
+        result = await self.db.execute(
+            stmt.order_by(score.desc(), Product.id.desc())
+            .limit(limit)
             .options(
                 selectinload(Product.category),
                 selectinload(Product.sizes).selectinload(ProductSize.size),
-                selectinload(Product.images)
+                selectinload(Product.images).selectinload(ProductImage.variants)
             )
         )
-        return result.scalars().all()
+        return [(row[0], row[1]) for row in result]
+
+    async def _refresh_search_vector(self, product_id: int) -> None:
+        await self.db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(search_vector=search_vector_expr())
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _sync_sizes(self, product_id: int, sizes: List[ProductSizeCreate]) -> None:
+        """Привести размеры товара к переданному списку.
+
+        Строки не пересоздаются: существующие размеры обновляются на месте
+        (и только если количество изменилось), удаляются лишь убранные.
+        Так правка в админке не трогает остальные строки и не конкурирует
+        с резервированием на чекауте за их блокировки.
+        """
+        # при повторе size_id побеждает последнее значение; сортировка — единый порядок блокировок
+        quantities = sorted({s.size_id: s.quantity for s in sizes}.items())
+        if quantities:
+            stmt = insert(ProductSize).values([
+                {"product_id": product_id, "size_id": size_id, "quantity": quantity}
+                for size_id, quantity in quantities
+            ])
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_product_sizes_product_id_size_id",
+                set_={"quantity": stmt.excluded.quantity},
+                where=ProductSize.quantity.is_distinct_from(stmt.excluded.quantity),
+            )
+            await self.db.execute(stmt)
+
+        removed = delete(ProductSize).where(ProductSize.product_id == product_id)
+        if quantities:
+            removed = removed.where(ProductSize.size_id.not_in([size_id for size_id, _ in quantities]))
+        await self.db.execute(removed.execution_options(synchronize_session=False))
+
+    async def apply_prices(self, changes: List[Tuple[int, float, bool]]) -> Tuple[int, List[dict]]:
+        """Set or adjust price for many products in one statement.
+
+        changes: (product_id, value, is_delta), at most one per product. Same
+        rules as ProductSizeRepository.apply_stock_levels: ordered row locks,
+        unchanged prices are not written, missing products and prices that
+        would drop to zero or below are returned as skipped.
+        """
+        if not changes:
+            return 0, []
+
+        requested = select(
+            values(
+                column("product_id", Integer),
+                column("value", Float),
+                column("is_delta", Boolean),
+                name="v",
+            ).data(changes)
+        ).cte("requested")
+        locked = (
+            select(Product.id)
+            .join(requested, Product.id == requested.c.product_id)
+            .order_by(Product.id)
+            .with_for_update(of=Product)
+            .cte("locked")
+        )
+        new_price = case((requested.c.is_delta, Product.price + requested.c.value), else_=requested.c.value)
+        updated = (
+            update(Product)
+            .where(
+                Product.id.in_(select(locked.c.id)),
+                Product.id == requested.c.product_id,
+                new_price > 0,
+                new_price != Product.price,
+            )
+            .values(price=new_price)
+            .returning(Product.id, Product.name, Product.price, Product.description, Product.category_id)
+            .cte("updated")
+        )
+
+        current = aliased(Product)
+        current_price = case((requested.c.is_delta, current.price + requested.c.value), else_=requested.c.value)
+        result = await self.db.execute(
+            select(
+                requested.c.product_id,
+                updated.c.name,
+                updated.c.price,
+                updated.c.description,
+                updated.c.category_id,
+                current.id.label("current_id"),
+            )
+            .select_from(requested)
+            .outerjoin(updated, updated.c.id == requested.c.product_id)
+            .outerjoin(current, current.id == requested.c.product_id)
+            .where(or_(updated.c.id.is_not(None), current.id.is_(None), current_price <= 0))
+        )
+
+        changed = []
+        skipped = []
+        for row in result.mappings():
+            if row["name"] is not None:
+                payload = {
+                    "id": row["product_id"],
+                    "name": row["name"],
+                    "price": row["price"],
+                    "description": row["description"],
+                    "category_id": row["category_id"],
+                }
+                self.outbox.add(TOPIC_PRODUCTS, "product.updated", row["product_id"], payload)
+                changed.append(row["product_id"])
+            else:
+                skipped.append({
+                    "product_id": row["product_id"],
+                    "reason": "missing" if row["current_id"] is None else "rejected",
+                })
+        mark_products_changed(self.db, changed)
+        return len(changed), skipped
 
     async def create(self, data: ProductCreate) -> Product:
         """Создание продукта и размеров в одной транзакции"""
@@ -78,6 +359,12 @@ class ProductRepository:
                 )
             await self.db.flush()
 
+        await self._refresh_search_vector(product.id)
+        payload = product_event_payload(product)
+        payload["sizes"] = [{"size_id": s.size_id, "quantity": s.quantity} for s in data.sizes or []]
+        self.outbox.add(TOPIC_PRODUCTS, "product.created", product.id, payload)
+        mark_products_changed(self.db, [product.id])
+        run_after_commit(self.db, lambda: suggest_index.upsert_product(payload["id"], payload["name"], payload["category_id"]))
         return await self.get_by_id(product.id)
 
     async def update(self, product_id: int, data: ProductUpdate) -> Optional[Product]:
@@ -85,7 +372,8 @@ class ProductRepository:
         product = await self.db.get(Product, product_id)
         if not product:
             return None
-
+        # строка products блокируется до размеров — тот же порядок, что у резервов и остатков
+        await lock_products(self.db, [product_id])
 
         update_data = data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
@@ -93,28 +381,34 @@ class ProductRepository:
                 setattr(product, field, value)
 
         if "sizes" in update_data and update_data["sizes"] is not None:
-            # удаляем старые размеры
-            await self.db.execute(delete(ProductSize).where(ProductSize.product_id == product_id))
-            # добавляем новые
-            for size_item in update_data["sizes"]:
-                self.db.add(
-                    ProductSize(
-                        product_id=product_id,
-                        size_id=size_item.size_id,
-                        quantity=size_item.quantity
-                    )
-                )
-            await self.db.flush()
+            await self._sync_sizes(product_id, data.sizes)
 
+        if "name" in update_data or "description" in update_data:
+            await self.db.flush()
+            await self._refresh_search_vector(product_id)
+        payload = product_event_payload(product)
+        if update_data.get("sizes") is not None:
+            payload["sizes"] = [{"size_id": s.size_id, "quantity": s.quantity} for s in data.sizes]
+        self.outbox.add(TOPIC_PRODUCTS, "product.updated", product_id, payload)
+        mark_products_changed(self.db, [product_id])
+        if product.is_active:
+            run_after_commit(self.db, lambda: suggest_index.upsert_product(product_id, payload["name"], payload["category_id"]))
+        else:
+            # снятый с продажи товар не подсказывается, как не попадает в списки и поиск
+            run_after_commit(self.db, lambda: suggest_index.remove_product(product_id))
         return await self.get_by_id(product_id)
 
     async def delete(self, product_id: int) -> bool:
         product = await self.db.get(Product, product_id)
         if not product:
             return False
+        await lock_products(self.db, [product_id])
         await self.db.execute(
             delete(ProductSize).where(ProductSize.product_id == product_id)
         )
         await self.db.delete(product)
+        self.outbox.add(TOPIC_PRODUCTS, "product.deleted", product_id, {"id": product_id})
         await self.db.flush()
+        mark_products_changed(self.db, [product_id])
+        run_after_commit(self.db, lambda: suggest_index.remove_product(product_id))
         return True
\ No newline at end of file
@@ -1,14 +1,22 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from typing import List, Optional
+from sqlalchemy import select, delete, update, func, values, column, and_, or_, case, Boolean, Integer
+from sqlalchemy.orm import aliased
+from fastapi import HTTPException
+from typing import Dict, List, Optional, Tuple
 
+from app.core.changes import lock_products, mark_products_changed
+from app.models.outbox_event import TOPIC_STOCK
+from app.models.product import Product
 from app.models.product_size import ProductSize
+from app.models.stock_hold import StockHold, StockHoldItem, HOLD_ACTIVE
+from app.repositories.outbox_repository import OutboxRepository
 from app.schemas.product_size import ProductSizeCreate, ProductSizeUpdate
 
 
 class ProductSizeRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.outbox = OutboxRepository(db)
         
     async def get_by_product(self, product_id: int) -> List[ProductSize]:
         result = await self.db.execute(
@@ -32,12 +40,14 @@ class ProductSizeRepository:
         self.db.add(new_ps)
         await self.db.flush()
         await self.db.refresh(new_ps)
+        mark_products_changed(self.db, [product_id])
         return new_ps
 
     async def update(self, ps_id: int, data: ProductSizeUpdate) -> Optional[ProductSize]:
         ps = await self.get_by_id(ps_id)
         if not ps:
             return None
+        await lock_products(self.db, [ps.product_id])
         
         update_payload = data.model_dump(exclude_unset=True)
         for field, value in update_payload.items():
@@ -45,65 +55,253 @@ class ProductSizeRepository:
 
         await self.db.flush()
         await self.db.refresh(ps)
+        mark_products_changed(self.db, [ps.product_id])
         return ps
 
     async def delete(self, ps_id: int) -> bool:
         ps = await self.get_by_id(ps_id)
         if not ps:
             return False
+        await lock_products(self.db, [ps.product_id])
 
         await self.db.delete(ps)
         await self.db.flush()
+        mark_products_changed(self.db, [ps.product_id])
         return True
 
     async def delete_by_product(self, product_id: int):
+        await lock_products(self.db, [product_id])
         await self.db.execute(delete(ProductSize).where(ProductSize.product_id == product_id))
+        mark_products_changed(self.db, [product_id])
+
+    async def check_many(self, pairs: List[Tuple[int, int]]) -> Dict[Tuple[int, int], dict]:
+        """Look up price and stock for many (product_id, size_id) pairs in one query.
+
+        The requested pairs are sent as a VALUES list and outer-joined to
+        products and product_sizes, so missing products and missing sizes
+        can be told apart without extra round trips.
+        """
+        if not pairs:
+            return {}
+
+        requested = values(
+            column("product_id", Integer),
+            column("size_id", Integer),
+            name="requested",
+        ).data(list(dict.fromkeys(pairs)))
+
+        result = await self.db.execute(
+            select(
+                requested.c.product_id,
+                requested.c.size_id,
+                Product.price,
+                ProductSize.id.label("product_size_id"),
+                ProductSize.quantity,
+            )
+            .select_from(requested)
+            .outerjoin(Product, Product.id == requested.c.product_id)
+            .outerjoin(
+                ProductSize,
+                and_(
+                    ProductSize.product_id == requested.c.product_id,
+                    ProductSize.size_id == requested.c.size_id,
+                ),
+            )
+        )
+        return {
+            (row.product_id, row.size_id): {
+                "product_exists": row.price is not None,
+                "size_exists": row.product_size_id is not None,
+                "available": row.quantity or 0,
+                "price": row.price,
+            }
+            for row in result
+        }
 
     async def reserve_many(self, items: List[dict]) -> None:
-        """Atomically reserve (decrement) quantity for given items.
+        """Decrement quantity for given items inside the caller's transaction.
 
         items: list of {'product_id': int, 'size_id': int, 'quantity': int}
+        Each row is decremented with a conditional UPDATE, so concurrent
+        reservations can't oversell. Rows are touched in (product_id, size_id)
+        order to avoid deadlocks between overlapping carts.
         Raises HTTPException(400) if any item lacks stock.
         """
-        # perform checks and updates within a transaction
-        async with self.db.begin():
-            for it in items:
-                product_id = it["product_id"]
-                size_id = it["size_id"]
-                qty = it["quantity"]
-
-                result = await self.db.execute(
-                    select(ProductSize).where(
-                        ProductSize.product_id == product_id,
-                        ProductSize.size_id == size_id
-                    )
+        totals: Dict[Tuple[int, int], int] = {}
+        for it in items:
+            key = (it["product_id"], it["size_id"])
+            totals[key] = totals.get(key, 0) + it["quantity"]
+
+        # products раньше product_sizes — тот же порядок, что у правки товара
+        await lock_products(self.db, (product_id for product_id, _ in totals))
+        changes: Dict[int, List[dict]] = {}
+        for (product_id, size_id), qty in sorted(totals.items()):
+            result = await self.db.execute(
+                update(ProductSize)
+                .where(
+                    ProductSize.product_id == product_id,
+                    ProductSize.size_id == size_id,
+                    ProductSize.quantity >= qty,
                 )
-                ps = result.scalar_one_or_none()
-                if not ps:
-                    from fastapi import HTTPException
-                    raise HTTPException(status_code=400, detail=f"Size {size_id} for product {product_id} not found")
-                if ps.quantity < qty:
-                    from fastapi import HTTPException
-                    raise HTTPException(status_code=400, detail=f"Not enough stock for product {product_id} size {size_id}")
-                ps.quantity = ps.quantity - qty
-                await self.db.flush()
-
-    async def release_many(self, items: List[dict]) -> None:
-        """Release (increment) quantity for given items."""
-        async with self.db.begin():
-            for it in items:
-                product_id = it["product_id"]
-                size_id = it["size_id"]
-                qty = it["quantity"]
-
-                result = await self.db.execute(
-                    select(ProductSize).where(
-                        ProductSize.product_id == product_id,
-                        ProductSize.size_id == size_id
-                    )
+                .values(quantity=ProductSize.quantity - qty)
+                .returning(ProductSize.quantity)
+                .execution_options(synchronize_session=False)
+            )
+            available = result.scalar_one_or_none()
+            if available is not None:
+                changes.setdefault(product_id, []).append(
+                    {"size_id": size_id, "quantity": qty, "available": available}
                 )
-                ps = result.scalar_one_or_none()
-                if not ps:
-                    continue
-                ps.quantity = ps.quantity + qty
-                await self.db.flush()
\ No newline at end of file
+                continue
+
+            exists = await self.db.execute(
+                select(ProductSize.id).where(
+                    ProductSize.product_id == product_id,
+                    ProductSize.size_id == size_id,
+                )
+            )
+            if exists.scalar_one_or_none() is None:
+                raise HTTPException(status_code=400, detail=f"Size {size_id} for product {product_id} not found")
+            raise HTTPException(status_code=400, detail=f"Not enough stock for product {product_id} size {size_id}")
+
+        self._add_stock_events("stock.reserved", changes)
+        mark_products_changed(self.db, changes)
+
+    async def release_many(self, hold_ids: List[str], status: str) -> List[str]:
+        """Return stock held by the given holds, at most once per hold.
+
+        Only holds that are still active are moved to ``status`` and their
+        items are added back in a single set-based UPDATE. Holds that were
+        already confirmed, cancelled or expired are skipped, so repeating the
+        call is a no-op. Returns ids of the holds actually released.
+        """
+        if not hold_ids:
+            return []
+
+        result = await self.db.execute(
+            update(StockHold)
+            .where(StockHold.id.in_(hold_ids), StockHold.status == HOLD_ACTIVE)
+            .values(status=status)
+            .returning(StockHold.id)
+            .execution_options(synchronize_session=False)
+        )
+        released = list(result.scalars().all())
+        if not released:
+            return []
+
+        await lock_products(self.db, (await self.db.execute(
+            select(StockHoldItem.product_id).where(StockHoldItem.hold_id.in_(released)).distinct()
+        )).scalars())
+        totals = (
+            select(
+                StockHoldItem.product_id,
+                StockHoldItem.size_id,
+                func.sum(StockHoldItem.quantity).label("quantity"),
+            )
+            .where(StockHoldItem.hold_id.in_(released))
+            .group_by(StockHoldItem.product_id, StockHoldItem.size_id)
+            .subquery()
+        )
+        restocked = await self.db.execute(
+            update(ProductSize)
+            .where(
+                ProductSize.product_id == totals.c.product_id,
+                ProductSize.size_id == totals.c.size_id,
+            )
+            .values(quantity=ProductSize.quantity + totals.c.quantity)
+            .returning(
+                ProductSize.product_id,
+                ProductSize.size_id,
+                totals.c.quantity.label("released"),
+                ProductSize.quantity.label("available"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        changes: Dict[int, List[dict]] = {}
+        for row in restocked:
+            changes.setdefault(row.product_id, []).append(
+                {"size_id": row.size_id, "quantity": row.released, "available": row.available}
+            )
+        self._add_stock_events("stock.released", changes)
+        mark_products_changed(self.db, changes)
+        return released
+
+    async def apply_stock_levels(self, changes: List[Tuple[int, int, int, bool]]) -> Tuple[int, List[dict]]:
+        """Set or adjust quantity for many sizes in one statement.
+
+        changes: (product_id, size_id, value, is_delta), at most one per pair.
+        Rows are locked in (product_id, size_id) order, as in reserve_many, so
+        a warehouse sync can't deadlock with checkouts. Rows whose quantity
+        would not change are not written; pairs that don't exist or would go
+        below zero are returned as skipped.
+        """
+        if not changes:
+            return 0, []
+
+        await lock_products(self.db, (product_id for product_id, *_ in changes))
+        requested = select(
+            values(
+                column("product_id", Integer),
+                column("size_id", Integer),
+                column("value", Integer),
+                column("is_delta", Boolean),
+                name="v",
+            ).data(changes)
+        ).cte("requested")
+        matches = and_(ProductSize.product_id == requested.c.product_id, ProductSize.size_id == requested.c.size_id)
+        locked = (
+            select(ProductSize.id)
+            .join(requested, matches)
+            .order_by(ProductSize.product_id, ProductSize.size_id)
+            .with_for_update(of=ProductSize)
+            .cte("locked")
+        )
+        new_quantity = case((requested.c.is_delta, ProductSize.quantity + requested.c.value), else_=requested.c.value)
+        updated = (
+            update(ProductSize)
+            .where(
+                ProductSize.id.in_(select(locked.c.id)),
+                matches,
+                new_quantity >= 0,
+                new_quantity != ProductSize.quantity,
+            )
+            .values(quantity=new_quantity)
+            .returning(ProductSize.product_id, ProductSize.size_id, ProductSize.quantity)
+            .cte("updated")
+        )
+
+        # current — снимок до UPDATE: по нему отличаем «нет строки» от «ушло бы в минус»
+        current = aliased(ProductSize)
+        current_quantity = case((requested.c.is_delta, current.quantity + requested.c.value), else_=requested.c.value)
+        result = await self.db.execute(
+            select(
+                requested.c.product_id,
+                requested.c.size_id,
+                updated.c.quantity.label("available"),
+                current.id.label("current_id"),
+            )
+            .select_from(requested)
+            .outerjoin(updated, and_(updated.c.product_id == requested.c.product_id, updated.c.size_id == requested.c.size_id))
+            .outerjoin(current, and_(current.product_id == requested.c.product_id, current.size_id == requested.c.size_id))
+            .where(or_(updated.c.product_id.is_not(None), current.id.is_(None), current_quantity < 0))
+        )
+
+        changed: Dict[int, List[dict]] = {}
+        skipped = []
+        for row in result:
+            if row.available is not None:
+                changed.setdefault(row.product_id, []).append({"size_id": row.size_id, "available": row.available})
+            else:
+                skipped.append({
+                    "product_id": row.product_id,
+                    "size_id": row.size_id,
+                    "reason": "missing" if row.current_id is None else "rejected",
+                })
+        self._add_stock_events("stock.adjusted", changed)
+        mark_products_changed(self.db, changed)
+        return sum(len(sizes) for sizes in changed.values()), skipped
+
+    def _add_stock_events(self, event_type: str, changes: Dict[int, List[dict]]) -> None:
+        """One outbox event per product: sizes with the delta and the resulting stock."""
+        for product_id, sizes in changes.items():
+            self.outbox.add(TOPIC_STOCK, event_type, product_id, {"product_id": product_id, "sizes": sizes})
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from typing import List, Tuple
+
+from sqlalchemy import BigInteger, Integer, column, func, select, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.product import Product
+from ..models.product_stats import ProductStats
+from .product_repository import first_image_expr
+
+# строк VALUES на один upsert: 2 параметра на строку держат запрос ниже лимита asyncpg в 32767
+VIEWS_CHUNK_SIZE = 5000
+
+
+def decayed_score(half_life: float):
+    """``score`` brought forward from ``updated_at`` to now."""
+    age = func.extract("epoch", func.now() - ProductStats.updated_at)
+    return ProductStats.score * func.power(0.5, age / half_life)
+
+
+class ProductStatsRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add_views(self, counts: List[Tuple[int, int]], half_life: float) -> None:
+        """Add view deltas ``(product_id, views)``, one upsert per ``VIEWS_CHUNK_SIZE`` products.
+
+        The stored score is decayed to now before the delta is added, so
+        deltas from every worker merge into the same decayed count. Ids of
+        products deleted since the views are skipped; rows are locked in id
+        order like the other bulk writes, across chunks too.
+        """
+        counts = sorted(counts)
+        for i in range(0, len(counts), VIEWS_CHUNK_SIZE):
+            await self._add_views_chunk(counts[i:i + VIEWS_CHUNK_SIZE], half_life)
+
+    async def _add_views_chunk(self, counts: List[Tuple[int, int]], half_life: float) -> None:
+        delta = values(column("product_id", Integer), column("views", BigInteger), name="d").data(counts)
+        stmt = insert(ProductStats).from_select(
+            ["product_id", "views", "score"],
+            select(delta.c.product_id, delta.c.views, delta.c.views)
+            .join(Product, Product.id == delta.c.product_id)
+            .order_by(delta.c.product_id),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductStats.product_id],
+            set_={
+                "views": ProductStats.views + stmt.excluded.views,
+                "score": decayed_score(half_life) + stmt.excluded.score,
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(stmt)
+
+    async def top(self, limit: int, half_life: float, window: float) -> list:
+        """Most viewed active products by decayed score.
+
+        Only rows updated within ``window`` seconds are ranked: older scores
+        have decayed to noise and the ``updated_at`` index skips them.
+        """
+        score = decayed_score(half_life).label("score")
+        result = await self.db.execute(
+            select(
+                Product.id, Product.name, Product.price, first_image_expr().label("image_file"),
+                ProductStats.views, score,
+            )
+            .join(Product, Product.id == ProductStats.product_id)
+            .where(
+                ProductStats.updated_at > func.now() - timedelta(seconds=window),
+                Product.is_active.is_(True),
+            )
+            .order_by(score.desc(), Product.id)
+            .limit(limit)
+        )
+        return result.all()
@@ -0,0 +1,199 @@
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Sequence
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.changes import lock_products, mark_products_changed, run_after_commit
+from ..core.suggest import suggest_index
+from ..models.outbox_event import TOPIC_PRODUCTS
+from ..models.product import Product
+from ..models.product_size import ProductSize
+from ..schemas.product import ProductCreate
+from .outbox_repository import OutboxRepository
+from .product_repository import search_vector_expr
+
+# staging-таблицы живут в сессии соединения и очищаются на каждом commit,
+# поэтому при возврате соединения в пул в них ничего не остаётся
+_STAGING_DDL = (
+    """
+    CREATE TEMP TABLE IF NOT EXISTS import_products (
+        name varchar(50) PRIMARY KEY,
+        price double precision NOT NULL,
+        description text,
+        category_id integer NOT NULL,
+        sync_sizes boolean NOT NULL
+    ) ON COMMIT DELETE ROWS
+    """,
+    """
+    CREATE TEMP TABLE IF NOT EXISTS import_product_sizes (
+        name varchar(50) NOT NULL,
+        size_id integer NOT NULL,
+        quantity integer NOT NULL,
+        PRIMARY KEY (name, size_id)
+    ) ON COMMIT DELETE ROWS
+    """,
+)
+
+_EXISTING_PRODUCTS = text("SELECT p.id FROM products p JOIN import_products i ON i.name = p.name")
+
+_MERGE_PRODUCTS = text("""
+    INSERT INTO products (name, price, description, category_id, is_active)
+    SELECT name, price, description, category_id, true FROM import_products
+    ORDER BY name
+    ON CONFLICT (name) DO UPDATE
+    SET price = EXCLUDED.price, description = EXCLUDED.description, category_id = EXCLUDED.category_id
+    WHERE (products.price, products.description, products.category_id)
+        IS DISTINCT FROM (EXCLUDED.price, EXCLUDED.description, EXCLUDED.category_id)
+    RETURNING id, name, price, description, category_id, is_active, (xmax = 0) AS inserted
+""")
+
+_MERGE_SIZES = text("""
+    INSERT INTO product_sizes (product_id, size_id, quantity)
+    SELECT p.id, s.size_id, s.quantity
+    FROM import_product_sizes s JOIN products p ON p.name = s.name
+    ORDER BY p.id, s.size_id
+    ON CONFLICT ON CONSTRAINT uq_product_sizes_product_id_size_id DO UPDATE
+    SET quantity = EXCLUDED.quantity
+    WHERE product_sizes.quantity IS DISTINCT FROM EXCLUDED.quantity
+    RETURNING product_id
+""")
+
+# размеры, которых нет в строке импорта, удаляются — как в PUT /products/update
+_DELETE_REMOVED_SIZES = text("""
+    DELETE FROM product_sizes ps
+    USING import_products i JOIN products p ON p.name = i.name
+    WHERE ps.product_id = p.id AND i.sync_sizes
+      AND NOT EXISTS (
+          SELECT 1 FROM import_product_sizes s WHERE s.name = i.name AND s.size_id = ps.size_id
+      )
+    RETURNING ps.product_id
+""")
+
+
+@dataclass
+class MergeResult:
+    created: List[int] = field(default_factory=list)
+    updated: List[int] = field(default_factory=list)
+    unchanged: int = 0
+
+
+class ProductTransferRepository:
+    """Bulk load and dump of the catalog, bypassing per-row ORM work."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.outbox = OutboxRepository(db)
+
+    async def merge(self, rows: Sequence[ProductCreate]) -> MergeResult:
+        """COPY ``rows`` into staging tables and merge them into products/product_sizes.
+
+        Rows are matched by name: new names are inserted, existing products
+        are updated only if something differs. Sizes are replaced only for
+        rows that carry a ``sizes`` field. Names must be unique within ``rows``.
+        """
+        for ddl in _STAGING_DDL:
+            await self.db.execute(text(ddl))
+        conn = await (await self.db.connection()).get_raw_connection()
+        copy = conn.driver_connection
+        await copy.copy_records_to_table(
+            "import_products",
+            records=[(r.name, r.price, r.description, r.category_id, "sizes" in r.model_fields_set) for r in rows],
+            columns=["name", "price", "description", "category_id", "sync_sizes"],
+        )
+        await copy.copy_records_to_table(
+            "import_product_sizes",
+            records=[
+                (r.name, size_id, quantity)
+                for r in rows
+                for size_id, quantity in {s.size_id: s.quantity for s in r.sizes or []}.items()
+            ],
+            columns=["name", "size_id", "quantity"],
+        )
+
+        # существующие товары блокируются по id до записи товаров и размеров —
+        # как в правке товара и в резервах; иначе UPDATE брал бы их в порядке имён
+        await lock_products(self.db, (await self.db.execute(_EXISTING_PRODUCTS)).scalars())
+        merged = (await self.db.execute(_MERGE_PRODUCTS)).mappings().all()
+        size_changed = set((await self.db.execute(_MERGE_SIZES)).scalars())
+        size_changed.update((await self.db.execute(_DELETE_REMOVED_SIZES)).scalars())
+
+        result = MergeResult()
+        by_name: Dict[str, ProductCreate] = {r.name: r for r in rows}
+        names: Dict[int, str] = {}
+        # импорт не меняет is_active: снятые с продажи товары в подсказки не возвращаются
+        inactive = set()
+        for row in merged:
+            payload = dict(row)
+            inserted = payload.pop("inserted")
+            if not payload.pop("is_active"):
+                inactive.add(row["id"])
+            source = by_name[row["name"]]
+            names[row["id"]] = row["name"]
+            if inserted or "sizes" in source.model_fields_set:
+                payload["sizes"] = [{"size_id": s.size_id, "quantity": s.quantity} for s in source.sizes or []]
+            self.outbox.add(TOPIC_PRODUCTS, "product.created" if inserted else "product.updated", row["id"], payload)
+            (result.created if inserted else result.updated).append(row["id"])
+
+        # у товара изменились только размеры — событие всё равно нужно
+        only_sizes = size_changed - set(names)
+        if only_sizes:
+            products = await self.db.execute(
+                select(Product.id, Product.name, Product.price, Product.description, Product.category_id)
+                .where(Product.id.in_(only_sizes))
+            )
+            for row in products.mappings():
+                source = by_name[row["name"]]
+                payload = dict(row)
+                payload["sizes"] = [{"size_id": s.size_id, "quantity": s.quantity} for s in source.sizes or []]
+                self.outbox.add(TOPIC_PRODUCTS, "product.updated", row["id"], payload)
+                result.updated.append(row["id"])
+        result.unchanged = len(rows) - len(result.created) - len(result.updated)
+
+        if names:
+            await self.db.execute(
+                update(Product)
+                .where(Product.id.in_(list(names)))
+                .values(search_vector=search_vector_expr())
+                .execution_options(synchronize_session=False)
+            )
+        changed = result.created + result.updated
+        if changed:
+            mark_products_changed(self.db, changed)
+            suggest_rows = [(pid, name, by_name[name].category_id) for pid, name in names.items()]
+
+            def update_suggest() -> None:
+                for pid, name, category_id in suggest_rows:
+                    if pid in inactive:
+                        suggest_index.remove_product(pid)
+                    else:
+                        suggest_index.upsert_product(pid, name, category_id)
+
+            run_after_commit(self.db, update_suggest)
+        return result
+
+    async def stream_export(self, batch_size: int) -> AsyncIterator[Sequence]:
+        """Yield batches of product rows (with sizes as JSON) from a server-side cursor."""
+        sizes = (
+            select(func.coalesce(
+                func.json_agg(aggregate_order_by(
+                    func.json_build_object("size_id", ProductSize.size_id, "quantity", ProductSize.quantity),
+                    ProductSize.size_id,
+                )),
+                text("'[]'::json"),
+            ))
+            .where(ProductSize.product_id == Product.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                Product.id, Product.name, Product.price, Product.description,
+                Product.category_id, Product.is_active, sizes.label("sizes"),
+            )
+            .order_by(Product.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream(stmt)
+        async for batch in result.mappings().partitions():
+            yield batch
@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional, List
 
+from ..core.changes import mark_catalog_changed
 from ..models.size import Size
 from ..schemas.size import SizeCreate, SizeUpdate
 
@@ -24,6 +25,7 @@ class SizeRepository:
     async def create(self, size_data: SizeCreate) -> Size:
         new_size = Size(**size_data.model_dump())
         self.db.add(new_size)
+        mark_catalog_changed(self.db)
         await self.db.commit()
         await self.db.refresh(new_size)
         return new_size
@@ -33,6 +35,7 @@ class SizeRepository:
         if size:
             for field, value in size_data.items():
                 setattr(size, field, value)
+            mark_catalog_changed(self.db)
             await self.db.commit()
             await self.db.refresh(size)
         return size
@@ -42,6 +45,7 @@ class SizeRepository:
         size = await self.get_by_id(size_id)
         if size:
             await self.db.delete(size)
+            mark_catalog_changed(self.db)
             await self.db.commit()
             return True
         return False
\ No newline at end of file
@@ -0,0 +1,73 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+
+from app.core.changes import run_after_commit
+from app.core.suggest import suggest_index
+from app.models.stock_hold import StockHold, StockHoldItem, HOLD_ACTIVE, HOLD_CONFIRMED
+
+
+class StockHoldRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_id(self, hold_id: str) -> Optional[StockHold]:
+        result = await self.db.execute(
+            select(StockHold)
+            .where(StockHold.id == hold_id)
+            .options(selectinload(StockHold.items))
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def create(self, hold_id: str, items: List[dict], expires_at: datetime) -> StockHold:
+        hold = StockHold(id=hold_id, status=HOLD_ACTIVE, expires_at=expires_at)
+        self.db.add(hold)
+        for it in items:
+            self.db.add(
+                StockHoldItem(
+                    hold_id=hold_id,
+                    product_id=it["product_id"],
+                    size_id=it["size_id"],
+                    quantity=it["quantity"],
+                )
+            )
+        await self.db.flush()
+        return hold
+
+    async def confirm(self, hold_id: str, now: datetime) -> bool:
+        """Move an active, not yet expired hold to confirmed."""
+        result = await self.db.execute(
+            update(StockHold)
+            .where(
+                StockHold.id == hold_id,
+                StockHold.status == HOLD_ACTIVE,
+                StockHold.expires_at > now,
+            )
+            .values(status=HOLD_CONFIRMED)
+            .returning(StockHold.id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.scalar_one_or_none() is None:
+            return False
+        # проданные единицы поднимают товар в подсказках автодополнения
+        sold = dict((await self.db.execute(
+            select(StockHoldItem.product_id, func.sum(StockHoldItem.quantity))
+            .where(StockHoldItem.hold_id == hold_id)
+            .group_by(StockHoldItem.product_id)
+        )).all())
+        run_after_commit(self.db, lambda: suggest_index.record_sales(sold))
+        return True
+
+    async def lock_expired_ids(self, now: datetime, limit: int) -> List[str]:
+        """Pick a batch of overdue active holds, skipping ones locked by another sweeper."""
+        result = await self.db.execute(
+            select(StockHold.id)
+            .where(StockHold.status == HOLD_ACTIVE, StockHold.expires_at <= now)
+            .order_by(StockHold.expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
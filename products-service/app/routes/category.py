@@ -1,25 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
+from ..core.catalog import category_etag
+from ..core.config import settings
 from ..core.dependencies import get_current_user
+from ..core.response_cache import not_modified_or_tag
 from ..core.database import get_db
 from ..services.category_service import CategoryService
-from ..schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
+from ..schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse, CategoryTreeNode
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 @router.get("/", response_model=List[CategoryResponse])
-async def list_categories(db: AsyncSession = Depends(get_db)):
+async def list_categories(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     service = CategoryService(db)
+    not_modified = not_modified_or_tag(request, response, await service.list_etag(), settings.catalog_cache_control)
+    if not_modified:
+        return not_modified
     return await service.list()
 
+# до /{category_id}: иначе "tree" разберётся как id
+@router.get("/tree", response_model=List[CategoryTreeNode])
+async def category_tree(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    service = CategoryService(db)
+    # дерево строится из того же снимка каталога, что и список — тот же ETag
+    not_modified = not_modified_or_tag(request, response, await service.list_etag(), settings.catalog_cache_control)
+    if not_modified:
+        return not_modified
+    return await service.tree()
+
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
+async def get_category(category_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     service = CategoryService(db)
     category = await service.get_by_id(category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
+    not_modified = not_modified_or_tag(request, response, category_etag(category), settings.catalog_cache_control)
+    if not_modified:
+        return not_modified
     return category
 
 @router.post("/create", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -1,45 +1,209 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..schemas.product import ProductCreate, ProductUpdate, ProductResponse
-from ..services.product_service import ProductService
+from ..schemas.facet import CategoryFacetsResponse
+from ..schemas.product import (
+    PRODUCT_FIELDS, PRODUCT_INCLUDES, ProductCreate, ProductUpdate, ProductResponse, ProductSearchPage,
+    PopularProduct, ProductImportReport, ProductView, SuggestItem, SuggestStats,
+)
+from ..services.product_service import MAX_SEARCH_LIMIT, ProductService, dump_products, dump_search_page
+from ..services.product_transfer_service import EXPORT_FORMATS, ProductTransferService
+from ..core.config import settings
 from ..core.dependencies import get_current_user
-from ..core.database import get_db
+from ..core.database import get_db, get_read_db, read_session_factory
+from ..core.response_cache import cached_json_response
+from ..core.serialization import json_response
+from ..core.popularity import view_counter
+from ..core.suggest import suggest_index
 from fastapi import UploadFile, File
-from pathlib import Path
 from fastapi import Depends
-from app.repositories.product_image_repository import ProductImageRepository
-from app.core.config import settings
-from fastapi.concurrency import run_in_threadpool
+from app.services.product_image_service import ProductImageService
 from ..schemas.product_image import ProductImageUploadResponse
-from ..schemas import product as _product_schemas
-from ..schemas import product_size as _ps_schemas
-from ..schemas.stock import StockChangeItem
-from ..repositories.product_size_repository import ProductSizeRepository
+from ..schemas.stock import BulkUpdateRequest, BulkUpdateResult, StockCheckRequest, StockCheckResult
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..core.database import get_db
-from fastapi import Body
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+
+def product_view(
+    fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(PRODUCT_FIELDS)}"),
+    include: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(PRODUCT_INCLUDES)}"),
+) -> Optional[ProductView]:
+    """Sparse fieldset: only the requested columns and relations are loaded from the database."""
+    try:
+        return ProductView.parse(fields, include)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
 # --- Список всех продуктов ---
 @router.get("/", response_model=List[ProductResponse])
-async def list_products(db: AsyncSession = Depends(get_db)):
+async def list_products(
+    request: Request,
+    in_stock: Optional[bool] = Query(None, description="true — only products with stock, false — only sold out"),
+    view: Optional[ProductView] = Depends(product_view),
+    db: AsyncSession = Depends(get_db),
+):
+    service = ProductService(db)
+    return cached_json_response(
+        request,
+        await service.list_json(request.headers.get("if-none-match"), view, in_stock),
+        settings.products_cache_control,
+    )
+
+# --- Получение нескольких продуктов одним запросом ---
+@router.get("/batch", response_model=List[ProductResponse])
+async def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product ids, e.g. 1,2,3"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    try:
+        product_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="ids must be comma-separated integers")
+    service = ProductService(db)
+    # response_model остаётся для схемы OpenAPI, тело собирается заранее скомпилированным адаптером
+    return json_response(dump_products(await service.get_many(product_ids), None))
+
+# --- Полнотекстовый и нечёткий поиск ---
+@router.get("/search", response_model=ProductSearchPage)
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    category_id: Optional[int] = Query(None, gt=0),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: Optional[bool] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+):
+    service = ProductService(db)
+    page = await service.search(
+        q,
+        limit=limit,
+        cursor=cursor,
+        category_id=category_id,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=in_stock,
+    )
+    return json_response(dump_search_page(page))
+
+# --- Подсказки при вводе (префиксный индекс в памяти) ---
+@router.get("/suggest", response_model=List[SuggestItem])
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    service = ProductService(db)
+    return await service.suggest(q, limit)
+
+@router.get("/suggest/stats", response_model=SuggestStats)
+async def suggest_stats():
+    return suggest_index.stats()
+
+# --- Популярные сейчас: топ по просмотрам с затуханием, из памяти ---
+@router.get("/popular", response_model=List[PopularProduct])
+async def popular_products(limit: int = Query(20, ge=1, le=settings.popularity_top_k)):
+    return view_counter.top(limit)
+
+# --- Выгрузка каталога потоком (NDJSON или CSV, только для суперюзеров) ---
+@router.get("/export")
+async def export_products(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user: dict = Depends(get_current_user),
+):
+    if not user.get("is_superuser"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    session_factory = read_session_factory(request)
+
+    async def body():
+        # своя сессия: курсор читается уже после выхода из обработчика
+        async with session_factory() as session:
+            async for chunk in ProductTransferService(session).export(format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
+
+# --- Массовая загрузка товаров из NDJSON (только для суперюзеров) ---
+@router.post("/import", response_model=ProductImportReport)
+async def import_products(
+    request: Request,
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if not user.get("is_superuser"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    service = ProductTransferService(db)
+    try:
+        return await service.import_ndjson(request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+# --- Массовое обновление остатков и цен (синхронизация со складом, только для суперюзеров) ---
+@router.post("/bulk-update", response_model=BulkUpdateResult)
+async def bulk_update_products(
+    data: BulkUpdateRequest,
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if not user.get("is_superuser"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
     service = ProductService(db)
-    return await service.list()
+    return await service.bulk_update(data)
+
+# --- Проверка наличия и цены сразу для нескольких позиций ---
+@router.post("/stock/check", response_model=List[StockCheckResult])
+async def check_stock(data: StockCheckRequest, db: AsyncSession = Depends(get_db)):
+    service = ProductService(db)
+    return await service.check_stock(data.items)
 
 # --- Получение продукта по ID ---
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
+async def get_product(
+    product_id: int,
+    request: Request,
+    view: Optional[ProductView] = Depends(product_view),
+    db: AsyncSession = Depends(get_db),
+):
     service = ProductService(db)
-    return await service.get_by_id(product_id)
+    cached = await service.get_json(product_id, request.headers.get("if-none-match"), view)
+    # 304 тоже просмотр; несуществующие товары не считаются
+    view_counter.record(product_id)
+    return cached_json_response(request, cached, settings.products_cache_control)
 
 # --- Получение продуктов по slug категории ---
 @router.get("/category/{slug}", response_model=List[ProductResponse])
-async def get_products_by_category(slug: str, db: AsyncSession = Depends(get_db)):
+async def get_products_by_category(
+    slug: str,
+    request: Request,
+    in_stock: Optional[bool] = Query(None, description="true — only products with stock, false — only sold out"),
+    view: Optional[ProductView] = Depends(product_view),
+    db: AsyncSession = Depends(get_db),
+):
     service = ProductService(db)
-    return await service.get_by_category_slug(slug)
+    return cached_json_response(
+        request,
+        await service.get_by_category_slug_json(slug, request.headers.get("if-none-match"), view, in_stock),
+        settings.products_cache_control,
+    )
+
+# --- Фасеты категории: наличие по размерам, ценовые диапазоны ---
+@router.get("/category/{slug}/facets", response_model=CategoryFacetsResponse)
+async def get_category_facets(slug: str, response: Response, db: AsyncSession = Depends(get_db)):
+    service = ProductService(db)
+    facets = await service.get_category_facets(slug)
+    # счётчики и так отстают на интервал обновления view
+    response.headers["Cache-Control"] = settings.facets_cache_control
+    return facets
 
 # --- Создание продукта (только для суперюзеров) ---
 @router.post("/create", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
@@ -89,53 +253,19 @@ async def upload_product_image(
 ):
     if not user.get("is_superuser"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    service = ProductImageService(db)
+    return await service.upload(product_id, [file])
 
-    # Ensure product exists
-    service = ProductService(db)
-    product = await service.get_by_id(product_id)
-
-    # prepare destination
-    images_dir = Path(settings.images_dir) / "products" / str(product_id)
-    images_dir.mkdir(parents=True, exist_ok=True)
-    dest_path = images_dir / file.filename
-
-    # save file in threadpool to avoid blocking
-    with dest_path.open("wb") as buffer:
-        while True:
-            chunk = await file.read(1024 * 1024)
-            if not chunk:
-                break
-            await run_in_threadpool(buffer.write, chunk)
-    await file.close()
-
-    # save record in db
-    img_repo = ProductImageRepository(db)
-    img = await img_repo.create(product_id=product_id, file_name=str(Path("images") / "products" / str(product_id) / file.filename))
-    await db.commit()
-
-    # return minimal info (file url)
-    url = f"/static/{img.file_name}"
-    return [{"id": img.id, "url": url}]
-
-
-@router.post("/reserve", status_code=status.HTTP_200_OK)
-async def reserve_stock(items: List[StockChangeItem] = Body(...), db: AsyncSession = Depends(get_db)):
-    """Reserve stock for multiple items atomically."""
-    repo = ProductSizeRepository(db)
-    # normalize items to dicts
-    payload = [{"product_id": i.size_id and i.size_id and i.__dict__.get('product_id') or i.__dict__.get('product_id', None),
-                "size_id": i.size_id, "quantity": i.quantity} for i in items]
-    # Above line keeps shape but in our ProductSizeCreate we only have size_id and quantity when used per-product.
-    # We'll accept that callers pass product_id in each item dict as well.
-    # Simpler: convert as dict
-    payload = [i.model_dump() if hasattr(i, 'model_dump') else i for i in items]
-    await repo.reserve_many(payload)
-    return {"detail": "reserved"}
-
-
-@router.post("/release", status_code=status.HTTP_200_OK)
-async def release_stock(items: List[StockChangeItem] = Body(...), db: AsyncSession = Depends(get_db)):
-    repo = ProductSizeRepository(db)
-    payload = [i.model_dump() if hasattr(i, 'model_dump') else i for i in items]
-    await repo.release_many(payload)
-    return {"detail": "released"}
+
+# --- Загрузка нескольких изображений за раз ---
+@router.post("/update/{product_id}/images/batch", response_model=List[ProductImageUploadResponse])
+async def upload_product_images(
+    product_id: int,
+    files: List[UploadFile] = File(...),
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if not user.get("is_superuser"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    service = ProductImageService(db)
+    return await service.upload(product_id, files)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
+from ..core.config import settings
 from ..core.dependencies import get_current_user
+from ..core.response_cache import not_modified_or_tag
 from ..core.database import get_db
 from ..services.size_service import SizeService
 from ..schemas.size import SizeCreate, SizeUpdate, SizeResponse
@@ -10,8 +12,11 @@ from ..schemas.size import SizeCreate, SizeUpdate, SizeResponse
 router = APIRouter(prefix="/sizes", tags=["sizes"])
 
 @router.get("/", response_model=List[SizeResponse])
-async def list_sizes(db: AsyncSession = Depends(get_db)):
+async def list_sizes(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     service = SizeService(db)
+    not_modified = not_modified_or_tag(request, response, await service.list_etag(), settings.catalog_cache_control)
+    if not_modified:
+        return not_modified
     return await service.list()
 
 
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import get_db
+from ..services.stock_hold_service import StockHoldService
+from ..schemas.stock import StockHoldCreate, StockHoldResponse
+
+router = APIRouter(prefix="/products/holds", tags=["stock holds"])
+
+
+# --- Создание резерва товара с ограниченным временем жизни ---
+@router.post("/", response_model=StockHoldResponse, status_code=status.HTTP_201_CREATED)
+async def create_hold(data: StockHoldCreate, db: AsyncSession = Depends(get_db)):
+    service = StockHoldService(db)
+    return await service.create(data)
+
+
+@router.get("/{hold_id}", response_model=StockHoldResponse)
+async def get_hold(hold_id: str, db: AsyncSession = Depends(get_db)):
+    service = StockHoldService(db)
+    return await service.get(hold_id)
+
+
+# --- Подтверждение резерва (идемпотентно) ---
+@router.post("/{hold_id}/confirm", response_model=StockHoldResponse)
+async def confirm_hold(hold_id: str, db: AsyncSession = Depends(get_db)):
+    service = StockHoldService(db)
+    return await service.confirm(hold_id)
+
+
+# --- Отмена резерва и возврат остатков (идемпотентно) ---
+@router.post("/{hold_id}/cancel", response_model=StockHoldResponse)
+async def cancel_hold(hold_id: str, db: AsyncSession = Depends(get_db)):
+    service = StockHoldService(db)
+    return await service.cancel(hold_id)
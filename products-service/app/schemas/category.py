@@ -1,17 +1,28 @@
 from pydantic import BaseModel, ConfigDict, Field
-from typing import Optional
+from typing import List, Optional
 
 class CategoryBase(BaseModel):
     name: str = Field(..., max_length = 30)
     slug: str
+    # None — корневая категория
+    parent_id: Optional[int] = Field(None, gt = 0)
     
 class CategoryCreate(CategoryBase):
     pass
 
 class CategoryUpdate(BaseModel):
     name: Optional[str] = Field(None, max_length = 30)
+    # перенос в дереве; явный null — сделать корневой
+    parent_id: Optional[int] = Field(None, gt = 0)
     
 class CategoryResponse(CategoryBase):
     id: int = Field(..., gt = 0)
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CategoryTreeNode(BaseModel):
+    id: int
+    name: str
+    slug: str
+    children: List["CategoryTreeNode"] = []
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class SizeFacet(BaseModel):
+    size_id: int
+    value: str
+    count: int
+
+
+class PriceFacet(BaseModel):
+    min: Optional[float] = None  # None — без нижней границы
+    max: Optional[float] = None  # None — без верхней границы
+    count: int
+
+
+class CategoryFacetsResponse(BaseModel):
+    category_id: int
+    active: int
+    in_stock: int
+    sizes: List[SizeFacet]
+    prices: List[PriceFacet]
+    refreshed_at: Optional[datetime] = None
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from pydantic import BaseModel, Field, ConfigDict
 from .category import CategoryResponse
 from .product_size import ProductSizeCreate, ProductSizeResponse
@@ -18,6 +18,8 @@ class ProductUpdate(BaseModel):
     price: Optional[float] = None
     description: Optional[str] = None
     category_id: Optional[int] = None
+    # False снимает товар с продажи: он пропадает из списков, поиска и подсказок
+    is_active: Optional[bool] = None
     sizes: Optional[List[ProductSizeCreate]] = None
     
 class ProductResponse(BaseModel):
@@ -32,3 +34,114 @@ class ProductResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 ProductResponse.model_rebuild()
+
+
+# ?fields= — колонки products (+ image: URL превью первого изображения),
+# ?include= — связи, которые грузятся отдельными запросами
+PRODUCT_FIELDS = ("id", "name", "price", "description", "category_id", "image")
+PRODUCT_INCLUDES = ("category", "sizes", "images")
+DEFAULT_FIELDS = ("id", "name", "price", "description")
+
+
+class ProductView(BaseModel):
+    """Which columns and relations of a product to load and serialize.
+
+    Once ``fields`` or ``include`` is given, only what is asked for is
+    loaded: ``fields`` defaults to the scalar fields of ProductResponse,
+    ``include`` to no relations. ``id`` is always returned.
+    """
+    fields: Tuple[str, ...] = DEFAULT_FIELDS
+    include: Tuple[str, ...] = ()
+
+    model_config = ConfigDict(frozen=True)
+
+    @classmethod
+    def parse(cls, fields: Optional[str], include: Optional[str]) -> Optional["ProductView"]:
+        """None when neither parameter is given — the full ProductResponse."""
+        if fields is None and include is None:
+            return None
+        view = {}
+        for name, value, allowed in (("fields", fields, PRODUCT_FIELDS), ("include", include, PRODUCT_INCLUDES)):
+            if value is None:
+                continue
+            names = [n.strip() for n in value.split(",") if n.strip()]
+            unknown = [n for n in names if n not in allowed]
+            if unknown:
+                raise ValueError(f"Unknown {name}: {', '.join(unknown)}; allowed: {', '.join(allowed)}")
+            # порядок канонический, чтобы ?fields=name,id и ?fields=id,name делили запись кэша
+            view[name] = tuple(n for n in allowed if n in names or (name == "fields" and n == "id"))
+        return cls(**view)
+
+
+class ProductFieldsResponse(BaseModel):
+    """Product reduced to a ProductView; serialized with ``exclude_unset``."""
+    id: int
+    name: Optional[str] = None
+    price: Optional[float] = None
+    description: Optional[str] = None
+    category_id: Optional[int] = None
+    image: Optional[str] = None
+    category: Optional[CategoryResponse] = None
+    sizes: Optional[List[ProductSizeResponse]] = None
+    images: Optional[List[ProductImageResponse]] = None
+
+    @classmethod
+    def from_product(cls, product: Any, view: ProductView) -> "ProductFieldsResponse":
+        data = {}
+        for name in view.fields:
+            if name == "image":
+                data[name] = f"/static/{product.image_file}" if product.image_file else None
+            else:
+                data[name] = getattr(product, name)
+        for name in view.include:
+            data[name] = getattr(product, name)
+        return cls.model_validate(data, from_attributes=True)
+
+
+class ProductSearchPage(BaseModel):
+    items: List[ProductResponse]
+    # передаётся как cursor для следующей страницы; None — страниц больше нет
+    next_cursor: Optional[str] = None
+
+
+class PopularProduct(BaseModel):
+    id: int
+    name: str
+    price: float
+    image: Optional[str] = None
+    views: int
+    # просмотры с экспоненциальным затуханием (период полураспада POPULARITY_HALF_LIFE_SECONDS)
+    score: float
+
+
+class SuggestItem(BaseModel):
+    kind: str  # product | category
+    id: int
+    label: str
+    slug: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SuggestStats(BaseModel):
+    products: int
+    categories: int
+    keys: int
+    memory_bytes: int
+    build_ms: float
+    built_at: Optional[float] = None
+
+
+class ProductImportError(BaseModel):
+    line: int
+    # текст ошибки или список ошибок валидации pydantic
+    detail: Any
+
+
+class ProductImportReport(BaseModel):
+    created: int
+    updated: int
+    unchanged: int
+    failed: int
+    # не больше первых MAX_REPORTED_ERRORS ошибок
+    errors: List[ProductImportError] = []
@@ -1,12 +1,34 @@
-from pydantic import BaseModel, ConfigDict
+from typing import List
+from pydantic import BaseModel, ConfigDict, computed_field
+
+
+class ProductImageVariantResponse(BaseModel):
+    name: str
+    width: int
+    height: int
+    file_name: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def url(self) -> str:
+        return f"/static/{self.file_name}"
 
 
 class ProductImageResponse(BaseModel):
     id: int
     file_name: str
+    # пусто, пока воркер не сгенерировал превью
+    variants: List[ProductImageVariantResponse] = []
 
     model_config = ConfigDict(from_attributes=True)
 
+    @computed_field
+    @property
+    def url(self) -> str:
+        return f"/static/{self.file_name}"
+
 
 class ProductImageUploadResponse(BaseModel):
     id: int
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import List
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import List, Literal, Optional
 
 
 class StockChangeItem(BaseModel):
@@ -10,3 +11,88 @@ class StockChangeItem(BaseModel):
 
 class StockChangeRequest(BaseModel):
     items: List[StockChangeItem]
+
+
+class StockCheckRequest(BaseModel):
+    items: List[StockChangeItem] = Field(..., min_length=1, max_length=500)
+
+
+class StockCheckResult(BaseModel):
+    product_id: int
+    size_id: int
+    quantity: int
+    product_exists: bool
+    size_exists: bool
+    available: int
+    in_stock: bool
+    price: Optional[float] = None
+
+
+class StockHoldCreate(BaseModel):
+    items: List[StockChangeItem] = Field(..., min_length=1)
+    # falls back to STOCK_HOLD_TTL_SECONDS when omitted
+    ttl_seconds: Optional[int] = Field(None, gt=0, le=86400)
+
+
+class StockHoldItemResponse(BaseModel):
+    product_id: int
+    size_id: int
+    quantity: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class StockHoldResponse(BaseModel):
+    id: str
+    status: str
+    expires_at: datetime
+    items: List[StockHoldItemResponse] = []
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# "set" — абсолютное значение, "add" — приращение (может быть отрицательным)
+ChangeMode = Literal["set", "add"]
+
+
+class StockLevelChange(BaseModel):
+    product_id: int = Field(..., gt=0)
+    size_id: int = Field(..., gt=0)
+    quantity: int
+    mode: ChangeMode = "set"
+
+    @model_validator(mode="after")
+    def check_absolute(self):
+        if self.mode == "set" and self.quantity < 0:
+            raise ValueError("quantity must be >= 0 when mode is 'set'")
+        return self
+
+
+class PriceChange(BaseModel):
+    product_id: int = Field(..., gt=0)
+    price: float
+    mode: ChangeMode = "set"
+
+    @model_validator(mode="after")
+    def check_absolute(self):
+        if self.mode == "set" and self.price <= 0:
+            raise ValueError("price must be > 0 when mode is 'set'")
+        return self
+
+
+class BulkUpdateRequest(BaseModel):
+    stock: List[StockLevelChange] = Field([], max_length=50000)
+    prices: List[PriceChange] = Field([], max_length=50000)
+
+
+class BulkUpdateSkipped(BaseModel):
+    product_id: int
+    size_id: Optional[int] = None
+    # missing — нет такого товара/размера, rejected — остаток < 0 или цена <= 0
+    reason: Literal["missing", "rejected"]
+
+
+class BulkUpdateResult(BaseModel):
+    stock_updated: int
+    prices_updated: int
+    skipped: List[BulkUpdateSkipped] = []
@@ -4,8 +4,9 @@ from fastapi import status, HTTPException
 
 from sqlalchemy.exc import IntegrityError
 
+from ..core.catalog import catalog, CategoryRow
 from ..repositories.category_repository import CategoryRepository
-from ..schemas.category import CategoryResponse, CategoryUpdate, CategoryCreate
+from ..schemas.category import CategoryResponse, CategoryTreeNode, CategoryUpdate, CategoryCreate
 from ..models.category import Category
 
 class CategoryService:
@@ -13,28 +14,56 @@ class CategoryService:
         self.db = db
         self.repo = CategoryRepository(db)
         
-    async def list(self) -> List[Category]:
-        return await self.repo.get_all()
+    # чтение идёт из снимка каталога в памяти, запись — в БД с инвалидацией снимка
+    async def list(self) -> List[CategoryRow]:
+        return list((await catalog.get(self.db)).categories)
 
-    async def get_by_id(self, category_id: int) -> Optional[Category]:
-        return await self.repo.get_by_id(category_id)
+    async def list_etag(self) -> str:
+        return (await catalog.get(self.db)).categories_etag
 
-    async def get_by_slug(self, slug: str) -> Optional[Category]:
-        return await self.repo.get_by_slug(slug)
+    async def get_by_id(self, category_id: int) -> Optional[CategoryRow]:
+        return (await catalog.get(self.db)).category_by_id.get(category_id)
+
+    async def get_by_slug(self, slug: str) -> Optional[CategoryRow]:
+        return (await catalog.get(self.db)).category_by_slug.get(slug)
+
+    async def tree(self) -> List[CategoryTreeNode]:
+        snapshot = await catalog.get(self.db)
+
+        def build(parent_id: Optional[int]) -> List[CategoryTreeNode]:
+            return [
+                CategoryTreeNode(id=c.id, name=c.name, slug=c.slug, children=build(c.id))
+                for c in snapshot.children.get(parent_id, ())
+            ]
+
+        return build(None)
+
+    async def _check_parent(self, parent_id: int, category_id: Optional[int] = None) -> None:
+        # вызывается под lock_tree: дерево не меняется до коммита этой транзакции
+        if not await self.repo.get_by_id(parent_id):
+            raise ValueError(f"Parent category {parent_id} does not exist")
+        if category_id is not None and await self.repo.is_in_subtree(parent_id, category_id):
+            raise ValueError("Category cannot be moved under itself or its subcategory")
     
     async def create(self, data: CategoryCreate) -> Category:
         existing = await self.repo.get_by_slug(data.slug)
         if existing:
-            raise ValueError(f"Category with slug '{data.slug}' s")
+            raise ValueError(f"Category with slug '{data.slug}' already exists")
 
         all_cats = await self.repo.get_all()
         if any(c.name == data.name for c in all_cats):
             raise ValueError(f"Category with name '{data.name}' already exists")
 
+        if data.parent_id is not None:
+            await self.repo.lock_tree()
+            await self._check_parent(data.parent_id)
+
         try:
-            return await self.repo.create(data)
+            category = await self.repo.create(data)
         except IntegrityError as e:
             raise ValueError("Database integrity error when creating category") from e
+        catalog.invalidate()
+        return category
         
     async def update(self, category_id: int, data: CategoryUpdate) -> Category:
         cat = await self.repo.get_by_id(category_id)
@@ -52,13 +81,25 @@ class CategoryService:
             if any(c.name == dd["name"] and c.id != category_id for c in all_cats):
                 raise ValueError(f"Another category with name '{dd['name']}' already exists")
 
+        if dd.get("parent_id") is not None:
+            await self.repo.lock_tree()
+            await self._check_parent(dd["parent_id"], category_id)
+        elif "parent_id" in dd:
+            await self.repo.lock_tree()
+
         try:
-            return await self.repo.update(category_id, dd)
+            category = await self.repo.update(category_id, dd)
         except IntegrityError as e:
             await self.db.rollback()
             raise ValueError("Database integrity error when updating category") from e
+        catalog.invalidate()
+        return category
 
     async def delete(self, category_id: int) -> None:
+        await self.repo.lock_tree()
+        if await self.repo.has_children(category_id):
+            raise ValueError("Category has subcategories; move or delete them first")
         ok = await self.repo.delete(category_id)
         if not ok:
-            raise ValueError("Category not found or could not be deleted")
\ No newline at end of file
+            raise ValueError("Category not found or could not be deleted")
+        catalog.invalidate()
\ No newline at end of file
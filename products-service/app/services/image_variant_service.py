@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Set
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.image_store import image_store
+from app.core.image_variants import VARIANT_SPECS, render_variants
+from app.repositories.product_image_repository import ProductImageRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ImageVariantWorker:
+    """Generates image variants in a process pool, fed from product_images.
+
+    The table is the queue: uploads leave images ``pending`` and the worker
+    claims at most ``max_in_flight`` of them at a time, so a burst of
+    uploads waits in the database instead of piling up in memory. Failed
+    images are retried with exponential backoff, up to ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        max_in_flight: int,
+        max_attempts: int,
+        retry_delay: float,
+        poll_interval: float,
+        lease: float,
+    ):
+        self.processes = processes
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+
+    def notify(self) -> None:
+        """Wake the worker after new images were committed."""
+        self._wake.set()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        return self._pool
+
+    def _discard_pool(self, pool: Optional[ProcessPoolExecutor]) -> None:
+        """Drop a pool whose worker died; the next job starts a fresh one."""
+        # остальные задачи упавшего пула тоже получат BrokenProcessPool — новый пул не трогаем
+        if pool is None or pool is not self._pool:
+            return
+        logger.error("Image variant process pool is broken, restarting it")
+        pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    async def _process(self, job) -> None:
+        source = Path(settings.static_dir) / job.file_name
+        loop = asyncio.get_running_loop()
+        pool = self._executor()
+        try:
+            variants = await loop.run_in_executor(
+                pool, render_variants, str(source), str(image_store.root), VARIANT_SPECS
+            )
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # процесс убит (например, OOM на огромном изображении) — без замены пула падали бы все задания
+                self._discard_pool(pool)
+            retry_at = None
+            if job.variants_attempts < self.max_attempts:
+                delay = self.retry_delay * 2 ** (job.variants_attempts - 1)
+                retry_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            logger.warning("Image %s variants failed (attempt %s): %s", job.id, job.variants_attempts, e)
+            async with AsyncSessionLocal() as session:
+                await ProductImageRepository(session).fail_variants(job.id, f"{type(e).__name__}: {e}", retry_at)
+                await session.commit()
+            return
+
+        async with AsyncSessionLocal() as session:
+            await ProductImageRepository(session).save_variants(job.id, job.product_id, variants)
+            await session.commit()
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Image variant job crashed", exc_info=task.exception())
+        # освободился слот — можно брать следующее изображение
+        self._wake.set()
+
+    async def fill(self) -> int:
+        """Claim as many due images as there are free slots and start them."""
+        free = self.max_in_flight - len(self._in_flight)
+        if free <= 0:
+            return 0
+        async with AsyncSessionLocal() as session:
+            jobs = await ProductImageRepository(session).claim_for_variants(
+                free, datetime.now(timezone.utc), self.lease
+            )
+            await session.commit()
+        for job in jobs:
+            task = asyncio.create_task(self._process(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._done)
+        return len(jobs)
+
+    async def run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                await self.fill()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Image variant worker failed to claim jobs")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_until_empty(self) -> None:
+        """Process everything that is due right now, then return (backfill)."""
+        while True:
+            claimed = await self.fill()
+            if not claimed and not self._in_flight:
+                return
+            if self._in_flight:
+                await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+
+    async def close(self) -> None:
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+image_variant_worker = ImageVariantWorker(
+    processes=settings.image_worker_processes,
+    max_in_flight=settings.image_worker_max_in_flight,
+    max_attempts=settings.image_worker_max_attempts,
+    retry_delay=settings.image_worker_retry_delay,
+    poll_interval=settings.image_worker_poll_interval,
+    lease=settings.image_worker_lease,
+)
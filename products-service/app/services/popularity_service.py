@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import math
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.popularity import ViewCounter, view_counter
+from app.repositories.product_stats_repository import ProductStatsRepository
+from app.schemas.product import PopularProduct
+
+logger = logging.getLogger(__name__)
+
+# после 8 периодов полураспада вклад просмотров < 0.4% — такие строки в топ не попадают
+WINDOW_HALF_LIVES = 8
+
+
+class PopularityService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = ProductStatsRepository(db)
+
+    async def flush(self, counter: ViewCounter) -> int:
+        """Write the counter's views; on failure they go back to it for the next flush."""
+        pending = counter.take()
+        if not pending:
+            return 0
+        try:
+            await self.repo.add_views(list(pending.items()), settings.popularity_half_life)
+            await self.db.commit()
+        except BaseException:
+            # в том числе отмена при остановке — close_view_counter() допишет их
+            counter.restore(pending)
+            raise
+        return sum(pending.values())
+
+    async def reload(self, counter: ViewCounter) -> None:
+        half_life = settings.popularity_half_life
+        rows = await self.repo.top(settings.popularity_top_k, half_life, half_life * WINDOW_HALF_LIVES)
+        counter.set_top([
+            PopularProduct(
+                id=row.id,
+                name=row.name,
+                price=row.price,
+                image=f"/static/{row.image_file}" if row.image_file else None,
+                views=row.views,
+                score=round(row.score, 3),
+            )
+            for row in rows
+            if row.score > 0 and math.isfinite(row.score)
+        ])
+
+
+async def run_view_flusher(interval: Optional[float] = None) -> None:
+    interval = interval or settings.popularity_flush_interval
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                service = PopularityService(session)
+                await service.flush(view_counter)
+                await service.reload(view_counter)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("View counter flush failed")
+        await asyncio.sleep(interval)
+
+
+async def close_view_counter() -> None:
+    """Final flush at shutdown, so a restart does not lose the last interval."""
+    try:
+        async with AsyncSessionLocal() as session:
+            await PopularityService(session).flush(view_counter)
+    except Exception:
+        logger.exception("Final view counter flush failed, %s views lost", view_counter.pending())
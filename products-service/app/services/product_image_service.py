@@ -0,0 +1,62 @@
+import asyncio
+from typing import List
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.image_store import ImageStore, ImageTooLarge, StoredImage, UnsupportedImage, image_store
+from app.repositories.product_image_repository import ProductImageRepository
+from app.repositories.product_repository import ProductRepository
+from app.services.image_variant_service import image_variant_worker
+
+MAX_FILES_PER_UPLOAD = 20
+
+
+class ProductImageService:
+    def __init__(self, db: AsyncSession, store: ImageStore = image_store):
+        self.db = db
+        self.store = store
+        self.image_repository = ProductImageRepository(db)
+        self.product_repository = ProductRepository(db)
+
+    async def _store(self, upload: UploadFile, semaphore: asyncio.Semaphore) -> StoredImage:
+        async with semaphore:
+            try:
+                return await self.store.save(upload)
+            except UnsupportedImage as e:
+                raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=f"{upload.filename}: {e}")
+            except ImageTooLarge as e:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"{upload.filename}: {e}")
+
+    async def upload(self, product_id: int, files: List[UploadFile]) -> List[dict]:
+        """Store files (at most IMAGE_UPLOAD_CONCURRENCY at a time) and attach them to the product.
+
+        An image the product already has is not attached twice.
+        """
+        if len(files) > MAX_FILES_PER_UPLOAD:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_FILES_PER_UPLOAD} files per upload")
+        if not await self.product_repository.exists(product_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+        semaphore = asyncio.Semaphore(settings.image_upload_concurrency)
+        # дожидаемся всех файлов, даже если какой-то упал, и только потом отдаём ошибку
+        stored = await asyncio.gather(*(self._store(f, semaphore) for f in files), return_exceptions=True)
+        for item in stored:
+            if isinstance(item, BaseException):
+                raise item
+
+        # сессия одна — записи в БД по очереди, после того как файлы легли в хранилище
+        images = []
+        created = False
+        for item in stored:
+            img = await self.image_repository.get_by_file_name(product_id, item.file_name)
+            if img is None:
+                img = await self.image_repository.create(product_id=product_id, file_name=item.file_name)
+                created = True
+            images.append({"id": img.id, "url": f"/static/{img.file_name}"})
+        await self.db.commit()
+        if created:
+            # новые изображения ждут превью; будим воркер, не дожидаясь опроса
+            image_variant_worker.notify()
+        return images
@@ -1,18 +1,96 @@
-
-from typing import Optional, List
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
+from app.core.catalog import catalog
+from app.core.changes import lock_products
+from app.core.facets import PRICE_BUCKETS, facet_index
+from app.core.serialization import dump_model, dump_rows
+from app.core.response_cache import (
+    CachedResponse, etag_matches, product_cache, product_etag, product_list_etag,
+)
+from app.core.suggest import Entry, suggest_index
 from app.repositories.product_repository import ProductRepository
 from app.repositories.category_repository import CategoryRepository
 from app.repositories.size_repository import SizeRepository
 from app.repositories.product_size_repository import ProductSizeRepository
 
-from app.schemas.product import ProductCreate,ProductUpdate
+from app.schemas.facet import CategoryFacetsResponse, PriceFacet, SizeFacet
+from app.schemas.product import (
+    ProductCreate, ProductFieldsResponse, ProductUpdate, ProductResponse, ProductSearchPage, ProductView,
+)
 from app.schemas.product_size import ProductSizeCreate
+from app.schemas.stock import BulkUpdateRequest, StockChangeItem
 from ..models.product import Product
 
+MAX_BATCH_IDS = 100
+MAX_SEARCH_LIMIT = 100
+# строк на один UPDATE в bulk_update
+BULK_CHUNK_SIZE = 1000
+
+# схемы собираются один раз при импорте, а не на каждый ответ
+_product_adapter = TypeAdapter(ProductResponse)
+_product_list_adapter = TypeAdapter(List[ProductResponse])
+_fields_list_adapter = TypeAdapter(List[ProductFieldsResponse])
+_search_page_adapter = TypeAdapter(ProductSearchPage)
+
+
+def dump_products(products: List[Product], view: Optional[ProductView]) -> bytes:
+    """JSON list of products: full ProductResponse, or only what ``view`` loaded."""
+    if view is None:
+        return dump_model(_product_list_adapter, products)
+    return _fields_list_adapter.dump_json(
+        [ProductFieldsResponse.from_product(p, view) for p in products], exclude_unset=True
+    )
+
+
+def dump_product(product: Product, view: Optional[ProductView]) -> bytes:
+    if view is None:
+        return dump_model(_product_adapter, product)
+    return ProductFieldsResponse.from_product(product, view).model_dump_json(exclude_unset=True).encode()
+
+
+def dump_product_rows(rows: Iterable, view: ProductView) -> bytes:
+    """Same JSON as ``dump_products`` for rows of ``ProductRepository.get_rows``.
+
+    Rows are already shaped by the view, so they skip pydantic entirely.
+    """
+    items = []
+    for row in rows:
+        item = {}
+        for name in view.fields:
+            if name == "image":
+                item[name] = f"/static/{row.image_file}" if row.image_file else None
+            else:
+                item[name] = getattr(row, name)
+        items.append(item)
+    return dump_rows(items)
+
+
+def dump_search_page(page: dict) -> bytes:
+    return dump_model(_search_page_adapter, page)
+
+
+def fold_changes(changes: Iterable[Tuple[Hashable, float, str]]) -> Dict[Hashable, Tuple[float, bool]]:
+    """Collapse repeated keys in request order: "set" replaces, "add" accumulates.
+
+    Returns key -> (value, is_delta).
+    """
+    folded: Dict[Hashable, Tuple[float, bool]] = {}
+    for key, value, mode in changes:
+        if mode == "add" and key in folded:
+            previous, is_delta = folded[key]
+            folded[key] = (previous + value, is_delta)
+        else:
+            folded[key] = (value, mode == "add")
+    return folded
+
+
 class ProductService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -30,11 +108,211 @@ class ProductService:
             raise HTTPException(status_code=404, detail="Product not found")
         return product
 
+    # --- Готовые JSON-ответы из product_cache ---
+    # ETag строится из версий строк, а не из тела. Если записи в кэше нет, а клиент
+    # пришёл с If-None-Match, хватает запроса версии: 304 без загрузки и сериализации.
+    # Пустое тело в CachedResponse означает именно такой ответ — совпадение ETag
+    # view (?fields=/?include=) входит в ключ кэша; ETag от него не зависит — это разные URL
+    async def get_json(
+        self, product_id: int, if_none_match: Optional[str] = None, view: Optional[ProductView] = None
+    ) -> CachedResponse:
+        key = ("product", product_id) if view is None else ("product", product_id, view)
+        version = product_cache.product_version(product_id)
+        cached = product_cache.get(key, version)
+        if cached is not None:
+            return cached
+
+        stamp = (await catalog.get(self.db)).stamp
+        if if_none_match:
+            row_version = await self.product_repository.get_version(product_id)
+            if row_version is not None:
+                etag = product_etag(product_id, row_version, stamp)
+                if etag_matches(if_none_match, etag):
+                    return CachedResponse(body=b"", etag=etag)
+
+        product = await self.product_repository.get_by_id(product_id, view)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        body = dump_product(product, view)
+        return product_cache.put(key, version, body, etag=product_etag(product.id, product.version, stamp))
+
+    async def list_json(
+        self, if_none_match: Optional[str] = None, view: Optional[ProductView] = None, in_stock: Optional[bool] = None
+    ) -> CachedResponse:
+        return await self._cached_list(("list", "all", view, in_stock), None, if_none_match, view, in_stock)
+
+    async def get_by_category_slug_json(
+        self,
+        slug: str,
+        if_none_match: Optional[str] = None,
+        view: Optional[ProductView] = None,
+        in_stock: Optional[bool] = None,
+    ) -> CachedResponse:
+        category = (await catalog.get(self.db)).category_by_slug.get(slug)
+        if not category:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return await self._cached_list(
+            ("list", "category", slug, view, in_stock), category.id, if_none_match, view, in_stock
+        )
+
+    async def _cached_list(
+        self,
+        key: tuple,
+        category_id: Optional[int],
+        if_none_match: Optional[str],
+        view: Optional[ProductView],
+        in_stock: Optional[bool] = None,
+    ) -> CachedResponse:
+        version = product_cache.list_version()
+        cached = product_cache.get(key, version)
+        if cached is not None:
+            return cached
+
+        stamp = (await catalog.get(self.db)).stamp
+        if if_none_match:
+            count, max_version = await self.product_repository.get_list_version(category_id, in_stock)
+            etag = product_list_etag(count, max_version, stamp)
+            if etag_matches(if_none_match, etag):
+                return CachedResponse(body=b"", etag=etag)
+
+        if view is not None and not view.include:
+            # без связей хватает кортежей строк: ни ORM-объектов, ни моделей pydantic
+            products = await self.product_repository.get_rows(view, category_id, in_stock)
+            body = dump_product_rows(products, view)
+        elif category_id is None:
+            products = await self.product_repository.get_all(view, in_stock)
+            body = dump_products(products, view)
+        else:
+            products = await self.product_repository.get_by_category_id(category_id, view, in_stock)
+            body = dump_products(products, view)
+        etag = product_list_etag(len(products), max((p.version for p in products), default=0), stamp)
+        return product_cache.put(key, version, body, etag=etag)
+
+    async def get_many(self, product_ids: List[int]) -> List[Product]:
+        """Products for the given ids in request order; unknown ids are skipped."""
+        # лимит — на различные id: повторы в запросе ничего не стоят
+        unique_ids = list(dict.fromkeys(product_ids))
+        if len(unique_ids) > MAX_BATCH_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_BATCH_IDS} ids per request",
+            )
+        products = {p.id: p for p in await self.product_repository.get_many(unique_ids)}
+        return [products[pid] for pid in unique_ids if pid in products]
+
+    async def check_stock(self, items: List[StockChangeItem]) -> List[dict]:
+        """Availability and current price for many items in one query."""
+        found = await self.ps_repo.check_many([(i.product_id, i.size_id) for i in items])
+        results = []
+        for i in items:
+            row = found.get((i.product_id, i.size_id), {})
+            available = row.get("available", 0)
+            results.append({
+                "product_id": i.product_id,
+                "size_id": i.size_id,
+                "quantity": i.quantity,
+                "product_exists": row.get("product_exists", False),
+                "size_exists": row.get("size_exists", False),
+                "available": available,
+                "in_stock": row.get("size_exists", False) and available >= i.quantity,
+                "price": row.get("price"),
+            })
+        return results
+
+    async def bulk_update(self, data: BulkUpdateRequest) -> dict:
+        """Apply stock levels and prices pushed by a warehouse sync.
+
+        Each chunk is a single set-based UPDATE; the whole batch is one
+        transaction, so caches and other replicas are invalidated once.
+        """
+        stock = fold_changes(((c.product_id, c.size_id), c.quantity, c.mode) for c in data.stock)
+        prices = fold_changes((c.product_id, c.price, c.mode) for c in data.prices)
+
+        result = {"stock_updated": 0, "prices_updated": 0, "skipped": []}
+        # все затронутые товары блокируются заранее и по порядку id: иначе цена товара
+        # из первого чанка остатков бралась бы после блокировок последнего
+        await lock_products(self.db, [pid for pid, _ in stock] + list(prices))
+        # общий порядок ключей по всем чанкам — блокировки берутся в одном порядке
+        stock_rows = [(pid, sid, value, is_delta) for (pid, sid), (value, is_delta) in sorted(stock.items())]
+        for i in range(0, len(stock_rows), BULK_CHUNK_SIZE):
+            updated, skipped = await self.ps_repo.apply_stock_levels(stock_rows[i:i + BULK_CHUNK_SIZE])
+            result["stock_updated"] += updated
+            result["skipped"] += skipped
+        price_rows = [(pid, value, is_delta) for pid, (value, is_delta) in sorted(prices.items())]
+        for i in range(0, len(price_rows), BULK_CHUNK_SIZE):
+            updated, skipped = await self.product_repository.apply_prices(price_rows[i:i + BULK_CHUNK_SIZE])
+            result["prices_updated"] += updated
+            result["skipped"] += skipped
+        await self.db.commit()
+        return result
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        category_id: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+    ) -> dict:
+        """One page of ranked search results plus the cursor for the next page."""
+        rows = await self.product_repository.search(
+            query,
+            limit=min(limit, MAX_SEARCH_LIMIT) + 1,
+            category_id=category_id,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            after=decode_search_cursor(cursor) if cursor else None,
+        )
+        page = rows[:min(limit, MAX_SEARCH_LIMIT)]
+        next_cursor = None
+        if len(rows) > len(page):
+            product, score = page[-1]
+            next_cursor = encode_search_cursor(score, product.id)
+        return {"items": [product for product, _ in page], "next_cursor": next_cursor}
+
+    async def suggest(self, prefix: str, limit: int = 10) -> List[Entry]:
+        """Autocomplete from the in-process prefix index; no DB query once it is built."""
+        if not suggest_index.is_built:
+            await suggest_index.build_from_db(self.db)
+        suggest_index.sync_categories(await catalog.get(self.db))
+        return suggest_index.suggest(prefix, limit)
+
+    async def get_category_facets(self, slug: str) -> CategoryFacetsResponse:
+        """Precomputed counts for a category page; no query beyond the catalog snapshot."""
+        snapshot = await catalog.get(self.db)
+        category = snapshot.category_by_slug.get(slug)
+        if not category:
+            raise HTTPException(status_code=404, detail="Category not found")
+        facets = facet_index.get(category.id)
+        bounds = (None, *PRICE_BUCKETS, None)
+        return CategoryFacetsResponse(
+            category_id=category.id,
+            active=facets.active,
+            in_stock=facets.in_stock,
+            # порядок размеров — как в справочнике; удалённые размеры пропускаются
+            sizes=[
+                SizeFacet(size_id=size.id, value=size.value, count=facets.sizes[size.id])
+                for size in snapshot.sizes
+                if facets.sizes.get(size.id)
+            ],
+            prices=[
+                PriceFacet(min=bounds[i], max=bounds[i + 1], count=count)
+                for i, count in enumerate(facets.prices)
+            ],
+            refreshed_at=(
+                datetime.fromtimestamp(facet_index.refreshed_at, timezone.utc) if facet_index.refreshed_at else None
+            ),
+        )
+
     async def get_by_category_slug(self, slug: str):
-        category = await self.category_repository.get_by_slug(slug)
+        # slug -> id из снимка каталога, без отдельного запроса к categories
+        category = (await catalog.get(self.db)).category_by_slug.get(slug)
         if not category:
             raise HTTPException(status_code=404, detail="Category not found")
-        return await self.product_repository.get_by_category_slug(category.slug)
+        return await self.product_repository.get_by_category_id(category.id)
 
     async def create(self, data: ProductCreate) -> Product:
         # проверяем категорию
@@ -73,3 +351,15 @@ class ProductService:
         # Коммит удаления
         await self.db.commit()
         return {"detail": "Product deleted"}
+
+
+def encode_search_cursor(score: float, product_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, product_id]).encode()).decode()
+
+
+def decode_search_cursor(cursor: str):
+    try:
+        score, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(product_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
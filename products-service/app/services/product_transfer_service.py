@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator, Dict
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.catalog import CatalogSnapshot, catalog
+from app.repositories.product_transfer_repository import ProductTransferRepository
+from app.schemas.product import ProductCreate
+
+IMPORT_CHUNK_SIZE = 500
+EXPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+# защита от строки без переводов строк на весь запрос
+MAX_LINE_BYTES = 1024 * 1024
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+CSV_COLUMNS = ["id", "name", "price", "description", "category_id", "is_active", "sizes"]
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without reading it whole."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"Line longer than {MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield buffer
+
+
+class ProductTransferService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = ProductTransferRepository(db)
+
+    def _validate(self, line: bytes, snapshot: CatalogSnapshot) -> ProductCreate:
+        row = ProductCreate.model_validate_json(line)
+        if row.category_id not in snapshot.category_by_id:
+            raise ValueError(f"Category {row.category_id} does not exist")
+        unknown = sorted({s.size_id for s in row.sizes or []} - set(snapshot.size_by_id))
+        if unknown:
+            raise ValueError(f"Sizes {unknown} do not exist")
+        return row
+
+    async def import_ndjson(self, chunks: AsyncIterable[bytes], chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+        """Validate and merge an NDJSON stream of products, one transaction per chunk.
+
+        Memory is bounded by ``chunk_size``: rows are merged and committed as
+        soon as a chunk fills up. A later failing chunk does not roll back
+        chunks that were already committed.
+        """
+        report = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0, "errors": []}
+        snapshot = await catalog.get(self.db)
+        # повтор имени внутри чанка — побеждает последняя строка
+        pending: Dict[str, ProductCreate] = {}
+
+        async def flush() -> None:
+            result = await self.repo.merge(list(pending.values()))
+            await self.db.commit()
+            report["created"] += len(result.created)
+            report["updated"] += len(result.updated)
+            report["unchanged"] += result.unchanged
+            pending.clear()
+
+        line_no = 0
+        async for line in iter_lines(chunks):
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                row = self._validate(line, snapshot)
+            except (ValidationError, ValueError) as e:
+                report["failed"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    detail = e.errors(include_url=False, include_input=False) if isinstance(e, ValidationError) else str(e)
+                    report["errors"].append({"line": line_no, "detail": detail})
+                continue
+            pending.pop(row.name, None)
+            pending[row.name] = row
+            if len(pending) >= chunk_size:
+                await flush()
+        if pending:
+            await flush()
+        return report
+
+    async def export(self, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[str]:
+        """Stream the catalog as NDJSON or CSV, one output chunk per cursor batch."""
+        if fmt == "csv":
+            yield ",".join(CSV_COLUMNS) + "\r\n"
+        async for batch in self.repo.stream_export(batch_size):
+            if fmt == "csv":
+                out = io.StringIO()
+                writer = csv.writer(out)
+                for row in batch:
+                    sizes = ";".join(f"{s['size_id']}:{s['quantity']}" for s in row["sizes"])
+                    writer.writerow([*(row[c] for c in CSV_COLUMNS[:-1]), sizes])
+                yield out.getvalue()
+            else:
+                yield "".join(json.dumps(dict(row), ensure_ascii=False) + "\n" for row in batch)
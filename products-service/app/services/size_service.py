@@ -2,6 +2,7 @@ from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
+from ..core.catalog import catalog, SizeRow
 from ..repositories.size_repository import SizeRepository
 from ..schemas.size import SizeCreate, SizeUpdate
 from ..models.size import Size
@@ -9,13 +10,18 @@ from ..models.size import Size
 
 class SizeService:
     def __init__(self, db: AsyncSession):
+        self.db = db
         self.repo = SizeRepository(db)
 
-    async def list(self) -> List[Size]:
-        return await self.repo.get_all()
+    # чтение идёт из снимка каталога в памяти, запись — в БД с инвалидацией снимка
+    async def list(self) -> List[SizeRow]:
+        return list((await catalog.get(self.db)).sizes)
 
-    async def get(self, size_id: int) -> Optional[Size]:
-        return await self.repo.get_by_id(size_id)
+    async def list_etag(self) -> str:
+        return (await catalog.get(self.db)).sizes_etag
+
+    async def get(self, size_id: int) -> Optional[SizeRow]:
+        return (await catalog.get(self.db)).size_by_id.get(size_id)
 
     async def get_by_value(self, value: str) -> Optional[Size]:
         return await self.repo.get_by_value(value)
@@ -25,9 +31,11 @@ class SizeService:
         if existing:
             raise ValueError(f"Size '{data.value}' already exists")
         try:
-            return await self.repo.create(data)
+            size = await self.repo.create(data)
         except IntegrityError as e:
             raise ValueError("Database integrity error when creating size") from e
+        catalog.invalidate()
+        return size
 
     async def update(self, size_id: int, data: SizeUpdate) -> Size:
         size = await self.repo.get_by_id(size_id)
@@ -41,12 +49,15 @@ class SizeService:
                 raise ValueError(f"Another size with value '{dd['value']}' already exists")
 
         try:
-            return await self.repo.update(size_id, dd)
+            size = await self.repo.update(size_id, dd)
         except IntegrityError as e:
             await self.db.rollback()
             raise ValueError("Database integrity error when updating size") from e
+        catalog.invalidate()
+        return size
 
     async def delete(self, size_id: int) -> None:
         ok = await self.repo.delete(size_id)
         if not ok:
-            raise ValueError("Size not found or could not be deleted")
\ No newline at end of file
+            raise ValueError("Size not found or could not be deleted")
+        catalog.invalidate()
\ No newline at end of file
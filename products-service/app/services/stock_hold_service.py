@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.stock_hold import StockHold, HOLD_CONFIRMED, HOLD_CANCELLED, HOLD_EXPIRED
+from app.repositories.product_size_repository import ProductSizeRepository
+from app.repositories.stock_hold_repository import StockHoldRepository
+from app.schemas.stock import StockHoldCreate
+
+logger = logging.getLogger(__name__)
+
+
+class StockHoldService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = StockHoldRepository(db)
+        self.ps_repo = ProductSizeRepository(db)
+
+    async def get(self, hold_id: str) -> StockHold:
+        hold = await self.repo.get_by_id(hold_id)
+        if not hold:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hold not found")
+        return hold
+
+    async def create(self, data: StockHoldCreate) -> StockHold:
+        """Decrement stock and record the hold in one transaction."""
+        items = [i.model_dump() for i in data.items]
+        ttl = data.ttl_seconds or settings.stock_hold_ttl
+        hold_id = str(uuid.uuid4())
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+
+        await self.ps_repo.reserve_many(items)
+        await self.repo.create(hold_id, items, expires_at)
+        await self.db.commit()
+        return await self.repo.get_by_id(hold_id)
+
+    async def confirm(self, hold_id: str) -> StockHold:
+        """Keep the held stock for good. Repeated calls return the same hold."""
+        confirmed = await self.repo.confirm(hold_id, datetime.now(timezone.utc))
+        await self.db.commit()
+        hold = await self.get(hold_id)
+        if confirmed or hold.status == HOLD_CONFIRMED:
+            return hold
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Hold is {hold.status}")
+
+    async def cancel(self, hold_id: str) -> StockHold:
+        """Give the held stock back. Repeated calls return the same hold."""
+        await self.ps_repo.release_many([hold_id], HOLD_CANCELLED)
+        await self.db.commit()
+        hold = await self.get(hold_id)
+        if hold.status == HOLD_CONFIRMED:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Hold is already confirmed")
+        return hold
+
+    async def expire_due(self, limit: int) -> List[str]:
+        """Release one batch of overdue holds. Returns ids that were expired."""
+        ids = await self.repo.lock_expired_ids(datetime.now(timezone.utc), limit)
+        released = await self.ps_repo.release_many(ids, HOLD_EXPIRED)
+        await self.db.commit()
+        return released
+
+
+async def run_hold_sweeper(interval: Optional[float] = None, batch_size: Optional[int] = None) -> None:
+    """Background loop that expires overdue holds in batches."""
+    interval = interval or settings.hold_sweep_interval
+    batch_size = batch_size or settings.hold_sweep_batch_size
+    while True:
+        try:
+            while True:
+                async with AsyncSessionLocal() as session:
+                    released = await StockHoldService(session).expire_due(batch_size)
+                if released:
+                    logger.info("Expired %d stock holds", len(released))
+                if len(released) < batch_size:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Stock hold sweep failed")
+        await asyncio.sleep(interval)
@@ -12,7 +12,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 from app.core.database import Base 
-from app.models import category, size, product, product_size, product_image
+from app.models import category, size, product, product_size, product_image, stock_hold, cache_version, outbox_event
 from app.core.config import settings  
 
 target_metadata = Base.metadata
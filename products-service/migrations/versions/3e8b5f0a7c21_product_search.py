@@ -0,0 +1,46 @@
+"""product search
+
+Revision ID: 3e8b5f0a7c21
+Revises: 9a4f2c71d5e8
+Create Date: 2026-10-19 16:24:05.117302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8b5f0a7c21'
+down_revision: Union[str, None] = '9a4f2c71d5e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('products', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    # та же формула, что и search_vector_expr() в ProductRepository (SEARCH_TEXT_CONFIG=simple)
+    op.execute("""
+        UPDATE products SET search_vector =
+            setweight(to_tsvector('simple', name), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    """)
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_search_vector', 'products', ['search_vector'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_products_name_trgm', 'products', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_name_trgm', table_name='products',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_products_search_vector', table_name='products',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('products', 'search_vector')
@@ -0,0 +1,48 @@
+"""image variants
+
+Revision ID: 5c7d9e1f2a4b
+Revises: 3e8b5f0a7c21
+Create Date: 2026-10-19 18:02:15.318840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7d9e1f2a4b'
+down_revision: Union[str, None] = '3e8b5f0a7c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # существующие изображения получают статус pending — воркер сам сгенерирует им варианты
+    op.add_column('product_images', sa.Column('variants_status', sa.String(length=16), server_default='pending', nullable=False))
+    op.add_column('product_images', sa.Column('variants_attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('product_images', sa.Column('variants_retry_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('product_images', sa.Column('variants_error', sa.Text(), nullable=True))
+    op.create_index('ix_product_images_variants_due', 'product_images', ['variants_retry_at'], unique=False,
+                    postgresql_where=sa.text("variants_status IN ('pending', 'processing')"))
+    op.create_table('product_image_variants',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('image_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.Column('file_name', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['image_id'], ['product_images.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('image_id', 'name', name='uq_product_image_variants_image_id_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('product_image_variants')
+    op.drop_index('ix_product_images_variants_due', table_name='product_images',
+                  postgresql_where=sa.text("variants_status IN ('pending', 'processing')"))
+    op.drop_column('product_images', 'variants_error')
+    op.drop_column('product_images', 'variants_retry_at')
+    op.drop_column('product_images', 'variants_attempts')
+    op.drop_column('product_images', 'variants_status')
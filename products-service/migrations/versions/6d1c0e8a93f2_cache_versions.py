@@ -0,0 +1,29 @@
+"""cache versions
+
+Revision ID: 6d1c0e8a93f2
+Revises: b24507c3b4dd
+Create Date: 2026-10-19 14:02:17.530418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '6d1c0e8a93f2'
+down_revision: Union[str, None] = 'b24507c3b4dd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('cache_versions',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('cache_versions')
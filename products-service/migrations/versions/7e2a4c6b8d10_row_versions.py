@@ -0,0 +1,64 @@
+"""row versions for conditional GET
+
+Revision ID: 7e2a4c6b8d10
+Revises: 5c7d9e1f2a4b
+Create Date: 2026-10-19 20:41:07.512394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2a4c6b8d10'
+down_revision: Union[str, None] = '5c7d9e1f2a4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('products', 'categories', 'sizes')
+BACKFILL_BATCH = 10000
+VERSION_DEFAULT = sa.text("nextval('catalog_version_seq')")
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('catalog_version_seq')))
+    # Индексов по version/updated_at нет намеренно: их обновление на каждом изменении
+    # остатков остаётся HOT-апдейтом
+    for table in TABLES:
+        # колонка без default не переписывает таблицу; default ставится отдельно —
+        # nextval волатилен и при ADD COLUMN заполнял бы все строки под эксклюзивной блокировкой
+        op.add_column(table, sa.Column('version', sa.BigInteger(), nullable=True))
+        op.alter_column(table, 'version', server_default=VERSION_DEFAULT)
+        # now() стабилен — значение по умолчанию пишется в каталог, без перезаписи
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+    # старые строки — пачками, каждая в своей транзакции
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            _backfill_versions(table)
+
+    for table in TABLES:
+        # NOT NULL через проверенный CHECK: проверка идёт без эксклюзивной блокировки,
+        # SET NOT NULL затем использует её вместо полного скана
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT ck_{table}_version_not_null CHECK (version IS NOT NULL) NOT VALID')
+        op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT ck_{table}_version_not_null')
+        op.alter_column(table, 'version', nullable=False)
+        op.drop_constraint(f'ck_{table}_version_not_null', table, type_='check')
+
+
+def _backfill_versions(table: str) -> None:
+    backfill = sa.text(
+        f"UPDATE {table} SET version = nextval('catalog_version_seq') "
+        f"WHERE id IN (SELECT id FROM {table} WHERE version IS NULL LIMIT {BACKFILL_BATCH})"
+    )
+    bind = op.get_bind()
+    while bind.execute(backfill).rowcount:
+        pass
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
+    op.execute(sa.schema.DropSequence(sa.Sequence('catalog_version_seq')))
@@ -0,0 +1,52 @@
+"""category facets materialized view
+
+Revision ID: 8b3d5f7a9c12
+Revises: 7e2a4c6b8d10
+Create Date: 2026-10-19 22:07:43.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3d5f7a9c12'
+down_revision: Union[str, None] = '7e2a4c6b8d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# границы ценовых корзин совпадают с app.core.facets.PRICE_BUCKETS;
+# при их смене view пересоздаётся новой миграцией
+PRICE_BUCKETS = '{25,50,100,200}'
+
+
+def upgrade() -> None:
+    # одна строка на (категория, фасет, ключ): active и in_stock без ключа,
+    # size — id размера, price — номер корзины width_bucket (0 — дешевле первой границы)
+    op.execute(f"""
+        CREATE MATERIALIZED VIEW category_facets AS
+        WITH active AS (
+            SELECT id, category_id, price FROM products WHERE is_active AND category_id IS NOT NULL
+        ), stocked AS (
+            SELECT a.id, a.category_id, ps.size_id
+            FROM active a JOIN product_sizes ps ON ps.product_id = a.id
+            WHERE ps.quantity > 0
+        )
+        SELECT category_id, 'active'::text AS facet, ''::text AS key, count(*) AS count
+        FROM active GROUP BY category_id
+        UNION ALL
+        SELECT category_id, 'in_stock', '', count(DISTINCT id)
+        FROM stocked GROUP BY category_id
+        UNION ALL
+        SELECT category_id, 'size', size_id::text, count(*)
+        FROM stocked GROUP BY category_id, size_id
+        UNION ALL
+        SELECT category_id, 'price', width_bucket(price, '{PRICE_BUCKETS}'::float8[])::text, count(*)
+        FROM active GROUP BY 1, 3
+    """)
+    # уникальный индекс обязателен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute("CREATE UNIQUE INDEX ux_category_facets ON category_facets (category_id, facet, key)")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW category_facets")
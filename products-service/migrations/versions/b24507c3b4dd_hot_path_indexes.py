@@ -0,0 +1,62 @@
+"""hot path indexes
+
+Revision ID: b24507c3b4dd
+Revises: fe5fedbf50e6
+Create Date: 2026-10-19 11:03:17.550921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b24507c3b4dd'
+down_revision: Union[str, None] = 'fe5fedbf50e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Схлопываем дубли (product_id, size_id) до построения уникального индекса:
+    # остатки суммируются в строку с минимальным id.
+    op.execute("""
+        WITH dups AS (
+            SELECT product_id, size_id, min(id) AS keep_id, sum(quantity) AS total
+            FROM product_sizes
+            GROUP BY product_id, size_id
+            HAVING count(*) > 1
+        ),
+        merged AS (
+            UPDATE product_sizes ps SET quantity = dups.total
+            FROM dups WHERE ps.id = dups.keep_id
+        )
+        DELETE FROM product_sizes ps
+        USING dups
+        WHERE ps.product_id = dups.product_id
+          AND ps.size_id = dups.size_id
+          AND ps.id <> dups.keep_id
+    """)
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('uq_product_sizes_product_id_size_id', 'product_sizes', ['product_id', 'size_id'],
+                        unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_products_category_id'), 'products', ['category_id'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_product_images_product_id'), 'product_images', ['product_id'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+    # attaching a ready unique index as a constraint only takes a short lock
+    op.execute(
+        "ALTER TABLE product_sizes ADD CONSTRAINT uq_product_sizes_product_id_size_id "
+        "UNIQUE USING INDEX uq_product_sizes_product_id_size_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_product_sizes_product_id_size_id', 'product_sizes', type_='unique')
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_product_images_product_id'), table_name='product_images',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_products_category_id'), table_name='products',
+                      postgresql_concurrently=True, if_exists=True)
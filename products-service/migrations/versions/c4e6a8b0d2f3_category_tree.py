@@ -0,0 +1,79 @@
+"""category tree with closure table
+
+Revision ID: c4e6a8b0d2f3
+Revises: a1c3e5f7b9d2
+Create Date: 2026-10-20 00:02:51.308617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e6a8b0d2f3'
+down_revision: Union[str, None] = 'a1c3e5f7b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRICE_BUCKETS = '{25,50,100,200}'
+
+
+def _create_facets(active: str) -> None:
+    # active — активные товары как (id, category_id, price), по ним считаются фасеты
+    op.execute(f"""
+        CREATE MATERIALIZED VIEW category_facets AS
+        WITH active AS ({active}), stocked AS (
+            SELECT a.id, a.category_id, ps.size_id
+            FROM active a JOIN product_sizes ps ON ps.product_id = a.id
+            WHERE ps.quantity > 0
+        )
+        SELECT category_id, 'active'::text AS facet, ''::text AS key, count(*) AS count
+        FROM active GROUP BY category_id
+        UNION ALL
+        SELECT category_id, 'in_stock', '', count(DISTINCT id)
+        FROM stocked GROUP BY category_id
+        UNION ALL
+        SELECT category_id, 'size', size_id::text, count(*)
+        FROM stocked GROUP BY category_id, size_id
+        UNION ALL
+        SELECT category_id, 'price', width_bucket(price, '{PRICE_BUCKETS}'::float8[])::text, count(*)
+        FROM active GROUP BY 1, 3
+    """)
+    op.execute("CREATE UNIQUE INDEX ux_category_facets ON category_facets (category_id, facet, key)")
+
+
+def upgrade() -> None:
+    op.add_column('categories', sa.Column('parent_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('categories_parent_id_fkey', 'categories', 'categories', ['parent_id'], ['id'])
+    op.create_index(op.f('ix_categories_parent_id'), 'categories', ['parent_id'], unique=False)
+
+    op.create_table('category_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index(op.f('ix_category_closure_descendant_id'), 'category_closure', ['descendant_id'], unique=False)
+    # существующие категории плоские — у каждой только путь к самой себе
+    op.execute("INSERT INTO category_closure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM categories")
+
+    # фасеты родителя включают товары всех подкатегорий
+    op.execute("DROP MATERIALIZED VIEW category_facets")
+    _create_facets(
+        "SELECT p.id, cc.ancestor_id AS category_id, p.price"
+        " FROM products p JOIN category_closure cc ON cc.descendant_id = p.category_id"
+        " WHERE p.is_active"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW category_facets")
+    _create_facets("SELECT id, category_id, price FROM products WHERE is_active AND category_id IS NOT NULL")
+    op.drop_index(op.f('ix_category_closure_descendant_id'), table_name='category_closure')
+    op.drop_table('category_closure')
+    op.drop_index(op.f('ix_categories_parent_id'), table_name='categories')
+    op.drop_constraint('categories_parent_id_fkey', 'categories', type_='foreignkey')
+    op.drop_column('categories', 'parent_id')
@@ -0,0 +1,34 @@
+"""partial indexes for active and in-stock products
+
+Revision ID: d5f7b9c1e3a4
+Revises: c4e6a8b0d2f3
+Create Date: 2026-10-20 01:12:36.904518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f7b9c1e3a4'
+down_revision: Union[str, None] = 'c4e6a8b0d2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_active_category_id', 'products', ['category_id'], unique=False,
+                        postgresql_where=sa.text('is_active'), postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_product_sizes_in_stock', 'product_sizes', ['product_id'], unique=False,
+                        postgresql_where=sa.text('quantity > 0'), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_product_sizes_in_stock', table_name='product_sizes',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_products_active_category_id', table_name='products',
+                      postgresql_concurrently=True, if_exists=True)
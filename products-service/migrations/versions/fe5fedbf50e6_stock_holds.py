@@ -0,0 +1,47 @@
+"""stock holds
+
+Revision ID: fe5fedbf50e6
+Revises: 4252b908a44d
+Create Date: 2026-10-19 10:12:41.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import func
+
+# revision identifiers, used by Alembic.
+revision: str = 'fe5fedbf50e6'
+down_revision: Union[str, None] = '4252b908a44d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stock_holds',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_holds_active_expires_at', 'stock_holds', ['expires_at'], unique=False,
+                    postgresql_where=sa.text("status = 'active'"))
+    op.create_table('stock_hold_items',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('hold_id', sa.String(length=36), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('size_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['hold_id'], ['stock_holds.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stock_hold_items_hold_id'), 'stock_hold_items', ['hold_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_stock_hold_items_hold_id'), table_name='stock_hold_items')
+    op.drop_table('stock_hold_items')
+    op.drop_index('ix_stock_holds_active_expires_at', table_name='stock_holds')
+    op.drop_table('stock_holds')
@@ -0,0 +1,54 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.core.catalog import CatalogCache
+
+
+def rows():
+    categories = [SimpleNamespace(id=1, name="Shoes", slug="shoes", version=1, parent_id=None)]
+    sizes = [SimpleNamespace(id=2, value="M", version=2)]
+    return categories, sizes
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_reused_until_invalidated():
+    cache = CatalogCache(ttl=60)
+    categories, sizes = rows()
+
+    with patch("app.core.catalog.CategoryRepository") as cat_repo, \
+            patch("app.core.catalog.SizeRepository") as size_repo:
+        cat_repo.return_value.get_all = AsyncMock(return_value=categories)
+        size_repo.return_value.get_all = AsyncMock(return_value=sizes)
+
+        first = await cache.get(db=None)
+        second = await cache.get(db=None)
+        # Повторное чтение не ходит в БД
+        assert first is second
+        assert cat_repo.return_value.get_all.await_count == 1
+
+        assert first.category_by_slug["shoes"].id == 1
+        assert first.size_by_id[2].value == "M"
+
+        # После инвалидации снимок перечитывается целиком
+        cache.invalidate()
+        third = await cache.get(db=None)
+        assert third is not first
+        assert third.version == cache.version
+        assert cat_repo.return_value.get_all.await_count == 2
+        assert size_repo.return_value.get_all.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_snapshot_expires_after_ttl():
+    cache = CatalogCache(ttl=0)
+    categories, sizes = rows()
+
+    with patch("app.core.catalog.CategoryRepository") as cat_repo, \
+            patch("app.core.catalog.SizeRepository") as size_repo:
+        cat_repo.return_value.get_all = AsyncMock(return_value=categories)
+        size_repo.return_value.get_all = AsyncMock(return_value=sizes)
+
+        await cache.get(db=None)
+        await cache.get(db=None)
+        assert cat_repo.return_value.get_all.await_count == 2
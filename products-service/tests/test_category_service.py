@@ -1,7 +1,9 @@
 import pytest
+from types import SimpleNamespace
 from unittest.mock import AsyncMock
+from app.core.catalog import catalog
 from app.services.category_service import CategoryService
-from app.schemas.category import CategoryCreate
+from app.schemas.category import CategoryCreate, CategoryUpdate
 
 @pytest.mark.asyncio
 async def test_create_category_success():
@@ -32,3 +34,47 @@ async def test_create_category_duplicate_slug():
     with pytest.raises(ValueError) as e:
         await service.create(data)
     assert "already exists" in str(e.value)
+
+
+@pytest.mark.asyncio
+async def test_tree_is_built_from_snapshot():
+    catalog.load(categories=[
+        SimpleNamespace(id=3, name="Sneakers", slug="sneakers", version=1, parent_id=1),
+        SimpleNamespace(id=1, name="Shoes", slug="shoes", version=1, parent_id=None),
+        SimpleNamespace(id=2, name="Bags", slug="bags", version=1, parent_id=None),
+        SimpleNamespace(id=4, name="Boots", slug="boots", version=1, parent_id=1),
+    ], sizes=[])
+    tree = await CategoryService(db=None).tree()
+
+    assert [node.slug for node in tree] == ["shoes", "bags"]
+    assert [child.slug for child in tree[0].children] == ["sneakers", "boots"]
+    assert tree[1].children == []
+
+
+@pytest.mark.asyncio
+async def test_move_under_own_subtree_is_rejected():
+    mock_repo = AsyncMock()
+    mock_repo.get_by_id.return_value = {"id": 1}
+    mock_repo.is_in_subtree.return_value = True
+    service = CategoryService(db=None)
+    service.repo = mock_repo
+
+    with pytest.raises(ValueError) as e:
+        await service.update(1, CategoryUpdate(parent_id=3))
+    assert "under itself" in str(e.value)
+    # проверка идёт под блокировкой дерева
+    mock_repo.lock_tree.assert_awaited_once()
+    mock_repo.is_in_subtree.assert_awaited_once_with(3, 1)
+    mock_repo.update.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_delete_with_subcategories_is_rejected():
+    mock_repo = AsyncMock()
+    mock_repo.has_children.return_value = True
+    service = CategoryService(db=None)
+    service.repo = mock_repo
+
+    with pytest.raises(ValueError):
+        await service.delete(1)
+    mock_repo.delete.assert_not_awaited()
@@ -0,0 +1,39 @@
+from unittest.mock import patch
+
+from app.core.consistency import PRIMARY_TOKEN, ReplicaMonitor, parse_lsn, token_for_scope
+
+
+def test_token_is_picked_by_scope():
+    assert token_for_scope("cart:0/3A1, products:16/B374D848") == "16/B374D848"
+    assert token_for_scope("cart:0/3A1") is None
+    assert token_for_scope("primary") == PRIMARY_TOKEN
+    assert token_for_scope(None) is None
+    assert parse_lsn("16/B374D848") == 0x16B374D848
+
+
+def test_replica_serves_only_caught_up_fresh_reads():
+    monitor = ReplicaMonitor(max_lag=5, poll_interval=1)
+    # замеров ещё не было
+    assert not monitor.can_serve(None)
+
+    monitor.observe(parse_lsn("0/2000"), lag=0.2)
+    assert monitor.can_serve(None)
+    assert monitor.can_serve("0/2000")
+    # реплика ещё не применила запись клиента
+    assert not monitor.can_serve("0/2001")
+    assert not monitor.can_serve(PRIMARY_TOKEN)
+    assert not monitor.can_serve("garbage")
+
+    monitor.observe(parse_lsn("0/3000"), lag=30)
+    assert not monitor.can_serve(None)
+
+
+def test_stale_sample_falls_back_to_primary():
+    monitor = ReplicaMonitor(max_lag=5, poll_interval=1)
+    with patch("app.core.consistency.time.monotonic", return_value=100.0):
+        monitor.observe(parse_lsn("0/2000"), lag=0)
+    with patch("app.core.consistency.time.monotonic", return_value=102.0):
+        assert monitor.can_serve(None)
+    # опрос реплики падает несколько интервалов подряд
+    with patch("app.core.consistency.time.monotonic", return_value=104.0):
+        assert not monitor.can_serve(None)
@@ -0,0 +1,70 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+
+from app.core.catalog import catalog
+from app.core.facets import FacetIndex, facet_index
+from app.services.product_service import ProductService
+
+ROWS = [
+    (7, "active", "", 5),
+    (7, "in_stock", "", 4),
+    (7, "size", "2", 3),
+    (7, "size", "1", 4),
+    (7, "price", "0", 1),
+    (7, "price", "2", 4),
+]
+
+
+def test_load_and_get():
+    index = FacetIndex(max_age=600)
+    index.load(ROWS)
+    facets = index.get(7)
+    assert (facets.active, facets.in_stock) == (5, 4)
+    assert facets.sizes == {1: 4, 2: 3}
+    assert facets.prices == (1, 0, 4, 0, 0)
+    # категория без активных товаров — нулевые счётчики, а не 404
+    assert index.get(8).active == 0
+
+
+@pytest.mark.asyncio
+async def test_refresh_runs_only_when_dirty():
+    index = FacetIndex(max_age=600)
+    session = AsyncMock()
+    session.execute.return_value = MagicMock(all=MagicMock(return_value=ROWS))
+
+    await index.refresh(session)
+    # при старте: REFRESH + чтение строк
+    assert session.execute.await_count == 2
+    session.commit.assert_awaited_once()
+
+    # без изменений только перечитываем view
+    await index.refresh(session)
+    assert session.execute.await_count == 3
+
+    index.mark_dirty({1})
+    await index.refresh(session)
+    assert session.execute.await_count == 5
+    assert index.get(7).in_stock == 4
+
+
+@pytest.mark.asyncio
+async def test_service_renders_facets_in_catalog_order():
+    catalog.load(
+        categories=[SimpleNamespace(id=7, name="Shoes", slug="shoes", version=1, parent_id=None)],
+        sizes=[SimpleNamespace(id=1, value="M", version=1), SimpleNamespace(id=2, value="L", version=1),
+               SimpleNamespace(id=3, value="XL", version=1)],
+    )
+    facet_index.load(ROWS)
+    service = ProductService(db=None)
+
+    res = await service.get_category_facets("shoes")
+    assert [(s.value, s.count) for s in res.sizes] == [("M", 4), ("L", 3)]
+    assert [(p.min, p.max, p.count) for p in res.prices][:3] == [(None, 25, 1), (25, 50, 0), (50, 100, 4)]
+    assert res.prices[-1].max is None
+
+    with pytest.raises(HTTPException) as e:
+        await service.get_category_facets("missing")
+    assert e.value.status_code == 404
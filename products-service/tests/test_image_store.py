@@ -0,0 +1,58 @@
+import io
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from app.core.image_store import ImageStore, ImageTooLarge, ImmutableStaticFiles, UnsupportedImage, sniff_extension
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+def upload(data: bytes, filename: str = "photo.png") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+@pytest.mark.asyncio
+async def test_same_content_is_stored_once(tmp_path):
+    store = ImageStore(tmp_path, max_bytes=1024)
+    first = await store.save(upload(PNG, "a.png"))
+    second = await store.save(upload(PNG, "renamed.jpg"))
+
+    assert first.created and not second.created
+    assert first.file_name == second.file_name
+    assert first.file_name == f"images/sha256/{first.digest[:2]}/{first.digest[2:4]}/{first.digest}.png"
+    assert store.path_for(first.digest, ".png").read_bytes() == PNG
+    # временные файлы не остаются
+    assert list((tmp_path / ".staging").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_rejects_unknown_type_and_oversized_files(tmp_path):
+    store = ImageStore(tmp_path, max_bytes=64)
+    with pytest.raises(UnsupportedImage):
+        await store.save(upload(b"<svg/>"))
+    with pytest.raises(ImageTooLarge):
+        await store.save(upload(PNG))
+    assert list((tmp_path / ".staging").iterdir()) == []
+
+
+def test_sniff_extension():
+    assert sniff_extension(b"\xff\xd8\xff\xe0") == ".jpg"
+    assert sniff_extension(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == ".webp"
+    assert sniff_extension(b"GIF89a") == ".gif"
+    assert sniff_extension(b"%PDF-1.7") is None
+
+
+@pytest.mark.asyncio
+async def test_staging_files_are_not_served(tmp_path):
+    (tmp_path / ".staging").mkdir()
+    (tmp_path / ".staging" / "upload").write_bytes(PNG)
+    (tmp_path / "ab").mkdir()
+    (tmp_path / "ab" / "photo.png").write_bytes(PNG)
+    files = ImmutableStaticFiles(directory=tmp_path)
+    scope = {"method": "GET", "headers": []}
+
+    assert (await files.get_response("ab/photo.png", scope)).status_code == 200
+    with pytest.raises(HTTPException) as e:
+        await files.get_response(".staging/upload", scope)
+    assert e.value.status_code == 404
@@ -0,0 +1,107 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.core.image_variants import render_variants
+from app.services.image_variant_service import ImageVariantWorker
+
+
+def test_render_variants_downscales_without_upscaling(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    source = tmp_path / "photo.png"
+    Image.new("RGB", (800, 400), "red").save(source)
+
+    specs = (("thumb", 160), ("medium", 480), ("large", 1200))
+    variants = {v["name"]: v for v in render_variants(str(source), str(tmp_path), specs)}
+
+    assert (variants["thumb"]["width"], variants["thumb"]["height"]) == (160, 80)
+    assert (variants["medium"]["width"], variants["medium"]["height"]) == (480, 240)
+    assert (variants["large"]["width"], variants["large"]["height"]) == (800, 400)
+    path = tmp_path / variants["thumb"]["file_name"].removeprefix("images/sha256/")
+    assert path.name == "thumb-160.webp"
+    with Image.open(path) as img:
+        assert img.format == "WEBP"
+
+    # повторный запуск не перезаписывает готовые файлы
+    mtime = path.stat().st_mtime_ns
+    render_variants(str(source), str(tmp_path), specs)
+    assert path.stat().st_mtime_ns == mtime
+
+
+def make_worker(max_attempts=3):
+    return ImageVariantWorker(
+        processes=1, max_in_flight=2, max_attempts=max_attempts, retry_delay=10, poll_interval=1, lease=60
+    )
+
+
+@asynccontextmanager
+async def fake_session():
+    yield AsyncMock()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("attempts, expect_retry", [(1, True), (3, False)])
+async def test_failed_job_is_retried_with_backoff_then_given_up(attempts, expect_retry):
+    worker = make_worker(max_attempts=3)
+    # None — стандартный пул потоков вместо процессов
+    worker._executor = lambda: None
+    repo = AsyncMock()
+    job = SimpleNamespace(id=7, product_id=1, file_name="images/x.png", variants_attempts=attempts)
+    with patch("app.services.image_variant_service.AsyncSessionLocal", fake_session), \
+            patch("app.services.image_variant_service.ProductImageRepository", return_value=repo), \
+            patch("app.services.image_variant_service.render_variants", side_effect=OSError("broken file")):
+        await worker._process(job)
+
+    image_id, error, retry_at = repo.fail_variants.await_args.args
+    assert image_id == 7 and "broken file" in error
+    if expect_retry:
+        assert (retry_at - datetime.now(timezone.utc)).total_seconds() == pytest.approx(10, abs=2)
+    else:
+        assert retry_at is None
+    repo.save_variants.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_broken_pool_is_replaced_for_next_job():
+    worker = make_worker()
+    broken = ThreadPoolExecutor(max_workers=1)
+    worker._pool = broken
+    repo = AsyncMock()
+    job = SimpleNamespace(id=7, product_id=1, file_name="images/x.png", variants_attempts=1)
+    with patch("app.services.image_variant_service.AsyncSessionLocal", fake_session), \
+            patch("app.services.image_variant_service.ProductImageRepository", return_value=repo), \
+            patch("app.services.image_variant_service.render_variants", side_effect=BrokenProcessPool("worker died")):
+        await worker._process(job)
+
+    # задание уходит на повтор, пул сброшен — следующий вызов создаст новый
+    assert repo.fail_variants.await_args.args[2] is not None
+    assert worker._pool is None
+    assert broken._shutdown
+
+    # задача старого пула, упавшая позже, не закрывает уже созданный новый пул
+    fresh = ThreadPoolExecutor(max_workers=1)
+    worker._pool = fresh
+    worker._discard_pool(broken)
+    assert worker._pool is fresh
+    fresh.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_fill_claims_only_free_slots():
+    worker = make_worker()
+    repo = AsyncMock()
+    repo.claim_for_variants.return_value = []
+    worker._in_flight = {object()}
+    with patch("app.services.image_variant_service.AsyncSessionLocal", fake_session), \
+            patch("app.services.image_variant_service.ProductImageRepository", return_value=repo):
+        await worker.fill()
+        assert repo.claim_for_variants.await_args.args[0] == 1
+
+        worker._in_flight = {object(), object()}
+        repo.reset_mock()
+        assert await worker.fill() == 0
+        repo.claim_for_variants.assert_not_awaited()
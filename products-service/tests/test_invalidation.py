@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy.dialects import postgresql
+
+from app.core import changes, invalidation
+from app.core.invalidation import InvalidationBus, REPLICA_ID
+
+
+def bus():
+    return InvalidationBus(dsn="postgresql://unused", channel="test")
+
+
+def test_newer_versions_evict_only_changed_products():
+    b = bus()
+    with patch("app.core.invalidation.product_cache") as cache, \
+            patch("app.core.invalidation.catalog") as catalog:
+        b.apply({"product:1": 3, "product:2": 1})
+        cache.invalidate_products.assert_called_once_with({1, 2})
+
+        # уже виденные версии повторно не сбрасываются
+        cache.reset_mock()
+        b.apply({"product:1": 3, "product:2": 2})
+        cache.invalidate_products.assert_called_once_with({2})
+        catalog.invalidate.assert_not_called()
+
+
+def test_catalog_change_invalidates_catalog():
+    b = bus()
+    with patch("app.core.invalidation.product_cache") as cache, \
+            patch("app.core.invalidation.catalog") as catalog:
+        b.apply({"catalog": 1, "product:5": 1})
+        catalog.invalidate.assert_called_once()
+        cache.invalidate_products.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_own_notifications_are_recorded_but_not_evicted():
+    b = bus()
+    with patch("app.core.invalidation.product_cache") as cache:
+        await b._handle(conn=None, message={"origin": REPLICA_ID, "versions": {"product:1": 4}})
+        cache.invalidate_products.assert_not_called()
+
+        # при resync эта версия уже считается увиденной
+        b.apply({"product:1": 4})
+        cache.invalidate_products.assert_not_called()
+
+
+def test_version_upsert_is_chunked_and_large_sets_resync(monkeypatch):
+    monkeypatch.setattr(invalidation, "VERSIONS_CHUNK_SIZE", 2)
+    session = MagicMock(info={changes._CHANGED_PRODUCTS: set(range(1, 2001))})
+    session.get_bind.return_value.dialect = postgresql.dialect()
+
+    def execute(stmt):
+        # upsert возвращает (key, version) по каждому ключу своего чанка
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        return [(v, 1) for k, v in params.items() if k.startswith("key_")]
+    session.execute.side_effect = execute
+
+    invalidation._publish_changes(session)
+
+    *upserts, notify = [call.args[0] for call in session.execute.call_args_list]
+    assert len(upserts) == 1000
+    params = upserts[0].compile(dialect=postgresql.dialect()).params
+    assert [params["key_m0"], params["key_m1"]] == ["product:1", "product:2"]
+    assert "key_m2" not in params
+    # payload на 2000 ключей не влезает в NOTIFY — другие реплики перечитают cache_versions
+    payload = json.loads(notify.compile(dialect=postgresql.dialect()).params["pg_notify_3"])
+    assert payload == {"origin": REPLICA_ID, "resync": True}
@@ -0,0 +1,89 @@
+import pytest
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from sqlalchemy.dialects import postgresql
+
+from app.core.popularity import ViewCounter
+from app.repositories.product_stats_repository import VIEWS_CHUNK_SIZE, ProductStatsRepository
+from app.services import popularity_service
+from app.services.popularity_service import PopularityService
+
+
+def make_service():
+    service = PopularityService(db=AsyncMock())
+    service.repo = AsyncMock()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_one_batch_and_resets():
+    service = make_service()
+    counter = ViewCounter(max_pending=100)
+    for product_id in (3, 1, 3, 3):
+        counter.record(product_id)
+
+    assert await service.flush(counter) == 4
+    service.repo.add_views.assert_awaited_once()
+    assert sorted(service.repo.add_views.await_args.args[0]) == [(1, 1), (3, 3)]
+    service.db.commit.assert_awaited_once()
+    assert counter.pending() == 0
+
+    # пустой буфер — в БД не ходим
+    assert await service.flush(counter) == 0
+    service.repo.add_views.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_views():
+    service = make_service()
+    service.repo.add_views.side_effect = RuntimeError("db down")
+    counter = ViewCounter(max_pending=100)
+    counter.record(1)
+    counter.record(1)
+
+    with pytest.raises(RuntimeError):
+        await service.flush(counter)
+    counter.record(1)
+    assert counter.pending() == 3
+
+
+def test_restore_caps_buffer_to_most_viewed_products():
+    counter = ViewCounter(max_pending=2)
+    counter.restore(Counter({1: 5, 2: 1, 3: 9}))
+    counter.record(4)
+    counter.restore(Counter())
+    assert counter.take() == Counter({3: 9, 1: 5})
+
+
+@pytest.mark.asyncio
+async def test_reload_builds_top_list():
+    service = make_service()
+    service.repo.top.return_value = [
+        SimpleNamespace(id=2, name="Boot", price=30.0, image_file="images/b.webp", views=10, score=7.25),
+        SimpleNamespace(id=1, name="Sneaker", price=10.0, image_file=None, views=3, score=1.5),
+    ]
+    counter = ViewCounter(max_pending=100)
+
+    await service.reload(counter)
+    half_life = popularity_service.settings.popularity_half_life
+    assert service.repo.top.await_args.args == (
+        popularity_service.settings.popularity_top_k, half_life, half_life * popularity_service.WINDOW_HALF_LIVES
+    )
+    assert [p.id for p in counter.top(5)] == [2, 1]
+    assert counter.top(1)[0].image == "/static/images/b.webp"
+
+
+@pytest.mark.asyncio
+async def test_add_views_stays_under_bind_parameter_limit():
+    repo = ProductStatsRepository(db=AsyncMock())
+    counts = [(product_id, 1) for product_id in range(20000, 0, -1)]
+    await repo.add_views(counts, half_life=3600)
+
+    statements = [call.args[0] for call in repo.db.execute.await_args_list]
+    assert len(statements) == 20000 // VIEWS_CHUNK_SIZE
+    for stmt in statements:
+        assert len(stmt.compile(dialect=postgresql.dialect()).params) < 32767
+    # первый upsert начинается с наименьших id
+    first = statements[0].compile(dialect=postgresql.dialect()).params
+    assert min(v for k, v in first.items() if k.startswith("param")) == 1
@@ -0,0 +1,166 @@
+import os
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core import changes
+from app.core.database import Base
+from app.models import Category, Product, ProductSize, Size
+from app.repositories import product_repository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.product_size_repository import ProductSizeRepository
+from app.schemas.product import ProductUpdate
+from app.schemas.product_size import ProductSizeCreate
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def size(size_id, quantity):
+    return ProductSizeCreate(size_id=size_id, quantity=quantity)
+
+
+@pytest.mark.asyncio
+async def test_sync_sizes_upserts_changed_rows_and_deletes_removed():
+    repo = ProductRepository(db=AsyncMock())
+    await repo._sync_sizes(7, [size(2, 5), size(1, 3), size(2, 7)])
+
+    upsert, removed = (compiled(call.args[0]) for call in repo.db.execute.await_args_list)
+    # повтор size_id — побеждает последнее значение; строки в порядке size_id
+    assert "VALUES (7, 1, 3), (7, 2, 7)" in upsert
+    assert "ON CONFLICT ON CONSTRAINT uq_product_sizes_product_id_size_id DO UPDATE SET quantity = excluded.quantity" in upsert
+    # неизменённое количество не переписывается
+    assert "WHERE product_sizes.quantity IS DISTINCT FROM excluded.quantity" in upsert
+    assert removed.startswith("DELETE FROM product_sizes")
+    assert "product_sizes.product_id = 7" in removed
+    assert "product_sizes.size_id NOT IN (1, 2)" in removed
+
+
+@pytest.mark.asyncio
+async def test_sync_sizes_with_empty_list_removes_all_sizes():
+    repo = ProductRepository(db=AsyncMock())
+    await repo._sync_sizes(7, [])
+
+    [call] = repo.db.execute.await_args_list
+    sql = compiled(call.args[0])
+    assert sql.startswith("DELETE FROM product_sizes")
+    assert "product_sizes.product_id = 7" in sql
+    assert "NOT IN" not in sql
+
+
+@pytest.mark.asyncio
+async def test_lock_products_locks_rows_in_id_order_and_chunks(monkeypatch):
+    monkeypatch.setattr(changes, "LOCK_CHUNK_SIZE", 2)
+    db = AsyncMock()
+    await changes.lock_products(db, [3, 1, 2, 1])
+
+    first, second = (compiled(call.args[0]) for call in db.execute.await_args_list)
+    assert "products.id IN (1, 2)" in first
+    assert "products.id IN (3)" in second
+    assert first.endswith("ORDER BY products.id FOR NO KEY UPDATE")
+
+
+def test_version_bump_runs_in_chunks(monkeypatch):
+    monkeypatch.setattr(changes, "LOCK_CHUNK_SIZE", 2)
+    session = MagicMock(info={changes._CHANGED_PRODUCTS: {5, 1, 3}})
+    session.get_bind.return_value.dialect = postgresql.dialect()
+
+    changes._bump_product_versions(session)
+
+    first, second = (compiled(call.args[0]) for call in session.execute.call_args_list)
+    assert first.startswith("UPDATE products SET version=nextval('catalog_version_seq')")
+    assert "products.id IN (1, 3)" in first
+    assert "products.id IN (5)" in second
+
+
+@pytest.mark.asyncio
+async def test_stock_write_locks_products_before_sizes():
+    db = AsyncMock(info={}, add=MagicMock())
+    db.execute.return_value = MagicMock()
+    repo = ProductSizeRepository(db)
+    await repo.apply_stock_levels([(2, 1, 5, False), (1, 1, 3, True)])
+
+    statements = [compiled(call.args[0]) for call in db.execute.await_args_list]
+    # блокировка products идёт первой, иначе взаимоблокировка с bump версий при коммите
+    assert statements[0].endswith("FOR NO KEY UPDATE")
+    assert "products.id IN (1, 2)" in statements[0]
+    assert any("product_sizes" in sql for sql in statements[1:])
+
+
+@pytest.mark.asyncio
+async def test_update_locks_product_before_sizes():
+    db = MagicMock(get=AsyncMock(), execute=AsyncMock(return_value=MagicMock()), flush=AsyncMock(), info={})
+    db.get.return_value = Product(id=3, name="Boot", price=30, description=None, category_id=1, is_active=True)
+
+    await ProductRepository(db).update(3, ProductUpdate(sizes=[size(1, 2)]))
+
+    lock, upsert = (compiled(call.args[0]) for call in db.execute.await_args_list[:2])
+    assert lock.endswith("FOR NO KEY UPDATE")
+    assert "products.id IN (3)" in lock
+    assert upsert.startswith("INSERT INTO product_sizes")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("is_active, upserted", [(False, False), (True, True)])
+async def test_update_keeps_suggestions_in_line_with_is_active(monkeypatch, is_active, upserted):
+    suggest = MagicMock()
+    monkeypatch.setattr(product_repository, "suggest_index", suggest)
+    db = MagicMock(get=AsyncMock(), execute=AsyncMock(return_value=MagicMock()), flush=AsyncMock(), info={})
+    db.get.return_value = Product(id=3, name="Boot", price=30, description=None, category_id=1, is_active=not is_active)
+
+    await ProductRepository(db).update(3, ProductUpdate(is_active=is_active))
+    # подсказки меняются только после коммита
+    suggest.upsert_product.assert_not_called()
+    for callback in db.info[changes._AFTER_COMMIT]:
+        callback()
+    assert suggest.upsert_product.called is upserted
+    assert suggest.remove_product.called is not upserted
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_sync_sizes_keeps_unchanged_rows_in_place():
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            # схема создаётся внутри транзакции и откатывается в конце теста
+            await conn.run_sync(Base.metadata.create_all)
+            session = AsyncSession(bind=conn)
+            session.add_all([Category(id=1, name="Shoes", slug="shoes"), *(Size(id=i, value=v) for i, v in ((1, "S"), (2, "M"), (3, "L")))])
+            session.add(Product(id=1, name="Sneaker", price=10, category_id=1))
+            await session.flush()
+            repo = ProductRepository(session)
+
+            async def rows():
+                result = await session.execute(
+                    select(ProductSize.id, ProductSize.size_id, ProductSize.quantity)
+                    .where(ProductSize.product_id == 1)
+                    .order_by(ProductSize.size_id)
+                    .execution_options(populate_existing=True)
+                )
+                return result.all()
+
+            # вставка
+            await repo._sync_sizes(1, [size(1, 5), size(2, 1)])
+            inserted = await rows()
+            assert [(s, q) for _, s, q in inserted] == [(1, 5), (2, 1)]
+
+            # изменение количества и новый размер: строки обновляются на месте, id сохраняются
+            await repo._sync_sizes(1, [size(1, 5), size(2, 4), size(3, 2)])
+            updated = await rows()
+            assert [(s, q) for _, s, q in updated] == [(1, 5), (2, 4), (3, 2)]
+            assert [i for i, _, _ in updated[:2]] == [i for i, _, _ in inserted]
+
+            # убранный размер удаляется
+            await repo._sync_sizes(1, [size(2, 4)])
+            assert [(s, q) for _, s, q in await rows()] == [(2, 4)]
+            await conn.rollback()
+    finally:
+        await engine.dispose()
@@ -1,10 +1,24 @@
+import os
+
 import pytest
 from unittest.mock import AsyncMock
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
 from types import SimpleNamespace
 from fastapi import HTTPException
 
-from app.services.product_service import ProductService
-from app.schemas.product import ProductCreate, ProductUpdate
+from app.core.catalog import catalog
+from app.core.database import Base
+from app.core.response_cache import product_cache
+from app.services import product_service
+from app.repositories.product_repository import listing_filter, product_load_options
+from app.models import Category, Product, ProductSize, Size
+from app.services.product_service import ProductService, dump_product_rows, dump_products, dump_search_page, fold_changes
+from app.schemas.product import ProductCreate, ProductUpdate, ProductView
+from app.schemas.stock import BulkUpdateRequest, StockChangeItem
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
 
 
 @pytest.mark.asyncio
@@ -58,20 +72,22 @@ async def test_get_by_category_slug():
     service.category_repository = mock_cat_repo
     service.product_repository = mock_prod_repo
 
+    catalog.load(categories=[SimpleNamespace(id=7, name="Cat", slug="cat-slug", version=1, parent_id=None)], sizes=[])
+
     # Сценарий: категория не найдена -> HTTPException 404
-    mock_cat_repo.get_by_slug.return_value = None
     with pytest.raises(HTTPException) as e:
         await service.get_by_category_slug("missing")
     assert e.value.status_code == 404
 
     # Сценарий: категория найдена -> возвращаем список продуктов
-    mock_cat_repo.get_by_slug.return_value = SimpleNamespace(slug="cat-slug")
-    mock_prod_repo.get_by_category_slug.return_value = [{"id": 3, "name": "CProd"}]
+    mock_prod_repo.get_by_category_id.return_value = [{"id": 3, "name": "CProd"}]
 
     res = await service.get_by_category_slug("cat-slug")
     assert isinstance(res, list)
-    # Проверяем, что метод репозитория вызвался с правильным slug
-    mock_prod_repo.get_by_category_slug.assert_awaited_once_with("cat-slug")
+    # slug берётся из снимка каталога, в categories не ходим
+    mock_cat_repo.get_by_slug.assert_not_awaited()
+    # Проверяем, что метод репозитория вызвался с id категории
+    mock_prod_repo.get_by_category_id.assert_awaited_once_with(7)
 
 
 @pytest.mark.asyncio
@@ -150,3 +166,227 @@ async def test_update_and_delete_paths():
     res = await service.delete(5)
     assert res == {"detail": "Product deleted"}
     db.commit.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_check_stock_reports_each_item():
+    service = ProductService(db=None)
+    mock_ps_repo = AsyncMock()
+    service.ps_repo = mock_ps_repo
+
+    mock_ps_repo.check_many.return_value = {
+        (1, 1): {"product_exists": True, "size_exists": True, "available": 5, "price": 10.0},
+        (1, 2): {"product_exists": True, "size_exists": False, "available": 0, "price": 10.0},
+    }
+    items = [
+        StockChangeItem(product_id=1, size_id=1, quantity=3),
+        StockChangeItem(product_id=1, size_id=1, quantity=6),
+        StockChangeItem(product_id=1, size_id=2, quantity=1),
+        StockChangeItem(product_id=9, size_id=1, quantity=1),
+    ]
+    res = await service.check_stock(items)
+
+    # Один запрос на все позиции
+    mock_ps_repo.check_many.assert_awaited_once_with([(1, 1), (1, 1), (1, 2), (9, 1)])
+    assert [r["in_stock"] for r in res] == [True, False, False, False]
+    assert res[0]["price"] == 10.0
+    assert res[2]["size_exists"] is False
+    assert res[3]["product_exists"] is False
+
+
+@pytest.mark.asyncio
+async def test_get_many_keeps_request_order_and_limits_ids():
+    service = ProductService(db=None)
+    mock_repo = AsyncMock()
+    service.product_repository = mock_repo
+
+    mock_repo.get_many.return_value = [SimpleNamespace(id=1), SimpleNamespace(id=3)]
+    res = await service.get_many([3, 2, 1, 3])
+
+    # Дубликаты схлопываются, неизвестные id пропускаются
+    mock_repo.get_many.assert_awaited_once_with([3, 2, 1])
+    assert [p.id for p in res] == [3, 1]
+
+    with pytest.raises(HTTPException) as e:
+        await service.get_many(list(range(1, 1000)))
+    assert e.value.status_code == 400
+
+    # лимит считается после схлопывания повторов
+    mock_repo.get_many.reset_mock()
+    await service.get_many([1, 2] * 100)
+    mock_repo.get_many.assert_awaited_once_with([1, 2])
+
+
+@pytest.mark.asyncio
+async def test_search_pages_with_cursor():
+    service = ProductService(db=None)
+    mock_repo = AsyncMock()
+    service.product_repository = mock_repo
+
+    # репозиторий возвращает limit + 1 строку — значит есть следующая страница
+    p1, p2, p3 = (SimpleNamespace(id=i) for i in (3, 2, 1))
+    mock_repo.search.return_value = [(p1, 0.9), (p2, 0.5), (p3, 0.5)]
+    page = await service.search("shoe", limit=2, in_stock=True)
+    assert [p.id for p in page["items"]] == [3, 2]
+    assert page["next_cursor"]
+    assert mock_repo.search.await_args.kwargs["limit"] == 3
+    assert mock_repo.search.await_args.kwargs["in_stock"] is True
+
+    # курсор передаёт (score, id) последней строки
+    mock_repo.search.return_value = [(p3, 0.5)]
+    page = await service.search("shoe", limit=2, cursor=page["next_cursor"])
+    assert mock_repo.search.await_args.kwargs["after"] == (0.5, 2)
+    assert page["next_cursor"] is None
+
+    with pytest.raises(HTTPException) as exc:
+        await service.search("shoe", cursor="not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_fold_changes_applies_repeats_in_order():
+    folded = fold_changes([
+        ("a", 5, "set"), ("a", 2, "add"),  # 5 + 2 -> абсолютное 7
+        ("b", 1, "add"), ("b", -3, "add"),  # приращение -2
+        ("c", 4, "add"), ("c", 1, "set"),  # set перекрывает
+    ])
+    assert folded == {"a": (7, False), "b": (-2, True), "c": (1, False)}
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_chunks_rows_and_commits_once(monkeypatch):
+    monkeypatch.setattr(product_service, "BULK_CHUNK_SIZE", 2)
+    service = ProductService(db=AsyncMock())
+    service.ps_repo = AsyncMock()
+    service.ps_repo.apply_stock_levels.side_effect = lambda rows: (len(rows), [])
+    service.product_repository = AsyncMock()
+    service.product_repository.apply_prices.return_value = (0, [{"product_id": 9, "reason": "missing"}])
+
+    data = BulkUpdateRequest(
+        stock=[{"product_id": p, "size_id": 1, "quantity": 1} for p in (3, 1, 2)],
+        prices=[{"product_id": 9, "price": 10}],
+    )
+    result = await service.bulk_update(data)
+
+    chunks = [call.args[0] for call in service.ps_repo.apply_stock_levels.await_args_list]
+    assert chunks == [[(1, 1, 1, False), (2, 1, 1, False)], [(3, 1, 1, False)]]
+    assert result["stock_updated"] == 3
+    assert result["skipped"] == [{"product_id": 9, "reason": "missing"}]
+    service.db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_bulk_update_commits_more_products_than_bind_parameters():
+    # 40k товаров: по одному параметру на id в хуках коммита превысило бы лимит asyncpg (32767)
+    count = 40000
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            session = AsyncSession(bind=conn)
+            session.add_all([Category(id=1, name="Shoes", slug="shoes"), Size(id=1, value="M")])
+            await session.flush()
+            await session.execute(insert(Product), [
+                {"id": i, "name": f"p{i}", "price": 1, "category_id": 1, "is_active": True} for i in range(1, count + 1)
+            ])
+            await session.execute(insert(ProductSize), [
+                {"product_id": i, "size_id": 1, "quantity": 1} for i in range(1, count + 1)
+            ])
+
+            result = await ProductService(session).bulk_update(BulkUpdateRequest(
+                stock=[{"product_id": i, "size_id": 1, "quantity": 7} for i in range(1, count + 1)],
+                prices=[{"product_id": i, "price": 2} for i in range(1, count + 1)],
+            ))
+
+            assert (result["stock_updated"], result["prices_updated"]) == (count, count)
+            versions = await session.scalar(select(func.count(func.distinct(Product.version))))
+            assert versions == count
+            await conn.rollback()
+    finally:
+        await engine.dispose()
+
+
+def test_product_view_is_canonical_and_validated():
+    assert ProductView.parse(None, None) is None
+    view = ProductView.parse("price, name", "images,category")
+    # id добавляется всегда, порядок не зависит от запроса — одна запись кэша
+    assert view == ProductView.parse("id,name,price", "category,images")
+    assert view.fields == ("id", "name", "price")
+    assert view.include == ("category", "images")
+    assert ProductView.parse(None, "sizes").fields == ("id", "name", "price", "description")
+    with pytest.raises(ValueError):
+        ProductView.parse("id,password", None)
+
+
+def test_sparse_view_loads_and_serializes_only_requested_parts():
+    view = ProductView.parse("name,image", None)
+    option_paths = [str(getattr(o, "path", "")) for o in product_load_options(view)]
+    assert not any("sizes" in p or "images" in p or "category" in p for p in option_paths)
+
+    product = SimpleNamespace(id=1, name="P", image_file="images/sha256/ab/cd/x.png", description=None)
+    assert dump_products([product], view) == b'[{"id":1,"name":"P","image":"/static/images/sha256/ab/cd/x.png"}]'
+    # явно запрошенный null остаётся в ответе
+    assert dump_products([product], ProductView.parse("description", None)) == b'[{"id":1,"description":null}]'
+
+
+def test_listing_filter_is_active_aware():
+    sql = str(select(Product.id).where(*listing_filter(category_id=3, in_stock=True)))
+    # голый is_active совпадает с условием частичного индекса
+    assert "WHERE products.is_active AND" in sql
+    assert "category_closure" in sql
+    assert "EXISTS (SELECT product_sizes.id \nFROM product_sizes \nWHERE product_sizes.product_id = products.id" in sql
+    assert "NOT (EXISTS" in str(select(Product.id).where(*listing_filter(in_stock=False)))
+    assert len(listing_filter()) == 1
+
+
+@pytest.mark.asyncio
+async def test_in_stock_listing_is_cached_separately():
+    product_cache.clear()
+    catalog.load(categories=[], sizes=[])
+    service = ProductService(db=None)
+    service.product_repository = AsyncMock()
+    service.product_repository.get_all.return_value = []
+
+    await service.list_json(in_stock=True)
+    await service.list_json(in_stock=True)
+    await service.list_json()
+    calls = [call.args for call in service.product_repository.get_all.await_args_list]
+    assert calls == [(None, True), (None, None)]
+
+
+def test_row_projection_matches_model_serialization():
+    view = ProductView.parse("name,price,description,category_id,image", None)
+    rows = [
+        SimpleNamespace(id=1, version=3, name="Кеды", price=10.0, description=None, category_id=2, image_file="a.png"),
+        SimpleNamespace(id=2, version=1, name="Boot", price=29.5, description="x\n\"y\"", category_id=2, image_file=None),
+    ]
+    assert dump_product_rows(rows, view) == dump_products(rows, view)
+    assert dump_product_rows([], view) == b"[]"
+
+
+@pytest.mark.asyncio
+async def test_sparse_listing_without_includes_reads_rows():
+    product_cache.clear()
+    catalog.load(categories=[], sizes=[])
+    service = ProductService(db=None)
+    service.product_repository = AsyncMock()
+    service.product_repository.get_rows.return_value = [SimpleNamespace(id=1, version=4, name="P")]
+
+    cached = await service.list_json(view=ProductView.parse("name", None))
+    assert cached.body == b'[{"id":1,"name":"P"}]'
+    service.product_repository.get_all.assert_not_awaited()
+
+    # со связями — прежний путь через ORM
+    service.product_repository.get_all.return_value = []
+    await service.list_json(view=ProductView.parse("name", "category"))
+    service.product_repository.get_all.assert_awaited_once()
+
+
+def test_search_page_dumps_orm_items():
+    category = SimpleNamespace(id=2, name="Shoes", slug="shoes", parent_id=None)
+    product = SimpleNamespace(id=1, name="P", price=1.0, description=None, category=category, sizes=[], images=[])
+    assert dump_search_page({"items": [product], "next_cursor": None}) == (
+        b'{"items":[{"id":1,"name":"P","price":1.0,"description":null,'
+        b'"category":{"name":"Shoes","slug":"shoes","parent_id":null,"id":2},"sizes":[],"images":[]}],'
+        b'"next_cursor":null}'
+    )
@@ -0,0 +1,63 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.repositories.product_transfer_repository import MergeResult
+from app.services.product_transfer_service import ProductTransferService, iter_lines
+
+SNAPSHOT = SimpleNamespace(category_by_id={1: object()}, size_by_id={1: object(), 2: object()})
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def ndjson(*rows):
+    return b"".join(json.dumps(r).encode() + b"\n" for r in rows)
+
+
+def make_service():
+    svc = ProductTransferService(db=AsyncMock())
+    svc.repo = AsyncMock()
+    svc.repo.merge.side_effect = lambda rows: MergeResult(created=[r.name for r in rows])
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_joins_lines_split_across_chunks():
+    lines = [line async for line in iter_lines(stream(b'{"a":', b'1}\n{"b"', b":2}\n", b'{"c":3}'))]
+    assert lines == [b'{"a":1}', b'{"b":2}', b'{"c":3}']
+
+
+@pytest.mark.asyncio
+async def test_import_merges_in_chunks_and_commits_each():
+    svc = make_service()
+    body = ndjson(*({"name": f"P{i}", "price": 1, "category_id": 1} for i in range(5)))
+    with patch("app.services.product_transfer_service.catalog.get", AsyncMock(return_value=SNAPSHOT)):
+        report = await svc.import_ndjson(stream(body[:7], body[7:]), chunk_size=2)
+
+    assert [len(call.args[0]) for call in svc.repo.merge.await_args_list] == [2, 2, 1]
+    assert svc.db.commit.await_count == 3
+    assert report["created"] == 5 and report["failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_import_reports_invalid_rows_with_line_numbers():
+    svc = make_service()
+    body = ndjson(
+        {"name": "Ok", "price": 1, "category_id": 1, "sizes": [{"size_id": 2, "quantity": 1}]},
+        {"name": "Bad price", "price": -1, "category_id": 1},
+        {"name": "No category", "price": 1, "category_id": 9},
+        {"name": "No size", "price": 1, "category_id": 1, "sizes": [{"size_id": 7, "quantity": 1}]},
+    ) + b"\nnot json\n" + ndjson({"name": "Ok", "price": 2, "category_id": 1})
+    with patch("app.services.product_transfer_service.catalog.get", AsyncMock(return_value=SNAPSHOT)):
+        report = await svc.import_ndjson(stream(body))
+
+    assert report["failed"] == 4
+    assert [e["line"] for e in report["errors"]] == [2, 3, 4, 6]
+    assert report["errors"][1]["detail"] == "Category 9 does not exist"
+    # повтор имени в чанке схлопывается в последнюю строку
+    (rows,) = svc.repo.merge.await_args.args
+    assert [(r.name, r.price) for r in rows] == [("Ok", 2)]
@@ -0,0 +1,134 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from fastapi import Response
+
+from app.core.catalog import CatalogCache, catalog
+from app.core.response_cache import (
+    ResponseCache, cached_json_response, not_modified_or_tag, product_cache, product_etag,
+)
+from app.services.product_service import ProductService
+
+
+def request(if_none_match=None):
+    headers = {"if-none-match": if_none_match} if if_none_match else {}
+    return SimpleNamespace(headers=headers)
+
+
+def test_product_write_invalidates_entry_and_list_pages():
+    cache = ResponseCache(max_bytes=1024)
+    cache.put(("product", 1), cache.product_version(1), b'{"id":1}')
+    cache.put(("product", 2), cache.product_version(2), b'{"id":2}')
+    cache.put(("list", "all"), cache.list_version(), b"[]")
+
+    cache.invalidate_products({1})
+
+    assert cache.get(("product", 1), cache.product_version(1)) is None
+    assert cache.get(("product", 2), cache.product_version(2)).body == b'{"id":2}'
+    assert cache.get(("list", "all"), cache.list_version()) is None
+
+
+def test_stale_fill_is_not_stored():
+    cache = ResponseCache(max_bytes=1024)
+    # версия снята до чтения, запись закоммитилась во время чтения
+    version = cache.product_version(1)
+    cache.invalidate_products({1})
+
+    cached = cache.put(("product", 1), version, b'{"id":1,"price":1}')
+    assert cached.body == b'{"id":1,"price":1}'
+    assert cache.get(("product", 1), cache.product_version(1)) is None
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = ResponseCache(max_bytes=10)
+    for pid in range(3):
+        cache.put(("product", pid), cache.product_version(pid), b"x" * 4)
+
+    assert cache.size <= 10
+    # вытесняется самая старая запись
+    assert cache.get(("product", 0), cache.product_version(0)) is None
+    assert cache.get(("product", 2), cache.product_version(2)) is not None
+
+
+def test_product_versions_are_bounded():
+    cache = ResponseCache(max_bytes=1024, max_tracked_products=3)
+    version = cache.product_version(1)
+    cache.invalidate_products({1, 2, 3})
+    cache.put(("product", 4), cache.product_version(4), b'{"id":4}')
+
+    cache.invalidate_products({4})
+
+    assert len(cache._product_versions) == 0
+    assert cache.get(("product", 4), cache.product_version(4)) is None
+    # счётчик товара 1 сброшен, но версия, снятая до сброса, уже не подходит
+    cache.put(("product", 1), version, b'{"id":1}')
+    assert cache.get(("product", 1), cache.product_version(1)) is None
+
+
+def test_conditional_request_returns_304():
+    cache = ResponseCache(max_bytes=1024)
+    cached = cache.put(("product", 1), cache.product_version(1), b'{"id":1}')
+
+    full = cached_json_response(request(), cached)
+    assert full.status_code == 200
+    assert full.body == b'{"id":1}'
+    assert full.headers["etag"] == cached.etag
+
+    not_modified = cached_json_response(request(cached.etag), cached)
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+
+
+def test_route_validators_short_circuit_before_serializing():
+    response = Response()
+    assert not_modified_or_tag(request(), response, '"cl1.5"', "public, max-age=60") is None
+    assert response.headers["etag"] == '"cl1.5"'
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+    not_modified = not_modified_or_tag(request('W/"cl1.5"'), Response(), '"cl1.5"', "public, max-age=60")
+    assert not_modified.status_code == 304
+    assert not_modified.headers["cache-control"] == "public, max-age=60"
+
+
+def test_catalog_etags_follow_row_versions():
+    cache = CatalogCache(ttl=60)
+    shoes = SimpleNamespace(id=1, name="Shoes", slug="shoes", version=3, parent_id=None)
+    bags = SimpleNamespace(id=2, name="Bags", slug="bags", version=4, parent_id=None)
+    sizes = [SimpleNamespace(id=1, value="M", version=5)]
+
+    before = cache.load([shoes, bags], sizes)
+    # переименование даёт строке новую версию из общей последовательности
+    renamed = cache.load([SimpleNamespace(id=1, name="Boots", slug="shoes", version=6, parent_id=None), bags], sizes)
+    # удаление строки не с максимальной версией меняет count
+    deleted = cache.load([bags], sizes)
+
+    assert len({before.categories_etag, renamed.categories_etag, deleted.categories_etag}) == 3
+    assert len({before.stamp, renamed.stamp, deleted.stamp}) == 3
+    assert before.sizes_etag == renamed.sizes_etag == deleted.sizes_etag
+
+
+@pytest.mark.asyncio
+async def test_revalidation_on_cache_miss_reads_only_the_version():
+    catalog.load(categories=[], sizes=[])
+    product_cache.clear()
+    service = ProductService(db=None)
+    service.product_repository = AsyncMock()
+    service.product_repository.get_version.return_value = 9
+    etag = product_etag(1, 9, catalog._snapshot.stamp)
+
+    cached = await service.get_json(1, if_none_match=etag)
+
+    assert cached.etag == etag
+    assert cached_json_response(request(etag), cached).status_code == 304
+    service.product_repository.get_by_id.assert_not_awaited()
+
+    # товар изменился — полный ответ, ETag из версии загруженного товара
+    service.product_repository.get_version.return_value = 10
+    service.product_repository.get_by_id.return_value = SimpleNamespace(
+        id=1, version=10, name="P", price=1.0, description=None,
+        category=SimpleNamespace(id=1, name="Cat", slug="cat"), sizes=[], images=[],
+    )
+    cached = await service.get_json(1, if_none_match=etag)
+    assert cached.etag == product_etag(1, 10, catalog._snapshot.stamp)
+    assert b'"id":1' in cached.body
@@ -3,31 +3,33 @@ from unittest.mock import AsyncMock
 from types import SimpleNamespace
 from sqlalchemy.exc import IntegrityError
 
+from app.core.catalog import catalog
 from app.services.size_service import SizeService
 from app.schemas.size import SizeCreate, SizeUpdate
 
 
 @pytest.mark.asyncio
-async def test_list_and_get_calls_repo():
-    """Проверяем получение списка размеров и конкретного размера по ID"""
-    mock_repo = AsyncMock()
-    mock_repo.get_all.return_value = [{"id": 1, "value": "S"}]
-    mock_repo.get_by_id.return_value = {"id": 1, "value": "S"}
+async def test_list_and_get_read_catalog_snapshot():
+    """Проверяем, что список размеров и размер по ID читаются из снимка каталога"""
+    catalog.load(categories=[], sizes=[SimpleNamespace(id=1, value="S", version=1)])
 
+    mock_repo = AsyncMock()
     svc = SizeService(db=None)
     svc.repo = mock_repo
 
     # Проверяем получение списка размеров
     res = await svc.list()
     assert isinstance(res, list)
-    # Проверяем, что репозиторий вызывался ровно один раз
-    mock_repo.get_all.assert_awaited_once()
+    assert res[0].value == "S"
 
     # Проверяем получение размера по ID
     got = await svc.get(1)
-    assert got == {"id": 1, "value": "S"}
-    # Проверяем, что репозиторий вызывался с правильным ID
-    mock_repo.get_by_id.assert_awaited_once_with(1)
+    assert got.id == 1 and got.value == "S"
+    assert await svc.get(99) is None
+
+    # В БД за чтением не ходим
+    mock_repo.get_all.assert_not_awaited()
+    mock_repo.get_by_id.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -61,6 +63,7 @@ async def test_create_duplicate_and_success():
     assert "already exists" in str(e.value)
 
     # ТЕСТ 2: Успешное создание размера
+    version_before = catalog.version
     # Настраиваем мок так, чтобы размер не нашелся (нет дубликата)
     mock_repo.get_by_value.return_value = None
     mock_repo.create.return_value = SimpleNamespace(id=3, value="XL")
@@ -70,6 +73,8 @@ async def test_create_duplicate_and_success():
     assert getattr(res, "id") == 3
     # Проверяем, что метод create репозитория был вызван
     mock_repo.create.assert_awaited_once()
+    # Проверяем, что снимок каталога помечен устаревшим
+    assert catalog.version > version_before
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,35 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core import static_delivery
+
+app = FastAPI()
+app.include_router(static_delivery.router)
+
+
+async def get(path: str) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path)
+
+
+@pytest.mark.asyncio
+async def test_static_request_is_handed_to_nginx():
+    r = await get("/static/images/products/1/photo%20one.jpg")
+    assert r.status_code == 200 and r.content == b""
+    assert r.headers["x-accel-redirect"] == "/_static/products/images/products/1/photo%20one.jpg"
+    assert "cache-control" not in r.headers
+    # nginx берёт Content-Type по расширению файла, а не из ответа приложения
+    assert "content-type" not in r.headers
+
+    r = await get("/static/images/sha256/ab/cd/abcd.png")
+    assert r.headers["cache-control"].endswith("immutable")
+
+
+@pytest.mark.asyncio
+async def test_paths_outside_static_dir_are_rejected():
+    assert (await get("/static/images/..%2F..%2Fapp%2Fmain.py")).status_code == 404
+    assert (await get("/static/")).status_code == 404
+    # недописанные загрузки и временные файлы вариантов
+    assert (await get("/static/images/sha256/.staging/0f1e2d")).status_code == 404
+    assert (await get("/static/images/sha256/ab/cd/.1234.tmp")).status_code == 404
@@ -0,0 +1,74 @@
+import pytest
+from unittest.mock import AsyncMock
+from types import SimpleNamespace
+from fastapi import HTTPException
+
+from app.services.stock_hold_service import StockHoldService
+from app.schemas.stock import StockHoldCreate
+
+
+def make_service():
+    db = AsyncMock()
+    svc = StockHoldService(db=db)
+    svc.repo = AsyncMock()
+    svc.ps_repo = AsyncMock()
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_create_reserves_stock_and_stores_hold():
+    svc = make_service()
+    svc.repo.get_by_id.return_value = SimpleNamespace(id="h1", status="active")
+
+    data = StockHoldCreate(items=[{"product_id": 1, "size_id": 2, "quantity": 3}], ttl_seconds=60)
+    hold = await svc.create(data)
+
+    assert hold.status == "active"
+    svc.ps_repo.reserve_many.assert_awaited_once_with([{"product_id": 1, "size_id": 2, "quantity": 3}])
+    svc.repo.create.assert_awaited_once()
+    svc.db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_confirm_is_idempotent():
+    svc = make_service()
+
+    # Первый вызов переводит резерв в confirmed
+    svc.repo.confirm.return_value = True
+    svc.repo.get_by_id.return_value = SimpleNamespace(id="h1", status="confirmed")
+    assert (await svc.confirm("h1")).status == "confirmed"
+
+    # Повторный вызов ничего не меняет, но и не падает
+    svc.repo.confirm.return_value = False
+    assert (await svc.confirm("h1")).status == "confirmed"
+
+    # Просроченный резерв подтвердить нельзя
+    svc.repo.get_by_id.return_value = SimpleNamespace(id="h1", status="expired")
+    with pytest.raises(HTTPException) as e:
+        await svc.confirm("h1")
+    assert e.value.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_cancel_is_idempotent():
+    svc = make_service()
+
+    svc.ps_repo.release_many.return_value = ["h1"]
+    svc.repo.get_by_id.return_value = SimpleNamespace(id="h1", status="cancelled")
+    assert (await svc.cancel("h1")).status == "cancelled"
+
+    # Повторная отмена не возвращает остатки второй раз
+    svc.ps_repo.release_many.return_value = []
+    assert (await svc.cancel("h1")).status == "cancelled"
+
+    # Подтверждённый резерв отменить нельзя
+    svc.repo.get_by_id.return_value = SimpleNamespace(id="h1", status="confirmed")
+    with pytest.raises(HTTPException) as e:
+        await svc.cancel("h1")
+    assert e.value.status_code == 409
+
+    # Неизвестный резерв -> 404
+    svc.repo.get_by_id.return_value = None
+    with pytest.raises(HTTPException) as e2:
+        await svc.cancel("missing")
+    assert e2.value.status_code == 404
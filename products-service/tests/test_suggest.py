@@ -0,0 +1,116 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.catalog import catalog
+from app.core import suggest
+from app.core.suggest import SuggestIndex, normalize
+
+
+def product(pid, name, category_id=1):
+    return SimpleNamespace(id=pid, name=name, category_id=category_id)
+
+
+def category(cid, name, slug):
+    return SimpleNamespace(id=cid, name=name, slug=slug)
+
+
+def snapshot(version, *categories):
+    return SimpleNamespace(
+        version=version,
+        categories=list(categories),
+        category_by_id={c.id: c for c in categories},
+    )
+
+
+def labels(entries):
+    return [e.label for e in entries]
+
+
+def make_index():
+    index = SuggestIndex()
+    index.build(
+        products=[product(1, "Trail Runner"), product(2, "Tramp Boot", 2), product(3, "Café Racer")],
+        categories=[category(1, "Running", "running"), category(2, "Boots", "boots")],
+        sales={2: 5, 1: 1},
+        catalog_version=1,
+    )
+    return index
+
+
+def test_prefix_matches_any_word_and_ranks_by_sales():
+    index = make_index()
+    assert labels(index.suggest("tra")) == ["Tramp Boot", "Trail Runner"]
+    # при равной популярности — по алфавиту
+    assert labels(index.suggest("RUN")) == ["Running", "Trail Runner"]
+    # акценты и регистр не важны
+    assert labels(index.suggest("cafe")) == ["Café Racer"]
+    assert index.suggest("  ") == []
+    assert normalize("  Café   Racer ") == "cafe racer"
+
+
+def test_categories_rank_by_sales_of_their_products():
+    index = make_index()
+    assert [(e.kind, e.label) for e in index.suggest("b")] == [("category", "Boots"), ("product", "Tramp Boot")]
+
+
+def test_incremental_updates():
+    index = make_index()
+    index.upsert_product(1, "Road Runner", 1)
+    assert labels(index.suggest("trail")) == []
+    assert labels(index.suggest("road")) == ["Road Runner"]
+
+    index.upsert_product(4, "Trail Blazer", 2)
+    index.record_sales({4: 10})
+    assert labels(index.suggest("tr")) == ["Trail Blazer", "Tramp Boot"]
+    assert labels(index.suggest("boo")) == ["Boots", "Tramp Boot"]
+
+    index.remove_product(4)
+    assert labels(index.suggest("blazer")) == []
+    assert index.stats()["products"] == 3
+
+
+def test_short_prefix_ranks_best_sellers_beyond_scan_window(monkeypatch):
+    monkeypatch.setattr(suggest, "MAX_SCAN", 3)
+    index = SuggestIndex()
+    index.build(
+        products=[product(i, f"Apple {i:02d}") for i in range(1, 11)],
+        categories=[],
+        sales={10: 50, 9: 20},
+    )
+    # по алфавиту Apple 09/10 за окном просмотра, но они — лидеры продаж
+    assert labels(index.suggest("a", limit=2)) == ["Apple 10", "Apple 09"]
+    assert labels(index.suggest("ap", limit=1)) == ["Apple 10"]
+
+    # продажи после сборки тоже поднимают товар в списке префикса
+    index.record_sales({8: 100})
+    assert labels(index.suggest("a", limit=1)) == ["Apple 08"]
+    # переименованный товар из списка префикса больше не подсказывается
+    index.upsert_product(8, "Pear 08", 1)
+    assert labels(index.suggest("a", limit=1)) == ["Apple 10"]
+
+
+def test_sync_categories_applies_renames_and_deletes():
+    index = make_index()
+    index.sync_categories(snapshot(2, category(1, "Jogging", "jogging"), category(3, "Sandals", "sandals")))
+    assert labels(index.suggest("running")) == []
+    assert [(e.label, e.slug) for e in index.suggest("jog")] == [("Jogging", "jogging")]
+    assert labels(index.suggest("boots")) == []
+    assert labels(index.suggest("sand")) == ["Sandals"]
+    assert index.stats()["categories"] == 2
+
+
+@pytest.mark.asyncio
+async def test_build_from_db_skips_inactive_products():
+    catalog.load(categories=[], sizes=[])
+    db = AsyncMock()
+    db.execute.side_effect = [
+        MagicMock(all=MagicMock(return_value=[product(1, "Trail Runner")])),
+        MagicMock(all=MagicMock(return_value=[])),
+    ]
+    index = SuggestIndex()
+    await index.build_from_db(db)
+
+    products_stmt = db.execute.await_args_list[0].args[0]
+    assert "WHERE products.is_active" in str(products_stmt)
+    assert labels(index.suggest("trail")) == ["Trail Runner"]